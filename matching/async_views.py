@@ -0,0 +1,72 @@
+# matching/async_views.py
+import json
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework import serializers
+
+from matching.models import MatchRequest
+from matching.projections import aproject_match_requests
+from matching.services import MatchingService
+from seeker_provider_app.routers import replica_reads
+
+# Async counterparts of the hottest MatchRequestViewSet read paths. DRF views
+# are synchronous and run on a single thread under ASGI; these plain Django
+# views use the async ORM so one worker can hold many slow searches at once.
+# They authenticate through the session only.
+
+
+async def _authenticated_user(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    return user
+
+
+@replica_reads
+@require_POST
+async def find_matches(request):
+    """
+    Async variant of ``MatchRequestViewSet.find_matches``
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse({
+            'detail': 'Authentication credentials were not provided.'
+        }, status=403)
+
+    try:
+        seeker_preferences = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid JSON body'}, status=400)
+
+    if not isinstance(seeker_preferences, dict):
+        return JsonResponse({'detail': 'Expected a JSON object'}, status=400)
+
+    try:
+        data = await MatchingService.asearch_matches(user, seeker_preferences)
+    except serializers.ValidationError as val_error:
+        return JsonResponse(val_error.detail, status=400, safe=False)
+
+    return JsonResponse(data, safe=False)
+
+
+@require_GET
+async def match_requests(request):
+    """
+    Async variant of the ``MatchRequestViewSet`` list endpoint
+    """
+    user = await _authenticated_user(request)
+    if user is None:
+        return JsonResponse({
+            'detail': 'Authentication credentials were not provided.'
+        }, status=403)
+
+    if user.user_type == 'seeker':
+        queryset = MatchRequest.objects.filter(seeker=user)
+    elif user.user_type == 'provider':
+        queryset = MatchRequest.objects.filter(provider=user)
+    else:
+        queryset = MatchRequest.objects.none()
+
+    return JsonResponse(await aproject_match_requests(queryset), safe=False)
@@ -0,0 +1,166 @@
+# matching/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+# Preference keys that change the result of find_matches
+RESULT_PREFERENCE_KEYS = (
+    'category', 'max_price', 'availability_type', 'min_score', 'max_distance_km',
+    'keyword', 'limit', 'cursor'
+)
+
+ALL_CATEGORIES = '*'
+
+
+class MatchResultCache:
+    """
+    Size-bounded, TTL-expiring LRU cache of find_matches responses
+
+    Entries are indexed by the category they were filtered on and by the
+    providers they contain, so a change to a service only evicts searches
+    over its category (plus unfiltered searches), and a change to a provider
+    only evicts searches that returned it.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_category = {}
+        self._keys_by_provider = {}
+
+    @staticmethod
+    def make_key(seeker, seeker_preferences):
+        """
+        Build a canonical key from the result-affecting preferences and the
+        seeker's location and coordinates, the only seeker inputs to scoring
+
+        :return: Tuple of (cache key, category scope)
+        """
+        from services.cache import get_category_id
+
+        canonical = MatchResultCache._canonical(seeker, seeker_preferences)
+        category = ALL_CATEGORIES
+        if canonical.get('category'):
+            category = get_category_id(canonical['category'])
+        return MatchResultCache._dump(canonical), category
+
+    @staticmethod
+    async def amake_key(seeker, seeker_preferences):
+        """
+        Async variant of ``make_key``
+        """
+        from services.cache import aget_category_id
+
+        canonical = MatchResultCache._canonical(seeker, seeker_preferences)
+        category = ALL_CATEGORIES
+        if canonical.get('category'):
+            category = await aget_category_id(canonical['category'])
+        return MatchResultCache._dump(canonical), category
+
+    @staticmethod
+    def _canonical(seeker, seeker_preferences):
+        from services.search import normalize_keywords
+
+        canonical = {}
+        for name in RESULT_PREFERENCE_KEYS:
+            value = seeker_preferences.get(name)
+            if value in (None, ''):
+                continue
+            if name in ('max_price', 'min_score', 'max_distance_km', 'limit'):
+                try:
+                    value = str(Decimal(str(value)).normalize())
+                except InvalidOperation:
+                    value = str(value)
+            elif name == 'keyword':
+                value = normalize_keywords(value)
+            canonical[name] = value
+
+        # find_matches switches to ranked mode on the mere presence of these
+        canonical['ranked'] = 'limit' in seeker_preferences or 'cursor' in seeker_preferences
+        canonical['location'] = (seeker.location or '').strip()
+        canonical['coordinates'] = [seeker.latitude, seeker.longitude]
+        return canonical
+
+    @staticmethod
+    def _dump(canonical):
+        return json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, _, _, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, category, provider_ids, value):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, category, provider_ids, value)
+            self._keys_by_category.setdefault(category, set()).add(key)
+            for provider_id in provider_ids:
+                self._keys_by_provider.setdefault(provider_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_categories(self, category_ids):
+        """
+        Evict searches over any of the given categories and unfiltered searches
+        """
+        with self._lock:
+            for category in {*category_ids, ALL_CATEGORIES}:
+                for key in list(self._keys_by_category.get(category, ())):
+                    self._remove(key)
+
+    def invalidate_provider(self, provider_id):
+        with self._lock:
+            for key in list(self._keys_by_provider.get(provider_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_category.clear()
+            self._keys_by_provider.clear()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        _, category, provider_ids, _ = entry
+        self._discard(self._keys_by_category, category, key)
+        for provider_id in provider_ids:
+            self._discard(self._keys_by_provider, provider_id, key)
+
+    @staticmethod
+    def _discard(index, name, key):
+        keys = index.get(name)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[name]
+
+
+_cache_settings = getattr(settings, 'MATCH_RESULT_CACHE', {})
+
+match_result_cache = MatchResultCache(
+    max_entries=_cache_settings.get('MAX_ENTRIES', 1024),
+    ttl=_cache_settings.get('TTL', 60)
+)
@@ -0,0 +1,133 @@
+# matching/management/commands/bench_concurrent_writes.py
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from matching.models import MatchRequest, ProviderStats
+from services.models import Service, ServiceCategory
+from users.models import User
+
+PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = (
+        'Create match requests from concurrent threads on scratch SQLite '
+        'databases with the default and the production profile, and compare '
+        'throughput, latency and lock errors'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Match requests to create per profile')
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--providers', type=int, default=50)
+        parser.add_argument('--db-dir', default=None,
+                            help='Directory for the scratch databases (default: a temporary one)')
+
+    def handle(self, *args, **options):
+        db_dir = options['db_dir'] or tempfile.mkdtemp(prefix='write-bench-')
+        self.stdout.write(f'Scratch databases in {db_dir}')
+
+        for profile in PROFILES:
+            alias = f'write_bench_{profile}'
+            database = dict(
+                connections.settings['default'],
+                NAME=os.path.join(db_dir, f'{profile}.sqlite3'),
+                CONN_MAX_AGE=0,
+                CONN_HEALTH_CHECKS=False,
+                OPTIONS={},
+                PRAGMAS={},
+            )
+            if profile == 'production':
+                database.update(settings.SQLITE_PRODUCTION_PROFILE)
+            connections.settings[alias] = database
+
+            call_command('migrate', database=alias, verbosity=0)
+            work = self.seed(alias, options)
+            self.report(profile, *self.run(alias, work, options['threads']))
+
+    def seed(self, alias, options):
+        """
+        :return: List of (seeker id, provider id, service id) to request
+        """
+        category = ServiceCategory.objects.using(alias).create(name='Benchmark')
+        providers = User.objects.using(alias).bulk_create(
+            User(username=f'provider-{index}', user_type='provider')
+            for index in range(options['providers'])
+        )
+        services = Service.objects.using(alias).bulk_create(
+            Service(
+                provider=provider, category=category, name=f'Service {provider.username}',
+                description='Benchmark', price=100, availability_type='online'
+            )
+            for provider in providers
+        )
+        seekers = User.objects.using(alias).bulk_create(
+            User(username=f'seeker-{index}', user_type='seeker')
+            for index in range(options['requests'])
+        )
+        return [
+            (seeker.id, services[index % len(services)].provider_id, services[index % len(services)].id)
+            for index, seeker in enumerate(seekers)
+        ]
+
+    def run(self, alias, work, threads):
+        connection = connections[alias]
+
+        def create(item):
+            seeker_id, provider_id, service_id = item
+            started = time.perf_counter()
+            try:
+                # The writes of MatchRequestSerializer.create plus the stats
+                # update of its post_save handler, in one transaction
+                with transaction.atomic(using=alias):
+                    exists = MatchRequest.objects.using(alias).filter(
+                        seeker_id=seeker_id, provider_id=provider_id,
+                        service_id=service_id, status='pending'
+                    ).exists()
+                    if not exists:
+                        MatchRequest.objects.using(alias).bulk_create([MatchRequest(
+                            seeker_id=seeker_id, provider_id=provider_id, service_id=service_id
+                        )])
+                        ProviderStats.objects.using(alias).filter(provider_id=provider_id).update(
+                            received_count=F('received_count') + 1
+                        )
+                failed = False
+            except OperationalError:
+                # "database is locked"
+                failed = True
+            finally:
+                # What Django does at the end of every request
+                connection.close_if_unusable_or_obsolete()
+            return time.perf_counter() - started, failed
+
+        ProviderStats.objects.using(alias).bulk_create(
+            ProviderStats(provider_id=provider_id) for provider_id in {item[1] for item in work}
+        )
+        connections[alias].close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            outcomes = list(pool.map(create, work))
+        return time.perf_counter() - started, outcomes
+
+    def report(self, profile, elapsed, outcomes):
+        latencies = [latency for latency, failed in outcomes if not failed]
+        failures = sum(1 for _, failed in outcomes if failed)
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{profile} profile'))
+        self.stdout.write(
+            f'  {len(latencies) / elapsed:.1f} created/s over {elapsed:.2f}s, '
+            f'p50 {quantiles[49] * 1000:.1f} ms, p95 {quantiles[94] * 1000:.1f} ms, '
+            f'p99 {quantiles[98] * 1000:.1f} ms, {failures} failed with lock errors'
+        )
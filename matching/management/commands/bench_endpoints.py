@@ -0,0 +1,233 @@
+# matching/management/commands/bench_endpoints.py
+import json
+import platform
+import random
+import statistics
+import time
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from matching.cache import match_result_cache
+from matching.management.commands.generate_dataset import MAX_DRAWS
+from matching.models import MatchRequest
+from services.models import Service, ServiceCategory
+from users.models import User
+from users.tokens import issue_tokens
+
+PASSWORD = 'benchmark-password'
+# Users the requests of each scenario are spread over
+CLIENT_USERS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic dataset in a scratch test database and drive '
+        'login, find_matches, the service listing and match request '
+        'create/update through the test client, reporting latency '
+        'percentiles and queries per request'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--services', type=int, default=5000)
+        parser.add_argument('--match-requests', type=int, default=20_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario')
+        parser.add_argument('--login-requests', type=int, default=20,
+                            help='Requests of the login scenario (each one hashes a password)')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Let find_matches use its result cache')
+        parser.add_argument('--output', default=None,
+                            help='Write the results as JSON to this file')
+        parser.add_argument('--compare', default=None,
+                            help='Earlier --output file to report changes against')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as baseline_file:
+                    baseline = json.load(baseline_file)['scenarios']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f"Cannot read {options['compare']}: {e}")
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command(
+                'generate_dataset', users=options['users'], categories=options['categories'],
+                services=options['services'], match_requests=options['match_requests'],
+                seed=options['seed'], password=PASSWORD, stdout=self.stdout
+            )
+            with override_settings(ALLOWED_HOSTS=['testserver'], DATABASE_REPLICAS=[]):
+                scenarios = self.run_scenarios(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        for name, result in scenarios.items():
+            self.report(name, result, baseline.get(name) if baseline else None)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'created_at': timezone.now().isoformat(),
+                    'environment': {
+                        'python': platform.python_version(),
+                        'django': django.get_version(),
+                        'database': connection.vendor,
+                    },
+                    'options': {
+                        name: options[name] for name in (
+                            'users', 'categories', 'services', 'match_requests', 'seed',
+                            'requests', 'login_requests', 'warm_cache'
+                        )
+                    },
+                    'scenarios': scenarios,
+                }, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def run_scenarios(self, options):
+        rng = random.Random(options['seed'])
+        requests = options['requests']
+
+        seekers = list(User.objects.filter(user_type='seeker').order_by('id')[:CLIENT_USERS])
+        seeker_tokens = [self.bearer(seeker) for seeker in seekers]
+        categories = list(ServiceCategory.objects.values_list('name', flat=True))
+        services = list(Service.objects.filter(is_active=True).values_list('id', 'provider_id'))
+        pending = list(
+            MatchRequest.objects.filter(status='pending').order_by('id').values_list('id', 'provider_id')
+        )
+        rng.shuffle(pending)
+        pending = pending[:requests]
+        if not (seekers and categories and services and pending):
+            raise CommandError('The dataset is too small to run every scenario')
+        provider_tokens = {
+            provider.id: self.bearer(provider)
+            for provider in User.objects.filter(id__in={provider_id for _, provider_id in pending})
+        }
+        existing = set(
+            MatchRequest.objects.filter(
+                status='pending', seeker__in=seekers
+            ).values_list('seeker_id', 'service_id')
+        )
+
+        def login(index):
+            seeker = seekers[index % len(seekers)]
+            return Client().post(
+                '/api-auth/login/', {'username': seeker.username, 'password': PASSWORD},
+                content_type='application/json'
+            )
+
+        def find_matches(index):
+            preferences = {'category': rng.choice(categories)}
+            max_price = rng.choice((None, 50, 100, 500))
+            if max_price:
+                preferences['max_price'] = max_price
+            return Client().post(
+                '/api/match-requests/find_matches/', preferences,
+                content_type='application/json', HTTP_AUTHORIZATION=rng.choice(seeker_tokens)
+            )
+
+        def service_list(index):
+            return Client().get('/api/services/', HTTP_AUTHORIZATION=rng.choice(seeker_tokens))
+
+        def match_request_create(index):
+            for _ in range(MAX_DRAWS):
+                seeker_index = rng.randrange(len(seekers))
+                service_id, provider_id = rng.choice(services)
+                if (seekers[seeker_index].id, service_id) not in existing:
+                    existing.add((seekers[seeker_index].id, service_id))
+                    break
+            else:
+                raise CommandError(
+                    'Too few seeker/service pairs left for match_request_create; '
+                    'lower --requests or raise --users or --services'
+                )
+            return Client().post(
+                '/api/match-requests/', {'provider': provider_id, 'service': service_id},
+                content_type='application/json', HTTP_AUTHORIZATION=seeker_tokens[seeker_index]
+            )
+
+        def match_request_update(index):
+            match_request_id, provider_id = pending[index % len(pending)]
+            return Client().patch(
+                f'/api/match-requests/{match_request_id}/', {'status': 'accepted'},
+                content_type='application/json', HTTP_AUTHORIZATION=provider_tokens[provider_id]
+            )
+
+        max_entries = match_result_cache.max_entries
+        if not options['warm_cache']:
+            # Measure the search itself, not the result cache
+            match_result_cache.clear()
+            match_result_cache.max_entries = 0
+        try:
+            return {
+                'login': self.measure(login, options['login_requests']),
+                'find_matches': self.measure(find_matches, requests),
+                'service_list': self.measure(service_list, requests),
+                'match_request_create': self.measure(match_request_create, requests),
+                'match_request_update': self.measure(match_request_update, min(requests, len(pending))),
+            }
+        finally:
+            match_result_cache.max_entries = max_entries
+
+    @staticmethod
+    def bearer(user):
+        return f"Bearer {issue_tokens(user)['access']}"
+
+    @staticmethod
+    def measure(send, requests):
+        """
+        :param send: Callable taking the request index and returning a response
+        :return: Dict of latency percentiles (ms), query counts and failures
+        """
+        latencies = []
+        query_counts = []
+        failures = 0
+        for index in range(requests):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = send(index)
+                latencies.append(time.perf_counter() - started)
+            query_counts.append(len(queries))
+            if response.status_code >= 400:
+                failures += 1
+
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'requests': requests,
+            'failures': failures,
+            'p50_ms': round(quantiles[49] * 1000, 3),
+            'p95_ms': round(quantiles[94] * 1000, 3),
+            'p99_ms': round(quantiles[98] * 1000, 3),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+            'queries_per_request': round(statistics.mean(query_counts), 2),
+            'max_queries': max(query_counts),
+        }
+
+    def report(self, name, result, baseline):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f"  p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+            f"p99 {result['p99_ms']:.1f} ms, {result['queries_per_request']:g} queries/request, "
+            f"{result['failures']} of {result['requests']} failed"
+        )
+        if baseline:
+            changes = ', '.join(
+                f"{key} {self.change(baseline[key], result[key])}"
+                for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')
+            )
+            self.stdout.write(f'  vs baseline: {changes}')
+
+    @staticmethod
+    def change(before, after):
+        if not before:
+            return f'{before:g} -> {after:g}'
+        return f'{(after - before) / before * 100:+.1f}%'
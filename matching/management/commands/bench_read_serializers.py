@@ -0,0 +1,112 @@
+# matching/management/commands/bench_read_serializers.py
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone as django_timezone
+
+from matching.models import MatchRequest
+from matching.projections import project_match_request
+from matching.serializers import MatchRequestSerializer
+from services.models import Service, ServiceCategory
+from services.projections import project_service
+from services.serializers import ServiceSerializer
+from users.models import User
+from users.projections import PUBLIC_PROFILE_FIELDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare per-item serialization cost of the model serializers with the '
+        'read-only values() projections used by the list endpoints'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10_000)
+        parser.add_argument('--providers', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per path; the fastest is reported')
+
+    def handle(self, *args, **options):
+        # Everything is built in memory so only serialization is measured
+        items = options['items']
+        now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        category = ServiceCategory(id=1, name='Plumbing', description='Pipes')
+        providers = [
+            User(
+                id=index, username=f'provider-{index}', email=f'provider-{index}@example.com',
+                user_type='provider', location='Cebu', latitude=10.3, longitude=123.9
+            )
+            for index in range(1, options['providers'] + 1)
+        ]
+        profiles = {
+            provider.id: {field: getattr(provider, field) for field in PUBLIC_PROFILE_FIELDS}
+            for provider in providers
+        }
+
+        services = [
+            Service(
+                id=index, provider=providers[index % len(providers)], category=category,
+                name=f'Service {index}', description='Fixes pipes',
+                price=Decimal('100.00'), availability_type='online', is_active=True
+            )
+            for index in range(1, items + 1)
+        ]
+        service_rows = [
+            {
+                'id': service.id, 'provider_id': service.provider_id,
+                'category_id': category.id, 'category__name': category.name,
+                'category__description': category.description, 'name': service.name,
+                'description': service.description, 'price': service.price,
+                'availability_type': service.availability_type, 'is_active': service.is_active,
+            }
+            for service in services
+        ]
+
+        match_requests = [
+            MatchRequest(
+                id=service.id, seeker_id=1, provider_id=service.provider_id, service_id=service.id,
+                status='pending', created_at=now, updated_at=now
+            )
+            for service in services
+        ]
+        match_request_rows = [
+            {
+                'id': match_request.id, 'seeker_id': 1, 'provider_id': match_request.provider_id,
+                'service_id': match_request.service_id, 'status': 'pending',
+                'created_at': now, 'updated_at': now,
+            }
+            for match_request in match_requests
+        ]
+
+        zone = django_timezone.get_current_timezone()
+        self.compare(
+            'services (/api/services/, find_matches)', items, options['repeat'],
+            lambda: ServiceSerializer(services, many=True).data,
+            lambda: [project_service(row, profiles) for row in service_rows],
+        )
+        self.compare(
+            'match requests (/api/match-requests/)', items, options['repeat'],
+            lambda: MatchRequestSerializer(match_requests, many=True).data,
+            lambda: [project_match_request(row, zone) for row in match_request_rows],
+        )
+
+    def compare(self, label, items, repeat, serializer, projection):
+        before = self.time_per_item(serializer, items, repeat)
+        after = self.time_per_item(projection, items, repeat)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{label}, {items} items'))
+        self.stdout.write(
+            f'  serializer: {before:.2f} us/item, projection: {after:.2f} us/item '
+            f'({before / after:.1f}x)'
+        )
+
+    @staticmethod
+    def time_per_item(serialize, items, repeat):
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serialize()
+            best = min(best, time.perf_counter() - started)
+        return best * 1_000_000 / items
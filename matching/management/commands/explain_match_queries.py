@@ -0,0 +1,204 @@
+# matching/management/commands/explain_match_queries.py
+import os
+import random
+import tempfile
+import time
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q
+
+from matching.models import MatchRequest
+from matching.services import MatchingService
+from services.models import Service, ServiceCategory
+from users.models import User
+
+BENCH_ALIAS = 'explain_bench'
+BATCH_SIZE = 5000
+VOCABULARY = (
+    'plumbing', 'repair', 'leak', 'garden', 'tutoring', 'math', 'cleaning', 'deep',
+    'electrical', 'wiring', 'painting', 'interior', 'moving', 'piano', 'lessons',
+    'catering', 'wedding', 'photography', 'portrait', 'yoga', 'massage', 'tax',
+    'accounting', 'roofing', 'carpentry', 'furniture', 'pest', 'control', 'tile',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a scratch SQLite database and compare query plans and timings '
+        'of the matching hot queries with and without the shipped indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000,
+                            help='Number of services and of match requests to seed')
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--providers', type=int, default=20_000)
+        parser.add_argument('--db-path', default=None,
+                            help='Scratch database file (default: a temporary file)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Executions per query when timing')
+
+    def handle(self, *args, **options):
+        db_path = options['db_path'] or os.path.join(
+            tempfile.mkdtemp(prefix='explain-bench-'), 'bench.sqlite3'
+        )
+        connections.settings[BENCH_ALIAS] = dict(
+            connections.settings['default'],
+            ENGINE='django.db.backends.sqlite3',
+            NAME=db_path
+        )
+
+        self.stdout.write(f'Scratch database: {db_path}')
+        call_command('migrate', database=BENCH_ALIAS, verbosity=0)
+
+        if not Service.objects.using(BENCH_ALIAS).exists():
+            self.seed(options)
+
+        connections[BENCH_ALIAS].cursor().execute('ANALYZE')
+
+        queries = self.hot_queries()
+
+        # Each phase gets a fresh connection so no prepared statement planned
+        # against the other schema is reused
+        connections[BENCH_ALIAS].close()
+        with transaction.atomic(using=BENCH_ALIAS):
+            self.drop_shipped_indexes()
+            self.stdout.write(self.style.MIGRATE_HEADING('Without indexes'))
+            self.report(queries, options['repeat'])
+            transaction.set_rollback(True, using=BENCH_ALIAS)
+
+        connections[BENCH_ALIAS].close()
+        self.stdout.write(self.style.MIGRATE_HEADING('With indexes'))
+        self.report(queries, options['repeat'])
+
+    def seed(self, options):
+        rows = options['rows']
+        rng = random.Random(42)
+        self.stdout.write(f'Seeding {rows} services and {rows} match requests...')
+
+        categories = ServiceCategory.objects.using(BENCH_ALIAS).bulk_create(
+            ServiceCategory(name=f'category-{index}')
+            for index in range(options['categories'])
+        )
+        users = User.objects.using(BENCH_ALIAS).bulk_create(
+            (
+                User(
+                    username=f'{user_type}-{index}',
+                    user_type=user_type,
+                    location=f'city-{index % 100}'
+                )
+                for user_type, count in (
+                    ('provider', options['providers']),
+                    ('seeker', options['providers'])
+                )
+                for index in range(count)
+            ),
+            batch_size=BATCH_SIZE
+        )
+        providers = [user for user in users if user.user_type == 'provider']
+        seekers = [user for user in users if user.user_type == 'seeker']
+
+        for start in range(0, rows, BATCH_SIZE):
+            Service.objects.using(BENCH_ALIAS).bulk_create(
+                Service(
+                    provider=rng.choice(providers),
+                    category=rng.choice(categories),
+                    name=f"{' '.join(rng.sample(VOCABULARY, 2))} {index}",
+                    description=' '.join(rng.choices(VOCABULARY, k=12)),
+                    price=Decimal(rng.randint(10, 1000)),
+                    availability_type=rng.choice(('online', 'offline', 'both')),
+                    is_active=rng.random() < 0.9
+                )
+                for index in range(start, min(start + BATCH_SIZE, rows))
+            )
+
+        services = list(
+            Service.objects.using(BENCH_ALIAS).values_list('id', 'provider_id')
+        )
+        statuses = ('pending', 'accepted', 'rejected', 'completed')
+        for start in range(0, rows, BATCH_SIZE):
+            MatchRequest.objects.using(BENCH_ALIAS).bulk_create(
+                (
+                    MatchRequest(
+                        seeker=rng.choice(seekers),
+                        provider_id=provider_id,
+                        service_id=service_id,
+                        status=rng.choice(statuses)
+                    )
+                    for service_id, provider_id in (
+                        rng.choice(services)
+                        for _ in range(start, min(start + BATCH_SIZE, rows))
+                    )
+                ),
+                ignore_conflicts=True
+            )
+
+    def hot_queries(self):
+        match_request = MatchRequest.objects.using(BENCH_ALIAS).order_by('id').first()
+        # The category cache reads the default database, so filter by id here
+        category = ServiceCategory.objects.using(BENCH_ALIAS).get(name='category-1')
+
+        return {
+            'find_matching_services (category, max_price)':
+                MatchingService.find_matching_services(
+                    {'max_price': 100}
+                ).using(BENCH_ALIAS).filter(category_id=category.id),
+            'find_matching_services (availability, max_price)':
+                MatchingService.find_matching_services(
+                    {'availability_type': 'online', 'max_price': 50}
+                ).using(BENCH_ALIAS),
+            'keyword search (full-text index)':
+                MatchingService.find_matching_services(
+                    {'keyword': 'piano lessons'}
+                ).using(BENCH_ALIAS),
+            'keyword search (icontains scan, for comparison)':
+                Service.objects.using(BENCH_ALIAS).filter(
+                    Q(name__icontains='piano') | Q(description__icontains='piano'),
+                    Q(name__icontains='lessons') | Q(description__icontains='lessons'),
+                    is_active=True
+                ),
+            'pending duplicate check':
+                MatchRequest.objects.using(BENCH_ALIAS).filter(
+                    seeker_id=match_request.seeker_id,
+                    provider_id=match_request.provider_id,
+                    service_id=match_request.service_id,
+                    status='pending'
+                ),
+            'provider requests by status':
+                MatchRequest.objects.using(BENCH_ALIAS).filter(
+                    provider_id=match_request.provider_id,
+                    status='pending'
+                ),
+            'provider inbox page (status filter)':
+                MatchRequest.objects.using(BENCH_ALIAS).filter(
+                    provider_id=match_request.provider_id,
+                    status='pending'
+                ).order_by('-created_at', '-id')[:21],
+            'provider inbox page (all statuses)':
+                MatchRequest.objects.using(BENCH_ALIAS).filter(
+                    provider_id=match_request.provider_id
+                ).order_by('-created_at', '-id')[:21],
+        }
+
+    def drop_shipped_indexes(self):
+        # Partial unique constraints are plain unique indexes on SQLite, so
+        # everything can be dropped inside the surrounding transaction
+        connection = connections[BENCH_ALIAS]
+        with connection.cursor() as cursor:
+            for model in (Service, MatchRequest):
+                for index in [*model._meta.indexes, *model._meta.constraints]:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def report(self, queries, repeat):
+        for label, queryset in queries.items():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.values_list('id', flat=True))
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+
+            self.stdout.write(f'{label}: {elapsed_ms:.2f} ms')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,221 @@
+# matching/management/commands/generate_dataset.py
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from matching.models import MatchRequest
+from matching.stats import rebuild_provider_stats
+from services.models import Service, ServiceCategory
+from services.signals import services_bulk_changed
+from users.models import User
+
+BATCH_SIZE = 5000
+# Draws per match request before giving up on finding a free pending pair
+MAX_DRAWS = 1000
+DEFAULT_STATUS_MIX = 'pending=40,accepted=25,rejected=20,completed=15'
+VOCABULARY = (
+    'plumbing', 'repair', 'leak', 'garden', 'tutoring', 'math', 'cleaning', 'deep',
+    'electrical', 'wiring', 'painting', 'interior', 'moving', 'piano', 'lessons',
+    'catering', 'wedding', 'photography', 'portrait', 'yoga', 'massage', 'tax',
+    'accounting', 'roofing', 'carpentry', 'furniture', 'pest', 'control', 'tile',
+)
+
+
+def parse_status_mix(value):
+    """
+    :param value: Comma-separated ``status=weight`` pairs, e.g. 'pending=3,accepted=1'
+    :return: Dict mapping status to weight
+    """
+    statuses = dict(MatchRequest.STATUS_CHOICES)
+    mix = {}
+    for part in value.split(','):
+        status, _, weight = part.partition('=')
+        status = status.strip()
+        if status not in statuses:
+            raise CommandError(f'Unknown status {status!r} in status mix')
+        try:
+            mix[status] = float(weight)
+        except ValueError:
+            raise CommandError(f'Invalid weight for {status!r} in status mix')
+    if not any(weight > 0 for weight in mix.values()):
+        raise CommandError('Status mix needs a positive weight')
+    return mix
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-insert a reproducible synthetic dataset: seekers and providers '
+        'spread over locations, categories, services and match requests with '
+        'a chosen status mix'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--provider-share', type=float, default=0.3,
+                            help='Fraction of the users that are providers')
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--services', type=int, default=5000)
+        parser.add_argument('--match-requests', type=int, default=20_000)
+        parser.add_argument('--status-mix', default=DEFAULT_STATUS_MIX,
+                            help='Relative weights of match request statuses')
+        parser.add_argument('--locations', type=int, default=50,
+                            help='Number of distinct city names')
+        parser.add_argument('--location-skew', type=float, default=1.0,
+                            help='Zipf exponent of users per city (0 for uniform)')
+        parser.add_argument('--coordinate-share', type=float, default=0.7,
+                            help='Fraction of the users with latitude/longitude')
+        parser.add_argument('--password', default='benchmark-password',
+                            help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2 or not 0 < options['provider_share'] < 1:
+            raise CommandError('Need at least one seeker and one provider')
+        if options['services'] and not options['categories']:
+            raise CommandError('Services need at least one category')
+
+        self.rng = random.Random(options['seed'])
+        status_mix = parse_status_mix(options['status_mix'])
+        prefix = f"s{options['seed']}-{User.objects.count()}"
+
+        # One transaction: SQLite commits (and the per-provider stats updates
+        # of services_bulk_changed) would otherwise dominate the run
+        with transaction.atomic():
+            seekers, providers = self.create_users(prefix, options)
+            categories = [
+                ServiceCategory.objects.create(name=f'{prefix} category {index}')
+                for index in range(options['categories'])
+            ]
+            services = self.create_services(providers, categories, options)
+            created = self.create_match_requests(seekers, services, status_mix, options)
+
+            services_bulk_changed.send(
+                sender=Service,
+                category_ids={category.id for category in categories},
+                provider_ids={provider.id for provider in providers}
+            )
+            rebuild_provider_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(seekers)} seekers, {len(providers)} providers, '
+            f'{len(categories)} categories, {len(services)} services and '
+            f'{created} match requests (usernames start with {prefix}-)'
+        ))
+
+    def create_users(self, prefix, options):
+        # One hash for everyone: hashing per user would dominate the run
+        password = make_password(options['password'])
+        cities = [
+            (f'city-{index}', 7 + self.rng.random() * 12, 120 + self.rng.random() * 6)
+            for index in range(options['locations'])
+        ]
+        weights = [1 / (rank + 1) ** options['location_skew'] for rank in range(len(cities))]
+        provider_count = max(1, round(options['users'] * options['provider_share']))
+
+        def build(index):
+            user_type = 'provider' if index < provider_count else 'seeker'
+            city, latitude, longitude = self.rng.choices(cities, weights)[0] if cities else (None, 0, 0)
+            user = User(
+                username=f'{prefix}-{user_type}-{index}',
+                password=password,
+                user_type=user_type,
+                location=city,
+            )
+            if city is not None and self.rng.random() < options['coordinate_share']:
+                user.latitude = latitude + self.rng.gauss(0, 0.05)
+                user.longitude = longitude + self.rng.gauss(0, 0.05)
+            return user
+
+        users = []
+        for start in range(0, options['users'], BATCH_SIZE):
+            users.extend(User.objects.bulk_create(
+                build(index) for index in range(start, min(start + BATCH_SIZE, options['users']))
+            ))
+
+        return users[provider_count:], users[:provider_count]
+
+    def create_services(self, providers, categories, options):
+        services = []
+        for start in range(0, options['services'], BATCH_SIZE):
+            services.extend(Service.objects.bulk_create(
+                Service(
+                    provider=self.rng.choice(providers),
+                    category=self.rng.choice(categories),
+                    name=f"{' '.join(self.rng.sample(VOCABULARY, 2))} {index}",
+                    description=' '.join(self.rng.choices(VOCABULARY, k=12)),
+                    # Log-normal prices: many cheap services, a long expensive tail
+                    price=Decimal(f'{min(math.exp(self.rng.gauss(4.5, 0.8)), 99_999):.2f}'),
+                    availability_type=self.rng.choice(('online', 'offline', 'both')),
+                    is_active=self.rng.random() < 0.9
+                )
+                for index in range(start, min(start + BATCH_SIZE, options['services']))
+            ))
+        return services
+
+    def create_match_requests(self, seekers, services, status_mix, options):
+        if not services:
+            return 0
+
+        statuses, weights = zip(*status_mix.items())
+        now = timezone.now()
+        last_id = MatchRequest.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        created = 0
+        pending = set()
+        for start in range(0, options['match_requests'], BATCH_SIZE):
+            batch = [
+                self.draw_match_request(seekers, services, statuses, weights, pending)
+                for _ in range(start, min(start + BATCH_SIZE, options['match_requests']))
+            ]
+            created += len(MatchRequest.objects.bulk_create(batch))
+
+        # Spread creation over the last 90 days, answers a few hours later,
+        # so inbox ordering and response latency stats are realistic
+        requests = MatchRequest.objects.filter(id__gt=last_id).only('id', 'status')
+        updated = []
+        for match_request in requests.iterator(chunk_size=BATCH_SIZE):
+            match_request.created_at = now - timedelta(seconds=self.rng.randint(0, 90 * 86400))
+            answered = match_request.status != 'pending'
+            match_request.updated_at = match_request.created_at + timedelta(
+                seconds=self.rng.randint(600, 72 * 3600) if answered else 0
+            )
+            updated.append(match_request)
+            if len(updated) >= BATCH_SIZE:
+                MatchRequest.objects.bulk_update(updated, ['created_at', 'updated_at'])
+                updated = []
+        MatchRequest.objects.bulk_update(updated, ['created_at', 'updated_at'])
+        return created
+
+    def draw_match_request(self, seekers, services, statuses, weights, pending):
+        """
+        Draw a match request, re-drawing pairs that already have a pending one
+
+        At most one request per seeker/provider/service may be pending, so a
+        draw landing on a taken pair is repeated rather than skipped, keeping
+        the number of requests exact.
+
+        :param pending: Set of (seeker id, service id) pairs with a pending request
+        :return: Unsaved MatchRequest
+        """
+        for _ in range(MAX_DRAWS):
+            seeker = self.rng.choice(seekers)
+            service = self.rng.choice(services)
+            status = self.rng.choices(statuses, weights)[0]
+            if status == 'pending':
+                key = (seeker.id, service.id)
+                if key in pending:
+                    continue
+                pending.add(key)
+            return MatchRequest(
+                seeker=seeker, provider_id=service.provider_id, service=service, status=status
+            )
+        raise CommandError(
+            'Too few seeker/service pairs left for the pending match requests; '
+            'lower --match-requests or the pending share of --status-mix'
+        )
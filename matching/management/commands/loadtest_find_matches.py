@@ -0,0 +1,120 @@
+# matching/management/commands/loadtest_find_matches.py
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client, override_settings
+
+from matching.cache import match_result_cache
+from users.models import User
+
+SYNC_URL = '/api/match-requests/find_matches/'
+ASYNC_URL = '/api/async/match-requests/find_matches/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive find_matches concurrently through the WSGI (DRF, thread pool) '
+        'and ASGI (async view) paths and compare throughput and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True,
+                            help='Existing seeker to search as')
+        parser.add_argument('--preferences', default='{}',
+                            help='find_matches payload as JSON')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50,
+                            help='Requests in flight at once')
+        parser.add_argument('--threads', type=int, default=8,
+                            help='WSGI worker threads')
+        parser.add_argument('--db-latency-ms', type=float, default=0,
+                            help='Artificial latency added to every SQL query')
+
+    def handle(self, *args, **options):
+        try:
+            self.user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+
+        self.payload = json.loads(options['preferences'])
+        self.latency = options['db_latency_ms'] / 1000
+
+        # Measure the search itself, not the result cache
+        match_result_cache.clear()
+        max_entries, match_result_cache.max_entries = match_result_cache.max_entries, 0
+        connection_created.connect(self.add_latency)
+
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = {
+                    f"wsgi ({options['threads']} threads)": self.run_wsgi(options),
+                    'asgi (async view)': asyncio.run(self.run_asgi(options)),
+                }
+        finally:
+            connection_created.disconnect(self.add_latency)
+            match_result_cache.max_entries = max_entries
+
+        for label, (elapsed, latencies, failures) in results.items():
+            self.report(label, elapsed, latencies, failures)
+
+    def add_latency(self, sender, connection, **kwargs):
+        if self.latency:
+            def delayed_execute(execute, sql, params, many, context):
+                time.sleep(self.latency)
+                return execute(sql, params, many, context)
+
+            connection.execute_wrappers.append(delayed_execute)
+
+    def run_wsgi(self, options):
+        local = threading.local()
+
+        def send(_):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(self.user)
+
+            started = time.perf_counter()
+            response = local.client.post(SYNC_URL, self.payload, content_type='application/json')
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(options['threads'], options['concurrency'])) as pool:
+            outcomes = list(pool.map(send, range(options['requests'])))
+        return self.summarize(started, outcomes)
+
+    async def run_asgi(self, options):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        in_flight = asyncio.Semaphore(options['concurrency'])
+
+        async def send():
+            async with in_flight:
+                started = time.perf_counter()
+                response = await client.post(ASYNC_URL, self.payload, content_type='application/json')
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(send() for _ in range(options['requests'])))
+        return self.summarize(started, outcomes)
+
+    @staticmethod
+    def summarize(started, outcomes):
+        elapsed = time.perf_counter() - started
+        latencies = [latency for latency, _ in outcomes]
+        failures = sum(1 for _, status_code in outcomes if status_code != 200)
+        return elapsed, latencies, failures
+
+    def report(self, label, elapsed, latencies, failures):
+        quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f'  {len(latencies) / elapsed:.1f} req/s over {elapsed:.2f}s, '
+            f'p50 {quantiles[49] * 1000:.1f} ms, p95 {quantiles[94] * 1000:.1f} ms, '
+            f'p99 {quantiles[98] * 1000:.1f} ms, {failures} failed'
+        )
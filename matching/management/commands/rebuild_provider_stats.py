@@ -0,0 +1,12 @@
+# matching/management/commands/rebuild_provider_stats.py
+from django.core.management.base import BaseCommand
+
+from matching.stats import rebuild_provider_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the ProviderStats table from match request and service history'
+
+    def handle(self, *args, **options):
+        count = rebuild_provider_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} providers'))
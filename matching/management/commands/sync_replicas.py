@@ -0,0 +1,32 @@
+# matching/management/commands/sync_replicas.py
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database over every replica file in '
+        'DATABASE_REPLICAS (local stand-in for real replication)'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('No replicas configured; set DATABASE_REPLICAS')
+
+        primary = connections['default']
+        if primary.vendor != 'sqlite':
+            raise CommandError('sync_replicas only copies SQLite databases')
+
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                # Online backup: consistent even while the primary is written
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"Synced {alias} ({connections[alias].settings_dict['NAME']})")
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def reject_duplicate_pending_requests(apps, schema_editor):
+    """
+    Keep the newest pending request of each (seeker, provider, service) and
+    mark the older ones rejected, so the unique constraint can be added
+    """
+    MatchRequest = apps.get_model('matching', 'MatchRequest')
+    pending = MatchRequest.objects.using(schema_editor.connection.alias).filter(status='pending')
+
+    duplicates = (
+        pending.values('seeker_id', 'provider_id', 'service_id')
+        .annotate(count=models.Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in list(duplicates):
+        del group['count']
+        older = list(
+            pending.filter(**group).order_by('-created_at', '-id').values_list('id', flat=True)[1:]
+        )
+        pending.filter(id__in=older).update(status='rejected')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0002_initial'),
+        ('services', '0003_service_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchrequest',
+            index=models.Index(fields=['seeker', 'status'], name='matchreq_seeker_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchrequest',
+            index=models.Index(fields=['provider', 'status'], name='matchreq_provider_status_idx'),
+        ),
+        migrations.RunPython(reject_duplicate_pending_requests, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='matchrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending')), fields=('seeker', 'provider', 'service'), name='unique_pending_match_request'),
+        ),
+    ]
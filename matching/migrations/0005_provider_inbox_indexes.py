@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0004_providerstats'),
+        ('services', '0005_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='matchrequest',
+            name='matchreq_provider_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='matchrequest',
+            index=models.Index(fields=['provider', 'status', 'created_at', 'id'], name='matchreq_provider_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchrequest',
+            index=models.Index(fields=['provider', 'created_at', 'id'], name='matchreq_provider_recent_idx'),
+        ),
+    ]
@@ -13,6 +13,12 @@ class MatchRequest(models.Model):
         ('completed', 'Completed')
     )
 
+    # Allowed status changes, applied by MatchRequestService.transition
+    TRANSITIONS = {
+        'pending': ('accepted', 'rejected'),
+        'accepted': ('completed',),
+    }
+
     seeker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_requests_sent')
     provider = models.ForeignKey(User, on_delete=models.CASCADE, related_name='match_requests_received')
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
@@ -20,5 +26,76 @@ class MatchRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # MatchRequestViewSet.get_queryset filters by seeker or provider
+            models.Index(fields=['seeker', 'status'], name='matchreq_seeker_status_idx'),
+            # Provider inbox: newest first with (created_at, id) keyset
+            # pagination, optionally filtered by status
+            models.Index(
+                fields=['provider', 'status', 'created_at', 'id'],
+                name='matchreq_provider_inbox_idx'
+            ),
+            models.Index(
+                fields=['provider', 'created_at', 'id'],
+                name='matchreq_provider_recent_idx'
+            ),
+        ]
+        constraints = [
+            # At most one pending request per seeker/provider/service; also
+            # serves the duplicate check in MatchRequestSerializer.validate
+            models.UniqueConstraint(
+                fields=['seeker', 'provider', 'service'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_match_request'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so saves can tell which transition happened
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    @classmethod
+    def transition_sources(cls, new_status):
+        """
+        :param new_status: Target status
+        :return: Statuses a request may move to ``new_status`` from
+        """
+        return [source for source, targets in cls.TRANSITIONS.items() if new_status in targets]
+
     def __str__(self):
         return f"{self.seeker.username} - {self.provider.username} - {self.service.name}"
+
+
+class ProviderStats(models.Model):
+    """
+    Denormalized per-provider match history, maintained incrementally so
+    scoring reads one row per provider instead of aggregating MatchRequest
+    """
+    provider = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name='stats'
+    )
+    received_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    # Pending requests answered (accepted or rejected) and the total time it took
+    response_count = models.PositiveIntegerField(default=0)
+    total_response_seconds = models.FloatField(default=0)
+    active_service_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def acceptance_rate(self):
+        decided = self.accepted_count + self.rejected_count
+        return self.accepted_count / decided if decided else None
+
+    @property
+    def average_response_seconds(self):
+        return self.total_response_seconds / self.response_count if self.response_count else None
+
+    def __str__(self):
+        return f"Stats for {self.provider_id}"
@@ -0,0 +1,95 @@
+# matching/pagination.py
+import base64
+import binascii
+from datetime import datetime
+
+from rest_framework import serializers
+
+DEFAULT_MATCH_LIMIT = 20
+MAX_MATCH_LIMIT = 100
+
+
+def encode_match_cursor(score, service_id):
+    """
+    Encode the (score, service id) position of the last returned match
+
+    :param score: Match score of the last returned match
+    :param service_id: Service id of the last returned match
+    :return: Opaque URL-safe cursor string
+    """
+    raw = f'{score}:{service_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_match_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_match_cursor``
+
+    :param cursor: Opaque cursor string
+    :return: Tuple of (score, service id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, service_id = raw.split(':')
+        return int(score), int(service_id)
+    except (AttributeError, ValueError, UnicodeDecodeError, binascii.Error):
+        raise serializers.ValidationError({
+            'cursor': 'Invalid cursor'
+        })
+
+
+def encode_inbox_cursor(created_at, match_request_id):
+    """
+    Encode the (created_at, id) position of the last returned inbox request
+
+    :param created_at: Creation time of the last returned match request
+    :param match_request_id: Id of the last returned match request
+    :return: Opaque URL-safe cursor string
+    """
+    raw = f'{created_at.isoformat()}|{match_request_id}'.encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_inbox_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_inbox_cursor``
+
+    :param cursor: Opaque cursor string
+    :return: Tuple of (created_at, match request id)
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, match_request_id = raw.split('|')
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            raise ValueError('Cursor time must be timezone-aware')
+        return created_at, int(match_request_id)
+    except (AttributeError, ValueError, UnicodeDecodeError, binascii.Error):
+        raise serializers.ValidationError({
+            'cursor': 'Invalid cursor'
+        })
+
+
+def parse_match_limit(value):
+    """
+    Validate the requested page size for ranked matches
+
+    :param value: Raw ``limit`` value from the request (may be None)
+    :return: Page size between 1 and MAX_MATCH_LIMIT
+    """
+    if value in (None, ''):
+        return DEFAULT_MATCH_LIMIT
+
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({
+            'limit': 'Limit must be an integer'
+        })
+
+    if limit < 1 or limit > MAX_MATCH_LIMIT:
+        raise serializers.ValidationError({
+            'limit': f'Limit must be between 1 and {MAX_MATCH_LIMIT}'
+        })
+
+    return limit
@@ -0,0 +1,105 @@
+# matching/projections.py
+"""
+Read-only projection of match requests to plain dicts
+
+Produces the read representation of ``MatchRequestSerializer`` from
+``values()`` rows, without the related-field querysets and validation
+machinery the write serializer carries.
+"""
+from django.utils import timezone
+
+from services.projections import format_price
+
+MATCH_REQUEST_VALUES = (
+    'id', 'seeker_id', 'provider_id', 'service_id', 'status', 'created_at', 'updated_at'
+)
+
+# Inbox rows also carry the seeker and service a provider needs to triage,
+# joined in the same query
+INBOX_VALUES = (
+    *MATCH_REQUEST_VALUES,
+    'seeker__username', 'seeker__location', 'service__name', 'service__price'
+)
+
+
+def format_datetime(value, zone):
+    """
+    Same output as DRF's ``DateTimeField`` with the default ISO 8601 format,
+    without its per-value settings and time zone lookups
+
+    :param value: Aware datetime, or None
+    :param zone: Time zone to render in, usually the current one
+    :return: ISO 8601 string, or None
+    """
+    if value is None:
+        return None
+    value = value.astimezone(zone).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def project_match_request(row, zone=None):
+    """
+    :param row: Row from ``queryset.values(*MATCH_REQUEST_VALUES)``
+    :param zone: Time zone for the timestamps (default: the current one)
+    :return: Dict shaped like ``MatchRequestSerializer(match_request).data``
+    """
+    zone = zone or timezone.get_current_timezone()
+    return {
+        'id': row['id'],
+        'seeker': row['seeker_id'],
+        'provider': row['provider_id'],
+        'service': row['service_id'],
+        'status': row['status'],
+        'created_at': format_datetime(row['created_at'], zone),
+        'updated_at': format_datetime(row['updated_at'], zone),
+    }
+
+
+def project_match_request_rows(rows):
+    """
+    :param rows: Rows from ``queryset.values(*MATCH_REQUEST_VALUES)``
+    :return: List of match request dicts
+    """
+    zone = timezone.get_current_timezone()
+    return [project_match_request(row, zone) for row in rows]
+
+
+def project_match_requests(queryset):
+    """
+    :param queryset: MatchRequest queryset
+    :return: List of match request dicts
+    """
+    return project_match_request_rows(queryset.values(*MATCH_REQUEST_VALUES))
+
+
+async def aproject_match_requests(queryset):
+    """
+    Async variant of ``project_match_requests`` using the async ORM APIs
+    """
+    zone = timezone.get_current_timezone()
+    return [
+        project_match_request(row, zone)
+        async for row in queryset.values(*MATCH_REQUEST_VALUES)
+    ]
+
+
+def project_inbox_request(row, zone):
+    """
+    :param row: Row from ``queryset.values(*INBOX_VALUES)``
+    :param zone: Time zone for the timestamps
+    :return: Match request dict with nested seeker and service summaries
+    """
+    item = project_match_request(row, zone)
+    item['seeker'] = {
+        'id': row['seeker_id'],
+        'username': row['seeker__username'],
+        'location': row['seeker__location'],
+    }
+    item['service'] = {
+        'id': row['service_id'],
+        'name': row['service__name'],
+        'price': format_price(row['service__price']),
+    }
+    return item
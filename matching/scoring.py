@@ -0,0 +1,161 @@
+# matching/scoring.py
+"""
+Vectorized batch scoring of large candidate sets with NumPy
+
+Computes the same score as ``matching.utils.calculate_match_score`` for a
+whole columnar block of candidates at once, and selects the top K with
+``argpartition`` instead of sorting every candidate.
+"""
+import numpy as np
+
+from matching.utils import (
+    BASE_SCORE, LOCATION_MATCH_BONUS, MAX_SCORE, PROXIMITY_RADIUS_KM, REPUTATION_BONUS
+)
+from users.geo import EARTH_RADIUS_KM
+
+# Location code of candidates without a location name
+NO_LOCATION = -1
+
+CANDIDATE_FIELDS = (
+    'id',
+    'price',
+    'provider__location',
+    'provider__latitude',
+    'provider__longitude',
+    'provider__stats__accepted_count',
+    'provider__stats__rejected_count',
+)
+
+
+class CandidateBlock:
+    """
+    Columnar candidate features, one NumPy array per feature
+
+    Location names are dictionary-encoded: ``location_codes`` holds an index
+    into ``locations`` (or NO_LOCATION), so comparing against the seeker's
+    location is one integer comparison per candidate.
+    """
+
+    def __init__(self, service_ids, prices, location_codes, locations,
+                 latitudes, longitudes, accepted_counts, rejected_counts):
+        self.service_ids = service_ids
+        self.prices = prices
+        self.location_codes = location_codes
+        self.locations = locations
+        self.latitudes = latitudes
+        self.longitudes = longitudes
+        self.accepted_counts = accepted_counts
+        self.rejected_counts = rejected_counts
+
+    def __len__(self):
+        return len(self.service_ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        :param rows: Iterable of tuples ordered like CANDIDATE_FIELDS
+        :return: CandidateBlock
+        """
+        locations = {}
+        columns = [[] for _ in CANDIDATE_FIELDS]
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+
+        service_ids, prices, location_names, latitudes, longitudes, accepted, rejected = columns
+        location_codes = [
+            locations.setdefault(name, len(locations)) if name else NO_LOCATION
+            for name in location_names
+        ]
+
+        return cls(
+            service_ids=np.asarray(service_ids, dtype=np.int64),
+            prices=np.asarray([float(price) for price in prices], dtype=np.float64),
+            location_codes=np.asarray(location_codes, dtype=np.int32),
+            locations=locations,
+            latitudes=np.asarray(latitudes, dtype=np.float64),
+            longitudes=np.asarray(longitudes, dtype=np.float64),
+            accepted_counts=np.asarray([count or 0 for count in accepted], dtype=np.float64),
+            rejected_counts=np.asarray([count or 0 for count in rejected], dtype=np.float64),
+        )
+
+    @classmethod
+    def from_queryset(cls, queryset, chunk_size=10000):
+        """
+        Load a Service queryset's candidate features without building models
+
+        :param queryset: Service queryset (e.g. from find_matching_services)
+        :return: CandidateBlock
+        """
+        return cls.from_rows(
+            queryset.values_list(*CANDIDATE_FIELDS).iterator(chunk_size=chunk_size)
+        )
+
+
+def score_block(seeker, block, radius_km=PROXIMITY_RADIUS_KM):
+    """
+    Score every candidate of a block against a seeker
+
+    :param seeker: User object (seeker)
+    :param block: CandidateBlock
+    :param radius_km: Distance at which the proximity bonus reaches zero
+    :return: int64 array of scores aligned with ``block.service_ids``
+    """
+    bonus = np.zeros(len(block), dtype=np.float64)
+
+    seeker_code = block.locations.get(seeker.location) if seeker.location else None
+    if seeker_code is not None:
+        bonus[block.location_codes == seeker_code] = LOCATION_MATCH_BONUS
+
+    if seeker.has_coordinates:
+        latitudes = np.radians(block.latitudes)
+        longitudes = np.radians(block.longitudes)
+        seeker_latitude = np.radians(seeker.latitude)
+        x = (longitudes - np.radians(seeker.longitude)) * np.cos((latitudes + seeker_latitude) / 2)
+        y = latitudes - seeker_latitude
+        distances = EARTH_RADIUS_KM * np.sqrt(x * x + y * y)
+
+        proximity = np.floor(LOCATION_MATCH_BONUS * (1 - distances / radius_km))
+        # Candidates without coordinates have NaN distance and no proximity bonus
+        proximity = np.nan_to_num(proximity, nan=0.0)
+        bonus = np.maximum(bonus, np.maximum(proximity, 0))
+
+    decided = block.accepted_counts + block.rejected_counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        acceptance = np.where(decided > 0, block.accepted_counts / decided, 0.0)
+    bonus += np.floor(REPUTATION_BONUS * acceptance)
+
+    return np.minimum(BASE_SCORE + bonus, MAX_SCORE).astype(np.int64)
+
+
+def top_k(block, scores, k):
+    """
+    Select the ``k`` best candidates without sorting the whole block
+
+    Ordered like ranked find_matches: score descending, then service id
+    ascending.
+
+    :param block: CandidateBlock
+    :param scores: Scores from ``score_block``
+    :param k: Number of candidates to return
+    :return: Tuple of (service id array, score array), best first
+    """
+    if k <= 0 or not len(block):
+        return block.service_ids[:0], scores[:0]
+
+    if k < len(scores):
+        # Scores are small integers with many ties: keep everything above the
+        # k-th best score, then the lowest service ids among the ties
+        threshold = -np.partition(-scores, k - 1)[k - 1]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)
+        needed = k - len(above)
+        if needed < len(ties):
+            ties = ties[np.argpartition(block.service_ids[ties], needed - 1)[:needed]]
+        candidates = np.concatenate((above, ties))
+    else:
+        candidates = np.arange(len(scores))
+
+    order = np.lexsort((block.service_ids[candidates], -scores[candidates]))[:k]
+    selected = candidates[order]
+    return block.service_ids[selected], scores[selected]
@@ -1,4 +1,5 @@
 # matching/serializers.py
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from matching.models import MatchRequest
 
@@ -99,5 +100,12 @@ class MatchRequestSerializer(serializers.ModelSerializer):
         # Set default status
         validated_data['status'] = 'pending'
 
-        # Create match request
-        return super().create(validated_data)
+        # Create match request; the unique_pending_match_request constraint
+        # catches duplicates that race past the check in validate()
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'detail': 'A pending request for this service already exists'
+            })
@@ -1,22 +1,50 @@
 # matching/services.py
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from matching.cache import match_result_cache
+from matching.pagination import (
+    decode_inbox_cursor, decode_match_cursor, encode_inbox_cursor, encode_match_cursor,
+    parse_match_limit
+)
+from matching.tasks import count_created_requests, count_transition
+from matching.utils import MAX_SCORE, PROXIMITY_RADIUS_KM, match_score_expression
+from users.geo import bounding_box, distance_km_expression
+
+MAX_DISTANCE_KM = 500
 
 
 class MatchingService:
     @staticmethod
-    def find_matching_services(seeker_preferences):
+    def find_matching_services(seeker_preferences, seeker=None):
         """
         Find matching services based on seeker preferences
 
+        When a seeker is given, each service is annotated with its
+        ``match_score`` in SQL and ``min_score`` is applied as a filter.
+
         :param seeker_preferences: Dict containing search criteria
+        :param seeker: Optional User object (seeker) to score against
         :return: Queryset of matching services
         """
+        from services.cache import get_category_id
         from services.models import Service
+        from services.search import search_services
 
-        # Basic matching logic
+        # Basic matching logic; callers project the rows they need with
+        # values(), which joins the category itself
         queryset = Service.objects.filter(is_active=True)
 
         if seeker_preferences.get('category'):
-            queryset = queryset.filter(category__name=seeker_preferences['category'])
+            # Resolve the name through the category cache instead of joining
+            category_id = get_category_id(seeker_preferences['category'])
+            if category_id is None:
+                queryset = queryset.none()
+            else:
+                queryset = queryset.filter(category_id=category_id)
 
         if seeker_preferences.get('max_price'):
             queryset = queryset.filter(price__lte=seeker_preferences['max_price'])
@@ -24,4 +52,523 @@ class MatchingService:
         if seeker_preferences.get('availability_type'):
             queryset = queryset.filter(availability_type=seeker_preferences['availability_type'])
 
+        max_distance_km = MatchingService.parse_max_distance(seeker_preferences.get('max_distance_km'))
+        if max_distance_km is not None:
+            if seeker is None or not seeker.has_coordinates:
+                raise serializers.ValidationError({
+                    'max_distance_km': 'Set your latitude and longitude to search by distance'
+                })
+
+            # Index-friendly bounding box first, exact distance on what is left
+            min_lat, max_lat, min_lon, max_lon = bounding_box(
+                seeker.latitude, seeker.longitude, max_distance_km
+            )
+            queryset = queryset.filter(provider__latitude__range=(min_lat, max_lat))
+            if min_lon >= -180 and max_lon <= 180:
+                queryset = queryset.filter(provider__longitude__range=(min_lon, max_lon))
+
+            queryset = queryset.annotate(
+                distance_km=distance_km_expression(seeker.latitude, seeker.longitude, 'provider__')
+            ).filter(distance_km__lte=max_distance_km)
+
+        keyword = seeker_preferences.get('keyword')
+        if keyword:
+            queryset = search_services(queryset, keyword)
+
+        if seeker is not None:
+            queryset = queryset.annotate(match_score=match_score_expression(
+                seeker, max_distance_km or PROXIMITY_RADIUS_KM, keyword_search=bool(keyword)
+            ))
+
+            min_score = MatchingService.parse_min_score(seeker_preferences.get('min_score'))
+            if min_score:
+                queryset = queryset.filter(match_score__gte=min_score)
+
         return queryset
+
+    @staticmethod
+    def parse_max_distance(value):
+        """
+        Validate the optional ``max_distance_km`` preference
+
+        :param value: Raw ``max_distance_km`` value from the request (may be None)
+        :return: Positive distance in kilometres, or None
+        """
+        if value in (None, ''):
+            return None
+
+        try:
+            max_distance_km = float(value)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({
+                'max_distance_km': 'Maximum distance must be a number'
+            })
+
+        if not 0 < max_distance_km <= MAX_DISTANCE_KM:
+            raise serializers.ValidationError({
+                'max_distance_km': f'Maximum distance must be between 0 and {MAX_DISTANCE_KM} km'
+            })
+
+        return max_distance_km
+
+    @staticmethod
+    def parse_min_score(value):
+        """
+        Validate the optional ``min_score`` preference
+
+        :param value: Raw ``min_score`` value from the request (may be None)
+        :return: Minimum score between 0 and MAX_SCORE, or None
+        """
+        if value in (None, ''):
+            return None
+
+        try:
+            min_score = int(value)
+        except (TypeError, ValueError):
+            raise serializers.ValidationError({
+                'min_score': 'Minimum score must be an integer'
+            })
+
+        if min_score < 0 or min_score > MAX_SCORE:
+            raise serializers.ValidationError({
+                'min_score': f'Minimum score must be between 0 and {MAX_SCORE}'
+            })
+
+        return min_score
+
+    @staticmethod
+    def serialize_matches(services, provider_profiles):
+        """
+        Serialize scored services with providers from preloaded profiles
+
+        Does not touch the database, so it is safe to call from async code.
+
+        :param services: List of rows from ``services.projections.service_values``
+            with ``match_score`` loaded
+        :param provider_profiles: Dict of provider id to profile, as
+            returned by ``users.cache.get_provider_profiles``
+        :return: List of dicts with serialized service and match score
+        """
+        from services.projections import project_service
+
+        return [
+            {
+                'service': project_service(service, provider_profiles),
+                'match_score': service['match_score']
+            }
+            for service in services
+        ]
+
+    @staticmethod
+    def find_matches(seeker, seeker_preferences):
+        """
+        Find, score and serialize matches for a seeker
+
+        Runs a fixed number of queries regardless of how many services match:
+        scores are computed by the database and the candidate set is
+        serialized from the already-loaded rows.
+
+        :param seeker: User object (seeker)
+        :param seeker_preferences: Dict containing search criteria
+        :return: List of dicts with serialized service and match score
+        """
+        from services.projections import service_values
+        from users.cache import get_provider_profiles
+
+        services = list(service_values(
+            MatchingService.find_matching_services(seeker_preferences, seeker), 'match_score'
+        ))
+        profiles = get_provider_profiles(service['provider_id'] for service in services)
+
+        return MatchingService.serialize_matches(services, profiles)
+
+    @staticmethod
+    def ranked_page_queryset(seeker, seeker_preferences, limit, cursor=None):
+        """
+        Build the query for one score-ordered page of matches
+
+        Scoring, ``min_score`` thresholding, ordering and the page cut all
+        happen in SQL, so only the rows on the page (plus one to detect a
+        next page) are loaded. Matches are ordered by score descending, then
+        service id ascending, and ``cursor`` is the position of the last
+        match on the previous page.
+
+        :param seeker: User object (seeker)
+        :param seeker_preferences: Dict containing search criteria
+        :param limit: Maximum number of matches to return
+        :param cursor: Optional (score, service id) tuple to resume after
+        :return: Sliced ``service_values`` queryset of at most ``limit + 1`` rows
+        """
+        from services.projections import service_values
+
+        queryset = MatchingService.find_matching_services(seeker_preferences, seeker)
+
+        if cursor is not None:
+            cursor_score, cursor_id = cursor
+            queryset = queryset.filter(
+                Q(match_score__lt=cursor_score) |
+                Q(match_score=cursor_score, id__gt=cursor_id)
+            )
+
+        return service_values(queryset.order_by('-match_score', 'id'), 'match_score')[:limit + 1]
+
+    @staticmethod
+    def split_page(services, limit):
+        """
+        :param services: Rows loaded from ``ranked_page_queryset``
+        :param limit: Page size
+        :return: Tuple of (page of rows, next (score, id) or None)
+        """
+        page = services[:limit]
+        next_position = None
+        if len(services) > limit:
+            next_position = (page[-1]['match_score'], page[-1]['id'])
+        return page, next_position
+
+    @staticmethod
+    def rank_matches(seeker, seeker_preferences, limit, cursor=None):
+        """
+        Return one score-ordered page of matches for a seeker
+
+        :param seeker: User object (seeker)
+        :param seeker_preferences: Dict containing search criteria
+        :param limit: Maximum number of matches to return
+        :param cursor: Optional (score, service id) tuple to resume after
+        :return: Tuple of (list of match dicts, next (score, id) or None)
+        """
+        from users.cache import get_provider_profiles
+
+        services = list(MatchingService.ranked_page_queryset(
+            seeker, seeker_preferences, limit, cursor
+        ))
+        page, next_position = MatchingService.split_page(services, limit)
+        profiles = get_provider_profiles(service['provider_id'] for service in page)
+
+        return MatchingService.serialize_matches(page, profiles), next_position
+
+    @staticmethod
+    def search_matches(seeker, seeker_preferences):
+        """
+        Answer a find_matches request, serving repeated searches from cache
+
+        Passing ``limit`` and/or ``cursor`` switches to ranked mode: a single
+        score-ordered page plus a ``next_cursor`` for the following page.
+
+        :param seeker: User object (seeker)
+        :param seeker_preferences: Dict containing search criteria
+        :return: Response data (list of matches, or dict in ranked mode)
+        """
+        cache_key, category = match_result_cache.make_key(seeker, seeker_preferences)
+        cached_data = match_result_cache.get(cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        if MatchingService.is_ranked(seeker_preferences):
+            limit, cursor = MatchingService.parse_page(seeker_preferences)
+            matches, next_position = MatchingService.rank_matches(
+                seeker, seeker_preferences, limit, cursor
+            )
+            data = MatchingService.ranked_response(matches, next_position)
+        else:
+            data = matches = MatchingService.find_matches(seeker, seeker_preferences)
+
+        MatchingService.cache_matches(cache_key, category, matches, data)
+        return data
+
+    @staticmethod
+    async def asearch_matches(seeker, seeker_preferences):
+        """
+        Async variant of ``search_matches`` using the async ORM and cache APIs
+
+        :param seeker: User object (seeker)
+        :param seeker_preferences: Dict containing search criteria
+        :return: Response data (list of matches, or dict in ranked mode)
+        """
+        from services.projections import service_values
+        from users.cache import aget_provider_profiles
+
+        # The result cache itself is in-process memory and never blocks
+        cache_key, category = await match_result_cache.amake_key(seeker, seeker_preferences)
+        cached_data = match_result_cache.get(cache_key)
+        if cached_data is not None:
+            return cached_data
+
+        # Building the queryset may fill the category cache from the database
+        next_position = None
+        if MatchingService.is_ranked(seeker_preferences):
+            limit, cursor = MatchingService.parse_page(seeker_preferences)
+            queryset = await sync_to_async(MatchingService.ranked_page_queryset)(
+                seeker, seeker_preferences, limit, cursor
+            )
+            services, next_position = MatchingService.split_page(
+                [service async for service in queryset], limit
+            )
+        else:
+            queryset = await sync_to_async(MatchingService.find_matching_services)(
+                seeker_preferences, seeker
+            )
+            services = [service async for service in service_values(queryset, 'match_score')]
+
+        profiles = await aget_provider_profiles(service['provider_id'] for service in services)
+        data = matches = MatchingService.serialize_matches(services, profiles)
+        if MatchingService.is_ranked(seeker_preferences):
+            data = MatchingService.ranked_response(matches, next_position)
+
+        MatchingService.cache_matches(cache_key, category, matches, data)
+        return data
+
+    @staticmethod
+    def is_ranked(seeker_preferences):
+        return 'limit' in seeker_preferences or 'cursor' in seeker_preferences
+
+    @staticmethod
+    def parse_page(seeker_preferences):
+        """
+        :return: Tuple of (limit, decoded cursor or None)
+        """
+        limit = parse_match_limit(seeker_preferences.get('limit'))
+        cursor = seeker_preferences.get('cursor')
+        return limit, decode_match_cursor(cursor) if cursor else None
+
+    @staticmethod
+    def ranked_response(matches, next_position):
+        return {
+            'results': matches,
+            'next_cursor': encode_match_cursor(*next_position) if next_position else None
+        }
+
+    @staticmethod
+    def cache_matches(cache_key, category, matches, data):
+        provider_ids = {match['service']['provider']['id'] for match in matches}
+        match_result_cache.set(cache_key, category, provider_ids, data)
+
+
+class InvalidTransition(Exception):
+    """
+    The match request is not (or no longer) in a status that allows the change
+    """
+
+    def __init__(self, current_status, new_status):
+        self.current_status = current_status
+        self.new_status = new_status
+        super().__init__(f'Cannot change status from {current_status} to {new_status}')
+
+
+class MatchRequestService:
+    MAX_BULK_ITEMS = 500
+
+    @staticmethod
+    def transition(provider, match_request_id, new_status):
+        """
+        Move one of a provider's match requests to a new status
+
+        The status check and the write are one conditional ``UPDATE ...
+        WHERE status IN (<allowed sources>)``, so of two concurrent changes
+        only one can succeed, and only ``status`` and ``updated_at`` are
+        written. ``update()`` skips the post_save handler, so the provider
+        stats update is queued here, in the same transaction, and the
+        provider's cached results (a per-process cache) are evicted here, in
+        the request's process.
+
+        :param provider: User object (provider owning the request)
+        :param match_request_id: Match request id
+        :param new_status: Target status
+        :return: Updated MatchRequest object
+        :raises MatchRequest.DoesNotExist: No such request for this provider
+        :raises InvalidTransition: The current status does not allow the change
+        """
+        from matching.models import MatchRequest
+
+        sources = MatchRequest.transition_sources(new_status)
+        if not sources:
+            targets = sorted({target for targets in MatchRequest.TRANSITIONS.values() for target in targets})
+            raise serializers.ValidationError({
+                'status': f'Invalid status. Allowed: {targets}'
+            })
+
+        queryset = MatchRequest.objects.filter(pk=match_request_id, provider=provider)
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Each target has a single source in the declared machine; with
+            # several, each is tried so the previous status stays known
+            for old_status in sources:
+                if queryset.filter(status=old_status).update(status=new_status, updated_at=now):
+                    break
+            else:
+                current_status = queryset.values_list('status', flat=True).get()
+                raise InvalidTransition(current_status, new_status)
+
+            match_request = queryset.get()
+            count_transition.enqueue(
+                match_request_id=match_request.pk,
+                old_status=old_status,
+                new_status=new_status,
+                responded_at=now.isoformat()
+            )
+
+        # The acceptance rate feeds the match score
+        match_result_cache.invalidate_provider(provider.pk)
+        return match_request
+
+    @staticmethod
+    def bulk_create(seeker, items):
+        """
+        Validate and create many match requests with a constant number of queries
+
+        Mirrors ``MatchRequestSerializer.validate`` per item using one fetch
+        of the referenced services, one of the referenced providers and one
+        duplicate check, then inserts every valid item with a single
+        ``bulk_create`` inside a transaction.
+
+        :param seeker: User object (seeker)
+        :param items: List of dicts with ``provider`` and ``service`` ids
+        :return: List of per-item result dicts, in input order
+        """
+        from matching.models import MatchRequest
+        from services.models import Service
+        from users.models import User
+
+        parsed = []
+        for item in items:
+            try:
+                parsed.append((int(item['provider']), int(item['service'])))
+            except (KeyError, TypeError, ValueError):
+                parsed.append(None)
+
+        provider_ids = {pair[0] for pair in parsed if pair}
+        service_ids = {pair[1] for pair in parsed if pair}
+
+        providers = set(
+            User.objects.filter(id__in=provider_ids, user_type='provider').values_list('id', flat=True)
+        )
+        service_providers = dict(
+            Service.objects.filter(id__in=service_ids).values_list('id', 'provider_id')
+        )
+        pending = set(
+            MatchRequest.objects.filter(
+                seeker=seeker,
+                status='pending',
+                service_id__in=service_ids
+            ).values_list('provider_id', 'service_id')
+        )
+
+        results = []
+        to_create = []
+        for index, pair in enumerate(parsed):
+            errors = MatchRequestService._validate_pair(pair, providers, service_providers, pending)
+            if errors:
+                results.append({'index': index, 'status': 'error', 'errors': errors})
+                continue
+
+            # Later duplicates of the same pair in this batch are rejected too
+            pending.add(pair)
+            provider_id, service_id = pair
+            to_create.append(MatchRequest(
+                seeker=seeker,
+                provider_id=provider_id,
+                service_id=service_id,
+                status='pending'
+            ))
+            results.append({'index': index, 'status': 'created'})
+
+        if to_create:
+            with transaction.atomic():
+                MatchRequest.objects.bulk_create(to_create)
+                # bulk_create skips the post_save handler that keeps stats
+                count_created_requests.enqueue(
+                    provider_ids=[match_request.provider_id for match_request in to_create]
+                )
+
+        created = iter(to_create)
+        for result in results:
+            if result['status'] == 'created':
+                result['match_request'] = next(created)
+
+        return results
+
+    @staticmethod
+    def inbox(provider, statuses=None, limit=None, cursor=None):
+        """
+        Return one page of a provider's match requests, newest first
+
+        Pages are cut with a ``(created_at, id)`` keyset on the provider
+        inbox indexes and carry the seeker and service in the same query, so
+        every page costs the same however long the history is.
+
+        :param provider: User object (provider)
+        :param statuses: Optional list of statuses to keep
+        :param limit: Raw page size (default DEFAULT_MATCH_LIMIT)
+        :param cursor: Raw cursor from the previous page
+        :return: Dict with ``results`` and ``next_cursor``
+        """
+        from matching.models import MatchRequest
+        from matching.projections import INBOX_VALUES, project_inbox_request
+
+        limit = parse_match_limit(limit)
+        queryset = MatchRequest.objects.filter(provider=provider)
+
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+
+        if cursor:
+            created_at, match_request_id = decode_inbox_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, id__lt=match_request_id)
+            )
+
+        rows = list(queryset.order_by('-created_at', '-id').values(*INBOX_VALUES)[:limit + 1])
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_inbox_cursor(page[-1]['created_at'], page[-1]['id'])
+
+        zone = timezone.get_current_timezone()
+        return {
+            'results': [project_inbox_request(row, zone) for row in page],
+            'next_cursor': next_cursor
+        }
+
+    @staticmethod
+    def parse_statuses(value):
+        """
+        Validate the optional comma-separated ``status`` filter
+
+        :param value: Raw ``status`` query parameter (may be None)
+        :return: List of statuses, or None for all of them
+        """
+        from matching.models import MatchRequest
+
+        if not value:
+            return None
+
+        statuses = [status.strip() for status in value.split(',') if status.strip()]
+        valid = {choice for choice, _ in MatchRequest.STATUS_CHOICES}
+        invalid = [status for status in statuses if status not in valid]
+        if invalid:
+            raise serializers.ValidationError({
+                'status': f'Unknown status {invalid[0]!r}. Allowed: {sorted(valid)}'
+            })
+
+        return statuses
+
+    @staticmethod
+    def _validate_pair(pair, providers, service_providers, pending):
+        if pair is None:
+            return {'detail': 'Each item needs integer provider and service ids'}
+
+        provider_id, service_id = pair
+        if provider_id not in providers:
+            return {'provider': 'Invalid provider selected'}
+
+        if service_id not in service_providers:
+            return {'service': 'Invalid service selected'}
+
+        if service_providers[service_id] != provider_id:
+            return {'service': 'Selected service does not belong to the chosen provider'}
+
+        if pair in pending:
+            return {'detail': 'A pending request for this service already exists'}
+
+        return None
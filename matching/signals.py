@@ -0,0 +1,92 @@
+# matching/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from matching.cache import match_result_cache
+from matching.models import MatchRequest
+from matching.stats import refresh_active_service_counts
+from matching.tasks import count_created_requests, count_transition
+from services.models import Service, ServiceCategory
+from services.signals import services_bulk_changed
+from users.models import LOCATION_FIELDS, User
+
+
+def evict_results(evict):
+    # Now, so searches in the writing transaction see the change, and again
+    # after commit: a concurrent search may cache the old rows in between
+    evict()
+    transaction.on_commit(evict)
+
+
+@receiver([post_save, post_delete], sender=Service)
+def invalidate_service_results(sender, instance, **kwargs):
+    # A service moved to another category must also leave the old one's results
+    category_ids = {instance.category_id, getattr(instance, '_loaded_category_id', None)}
+    evict_results(lambda: match_result_cache.invalidate_categories(category_ids))
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(services_bulk_changed)
+def invalidate_bulk_service_results(sender, category_ids, **kwargs):
+    evict_results(lambda: match_result_cache.invalidate_categories(category_ids))
+
+
+@receiver([post_save, post_delete], sender=Service)
+def update_active_service_count(sender, instance, **kwargs):
+    refresh_active_service_counts({instance.provider_id})
+
+
+@receiver(services_bulk_changed)
+def update_bulk_active_service_counts(sender, provider_ids=(), **kwargs):
+    refresh_active_service_counts(provider_ids)
+
+
+@receiver(post_save, sender=MatchRequest)
+def update_provider_stats(sender, instance, created, **kwargs):
+    if created:
+        count_created_requests.enqueue(provider_ids=[instance.provider_id])
+    else:
+        old_status = getattr(instance, '_loaded_status', None)
+        if old_status and old_status != instance.status:
+            count_transition.enqueue(
+                match_request_id=instance.pk,
+                old_status=old_status,
+                new_status=instance.status,
+                responded_at=instance.updated_at.isoformat()
+            )
+            # The acceptance rate feeds the match score. The result cache is
+            # per process, so evict here rather than in the worker.
+            provider_id = instance.provider_id
+            transaction.on_commit(lambda: match_result_cache.invalidate_provider(provider_id))
+
+    instance._loaded_status = instance.status
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+def invalidate_category_results(sender, **kwargs):
+    evict_results(match_result_cache.clear)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_provider_results(sender, instance, **kwargs):
+    if instance.user_type == 'provider':
+        provider_id = instance.pk
+        evict_results(lambda: match_result_cache.invalidate_provider(provider_id))
+
+
+@receiver(post_save, sender=User)
+def invalidate_results_near_provider(sender, instance, created, update_fields=None, **kwargs):
+    # A provider who moved can enter searches that did not include them, so
+    # evict every search over the categories they offer services in
+    if update_fields is not None and not set(update_fields) & set(LOCATION_FIELDS):
+        return
+    location = instance.location_state()
+    if not created and instance.user_type == 'provider' and (
+        location != getattr(instance, '_loaded_location', None)
+    ):
+        category_ids = set(
+            Service.objects.filter(provider_id=instance.pk).values_list('category_id', flat=True)
+        )
+        evict_results(lambda: match_result_cache.invalidate_categories(category_ids))
+    instance._loaded_location = location
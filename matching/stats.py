@@ -0,0 +1,180 @@
+# matching/stats.py
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+# Counter bumped when a request reaches each status
+STATUS_COUNTERS = {
+    'accepted': 'accepted_count',
+    'rejected': 'rejected_count',
+    'completed': 'completed_count',
+}
+
+
+def increment_stats(provider_id, **deltas):
+    """
+    Atomically add ``deltas`` to a provider's stats row, creating it if needed
+
+    :param provider_id: Provider user id
+    :param deltas: Field name to amount to add
+    """
+    from matching.models import ProviderStats
+
+    updates = {name: F(name) + amount for name, amount in deltas.items()}
+    if ProviderStats.objects.filter(provider_id=provider_id).update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            ProviderStats.objects.create(provider_id=provider_id, **deltas)
+    except IntegrityError:
+        # Created concurrently; apply the deltas to that row instead
+        ProviderStats.objects.filter(provider_id=provider_id).update(**updates)
+
+
+def record_requests_created(provider_ids):
+    """
+    Count newly created match requests with a constant number of queries
+
+    :param provider_ids: Provider id of each new request (repeated per request)
+    """
+    from matching.models import ProviderStats
+
+    received = Counter(provider_ids)
+    if not received:
+        return
+
+    ProviderStats.objects.bulk_create(
+        [ProviderStats(provider_id=provider_id) for provider_id in received],
+        ignore_conflicts=True
+    )
+    ProviderStats.objects.filter(provider_id__in=received).update(
+        received_count=F('received_count') + Case(
+            *[When(provider_id=provider_id, then=Value(count)) for provider_id, count in received.items()],
+            default=Value(0)
+        )
+    )
+
+
+def record_transition(match_request, old_status, new_status, responded_at=None):
+    """
+    Update the provider's stats for one status change of a match request
+
+    :param match_request: MatchRequest object (``created_at`` is used to
+        measure response latency)
+    :param old_status: Status before the change
+    :param new_status: Status after the change
+    :param responded_at: When the change happened (defaults to now)
+    """
+    deltas = {}
+
+    if new_status in STATUS_COUNTERS:
+        deltas[STATUS_COUNTERS[new_status]] = 1
+
+    if old_status == 'pending' and new_status in ('accepted', 'rejected'):
+        responded_at = responded_at or timezone.now()
+        deltas['response_count'] = 1
+        deltas['total_response_seconds'] = max(
+            (responded_at - match_request.created_at).total_seconds(), 0
+        )
+
+    if deltas:
+        increment_stats(match_request.provider_id, **deltas)
+
+
+def refresh_active_service_counts(provider_ids):
+    """
+    Recount active services for the given providers with one query
+
+    :param provider_ids: Iterable of provider user ids
+    """
+    from matching.models import ProviderStats
+    from services.models import Service
+
+    provider_ids = set(provider_ids)
+    counts = dict(
+        Service.objects.filter(provider_id__in=provider_ids, is_active=True)
+        .values_list('provider_id')
+        .annotate(count=Count('id'))
+    )
+
+    existing = set(
+        ProviderStats.objects.filter(provider_id__in=provider_ids).values_list('provider_id', flat=True)
+    )
+    for provider_id in provider_ids:
+        count = counts.get(provider_id, 0)
+        if provider_id in existing:
+            ProviderStats.objects.filter(provider_id=provider_id).update(active_service_count=count)
+        elif count:
+            increment_stats(provider_id, active_service_count=count)
+
+
+def rebuild_provider_stats():
+    """
+    Recompute every provider's stats from MatchRequest and Service history
+
+    Every accepted, rejected or completed request was answered once. The
+    answer time is only known for requests still accepted or rejected
+    (``updated_at``), so completed ones are given the provider's mean latency
+    over those, or their completion time when there are none.
+
+    :return: Number of stats rows written
+    """
+    from matching.models import MatchRequest, ProviderStats
+    from users.models import User
+
+    answered = Q(status__in=['accepted', 'rejected', 'completed'])
+    history = {
+        row['provider_id']: row
+        for row in MatchRequest.objects.values('provider_id').annotate(
+            received_count=Count('id'),
+            accepted_count=Count('id', filter=Q(status__in=['accepted', 'completed'])),
+            rejected_count=Count('id', filter=Q(status='rejected')),
+            completed_count=Count('id', filter=Q(status='completed')),
+            response_count=Count('id', filter=answered),
+        )
+    }
+
+    known, completed = {}, {}
+    for provider_id, status, created_at, updated_at in MatchRequest.objects.filter(answered).values_list(
+        'provider_id', 'status', 'created_at', 'updated_at'
+    ).iterator(chunk_size=5000):
+        totals = completed if status == 'completed' else known
+        total, count = totals.get(provider_id, (0, 0))
+        totals[provider_id] = (total + max((updated_at - created_at).total_seconds(), 0), count + 1)
+
+    latencies = {}
+    for provider_id in set(known) | set(completed):
+        known_total, known_count = known.get(provider_id, (0, 0))
+        completed_total, completed_count = completed.get(provider_id, (0, 0))
+        if known_count:
+            completed_total = known_total / known_count * completed_count
+        latencies[provider_id] = known_total + completed_total
+
+    active_services = dict(
+        User.objects.filter(user_type='provider').annotate(
+            active=Count('services', filter=Q(services__is_active=True))
+        ).values_list('id', 'active')
+    )
+
+    rows = []
+    for provider_id in set(history) | set(active_services):
+        counts = history.get(provider_id, {})
+        rows.append(ProviderStats(
+            provider_id=provider_id,
+            received_count=counts.get('received_count', 0),
+            accepted_count=counts.get('accepted_count', 0),
+            rejected_count=counts.get('rejected_count', 0),
+            completed_count=counts.get('completed_count', 0),
+            response_count=counts.get('response_count', 0),
+            total_response_seconds=latencies.get(provider_id, 0),
+            active_service_count=active_services.get(provider_id, 0),
+        ))
+
+    with transaction.atomic():
+        ProviderStats.objects.all().delete()
+        ProviderStats.objects.bulk_create(rows, batch_size=1000)
+
+    return len(rows)
@@ -0,0 +1,39 @@
+# matching/tasks.py
+"""
+Side effects of match request changes, run by the task queue
+
+Enqueued in the transaction of the change, so they are never lost, and run
+outside the request by ``manage.py run_tasks``.
+"""
+from django.utils.dateparse import parse_datetime
+
+from matching.stats import record_requests_created, record_transition
+from tasks.queue import task
+
+
+@task
+def count_created_requests(provider_ids):
+    """
+    :param provider_ids: Provider id of each new request (repeated per request)
+    """
+    record_requests_created(provider_ids)
+
+
+@task
+def count_transition(match_request_id, old_status, new_status, responded_at):
+    """
+    :param match_request_id: Match request id
+    :param old_status: Status before the change
+    :param new_status: Status after the change
+    :param responded_at: ISO 8601 time of the change
+    """
+    from matching.models import MatchRequest
+
+    match_request = MatchRequest.objects.filter(pk=match_request_id).only(
+        'provider_id', 'created_at'
+    ).first()
+    if match_request is None:
+        # Deleted since; its stats went with it or will be rebuilt
+        return
+
+    record_transition(match_request, old_status, new_status, responded_at=parse_datetime(responded_at))
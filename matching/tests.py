@@ -1,3 +1,945 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from matching.cache import match_result_cache
+from matching.models import MatchRequest, ProviderStats
+from matching.scoring import CandidateBlock, score_block, top_k
+from matching.serializers import MatchRequestSerializer
+from matching.services import InvalidTransition, MatchRequestService
+from matching.utils import calculate_match_score
+from seeker_provider_app.instrumentation import (
+    N_PLUS_ONE_MIN_SAMPLES, RequestMetricsMiddleware, RequestTimings, request_metrics
+)
+from seeker_provider_app.routers import ReplicaPinningMiddleware, _routing, pin_cache, pin_key
+from services.models import Service, ServiceCategory
+from users.models import User
+from users.tokens import issue_tokens
+
+
+class FindMatchesTestBase(TestCase):
+    def setUp(self):
+        self.seeker = User.objects.create(
+            username='seeker', user_type='seeker', location='Cebu'
+        )
+        self.category = ServiceCategory.objects.create(name='Plumbing')
+        self.client = APIClient()
+        self.client.force_authenticate(self.seeker)
+        match_result_cache.clear()
+        request_metrics.reset()
+
+    def add_services(self, count):
+        for index in range(count):
+            provider = User.objects.create(
+                username=f'provider-{Service.objects.count()}',
+                user_type='provider',
+                location='Cebu' if index % 2 else 'Manila'
+            )
+            Service.objects.create(
+                provider=provider,
+                category=self.category,
+                name=f'Service {index}',
+                description='Fixes pipes',
+                price='100.00',
+                availability_type='online'
+            )
+
+    def find_matches(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/match-requests/find_matches/',
+                {'category': 'Plumbing'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+
+class FindMatchesQueryCountTest(FindMatchesTestBase):
+    def test_query_count_is_constant_as_results_grow(self):
+        # Warm the category cache so both measured calls run the same path
+        self.find_matches()
+
+        self.add_services(2)
+        small_matches, small_queries = self.find_matches()
+
+        self.add_services(20)
+        large_matches, large_queries = self.find_matches()
+
+        self.assertEqual(len(small_matches), 2)
+        self.assertEqual(len(large_matches), 22)
+        self.assertEqual(small_queries, large_queries)
+
+    def test_scores_reflect_provider_location(self):
+        self.add_services(2)
+        matches, _ = self.find_matches()
+
+        scores = {
+            match['service']['provider']['location']: match['match_score']
+            for match in matches
+        }
+        self.assertEqual(scores, {'Cebu': 75, 'Manila': 50})
+
+
+class RankedFindMatchesTest(FindMatchesTestBase):
+    def test_pages_are_score_ordered_and_cover_all_matches(self):
+        self.add_services(5)
+
+        seen = []
+        cursor = None
+        while True:
+            payload = {'category': 'Plumbing', 'limit': 2}
+            if cursor:
+                payload['cursor'] = cursor
+            response = self.client.post(
+                '/api/match-requests/find_matches/', payload, format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body['results']), 2)
+            seen.extend(body['results'])
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len({match['service']['id'] for match in seen}), 5)
+        scores = [match['match_score'] for match in seen]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_invalid_limit_and_cursor_are_rejected(self):
+        for payload in ({'limit': 0}, {'limit': 'many'}, {'cursor': 'not-a-cursor'}):
+            response = self.client.post(
+                '/api/match-requests/find_matches/', payload, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_min_score_is_applied_in_the_database(self):
+        self.add_services(4)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/match-requests/find_matches/',
+                {'category': 'Plumbing', 'limit': 10, 'min_score': 75},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(match['match_score'] == 75 for match in results))
+        service_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'FROM "services_service"' in query['sql']
+        ]
+        self.assertEqual(len(service_queries), 1)
+        self.assertIn('LIMIT 11', service_queries[0])
+
+
+class MatchResultCacheTest(FindMatchesTestBase):
+    def test_repeated_search_skips_the_database(self):
+        self.add_services(3)
+        first, first_queries = self.find_matches()
+        second, second_queries = self.find_matches()
+
+        self.assertGreater(first_queries, 0)
+        self.assertEqual(second_queries, 0)
+        self.assertEqual(first, second)
+
+    def test_searches_cached_before_commit_are_evicted_after_it(self):
+        self.add_services(3)
+        service = Service.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            service.is_active = False
+            service.save()
+            # A concurrent search, reading before the commit, caches old rows
+            self.find_matches()
+            self.assertEqual(len(match_result_cache._entries), 1)
+        self.assertEqual(len(match_result_cache._entries), 0)
+
+    def test_service_changes_evict_searches_over_their_category(self):
+        self.add_services(3)
+        self.find_matches()
+
+        service = Service.objects.first()
+        service.is_active = False
+        service.save()
+
+        matches, queries = self.find_matches()
+        self.assertGreater(queries, 0)
+        self.assertEqual(len(matches), 2)
+
+    def test_providers_moving_into_range_evict_searches_over_their_categories(self):
+        self.seeker.latitude, self.seeker.longitude = 10.3157, 123.8854
+        self.seeker.save()
+        self.add_services(2)
+
+        def search():
+            response = self.client.post(
+                '/api/match-requests/find_matches/',
+                {'category': 'Plumbing', 'max_distance_km': 5},
+                format='json'
+            )
+            self.assertEqual(response.status_code, 200)
+            return response.json()
+
+        User.objects.filter(username='provider-1').update(latitude=10.3160, longitude=123.8850)
+        self.assertEqual(len(search()), 1)
+
+        provider = User.objects.get(username='provider-0')
+        provider.latitude, provider.longitude = 10.3170, 123.8860
+        provider.save()
+        self.assertEqual(len(search()), 2)
+
+    def test_other_categories_stay_cached(self):
+        self.add_services(2)
+        self.find_matches()
+
+        other = ServiceCategory.objects.create(name='Tutoring')
+        self.find_matches()
+        Service.objects.create(
+            provider=User.objects.create(username='tutor', user_type='provider'),
+            category=other,
+            name='Math',
+            description='Algebra',
+            price='50.00',
+            availability_type='online'
+        )
+
+        _, queries = self.find_matches()
+        self.assertEqual(queries, 0)
+
+
+class AsyncMatchingViewsTest(FindMatchesTestBase):
+    async def test_async_find_matches_matches_sync_endpoint(self):
+        await sync_to_async(self.add_services)(3)
+        sync_matches, _ = await sync_to_async(self.find_matches)()
+        match_result_cache.clear()
+        await self.async_client.aforce_login(self.seeker)
+
+        response = await self.async_client.post(
+            '/api/async/match-requests/find_matches/',
+            {'category': 'Plumbing'},
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync_matches)
+
+    async def test_async_endpoints_require_authentication(self):
+        response = await self.async_client.get('/api/async/match-requests/')
+        self.assertEqual(response.status_code, 403)
+
+    async def test_async_ranked_find_matches_matches_sync_endpoint(self):
+        await sync_to_async(self.add_services)(5)
+        preferences = {'category': 'Plumbing', 'max_price': 150, 'limit': 2}
+        sync_response = await sync_to_async(self.client.post)(
+            '/api/match-requests/find_matches/', preferences, format='json'
+        )
+        match_result_cache.clear()
+        await self.async_client.aforce_login(self.seeker)
+
+        response = await self.async_client.post(
+            '/api/async/match-requests/find_matches/', preferences,
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(response.json(), sync_response.json())
+
+    async def test_async_match_request_listing(self):
+        await self.async_client.aforce_login(self.seeker)
+
+        response = await self.async_client.get('/api/async/match-requests/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+
+    async def test_async_match_request_listing_matches_sync_endpoint(self):
+        await sync_to_async(self.add_services)(3)
+        async for service in Service.objects.select_related('provider'):
+            await MatchRequest.objects.acreate(
+                seeker=self.seeker, provider=service.provider, service=service
+            )
+        sync_listing = await sync_to_async(self.client.get)('/api/match-requests/')
+        await self.async_client.aforce_login(self.seeker)
+
+        response = await self.async_client.get('/api/async/match-requests/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 3)
+        self.assertEqual(response.json(), sync_listing.json())
+
+
+class MatchRequestListProjectionTest(FindMatchesTestBase):
+    def test_listing_matches_the_serializer(self):
+        self.add_services(3)
+        for service in Service.objects.all():
+            MatchRequest.objects.create(seeker=self.seeker, provider=service.provider, service=service)
+
+        response = self.client.get('/api/match-requests/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            MatchRequestSerializer(MatchRequest.objects.filter(seeker=self.seeker), many=True).data
+        )
+
+    def test_streamed_export_matches_the_listing(self):
+        self.add_services(3)
+        for service in Service.objects.all():
+            MatchRequest.objects.create(seeker=self.seeker, provider=service.provider, service=service)
+        listing = self.client.get('/api/match-requests/').json()
+
+        response = self.client.get('/api/match-requests/', {'stream': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], listing)
+
+        response = self.client.get('/api/match-requests/export/', {'stream': 'json'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="match-requests.json"')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), listing)
+
+
+class ProviderInboxTest(FindMatchesTestBase):
+    def setUp(self):
+        super().setUp()
+        self.add_services(1)
+        self.service = Service.objects.get()
+        self.provider = self.service.provider
+        for index in range(7):
+            MatchRequest.objects.create(
+                seeker=User.objects.create(username=f'seeker-{index}', user_type='seeker'),
+                provider=self.provider,
+                service=self.service,
+                status='accepted' if index % 3 == 0 else 'pending'
+            )
+        # Ties on created_at must still page deterministically
+        MatchRequest.objects.filter(id__in=MatchRequest.objects.order_by('id')[:4].values('id')).update(
+            created_at=MatchRequest.objects.order_by('id').first().created_at
+        )
+        self.client.force_authenticate(self.provider)
+
+    def inbox(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/match-requests/inbox/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_pages_cover_the_inbox_newest_first_in_constant_queries(self):
+        expected = list(
+            MatchRequest.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+
+        seen = []
+        query_counts = set()
+        page, queries = self.inbox(limit=3)
+        while True:
+            seen.extend(item['id'] for item in page['results'])
+            query_counts.add(queries)
+            if not page['next_cursor']:
+                break
+            page, queries = self.inbox(limit=3, cursor=page['next_cursor'])
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(query_counts, {1})
+
+        item = page['results'][-1]
+        self.assertEqual(item['service'], {'id': self.service.id, 'name': 'Service 0', 'price': '100.00'})
+        self.assertEqual(item['seeker']['username'], 'seeker-0')
+
+    def test_status_filter_and_validation(self):
+        page, _ = self.inbox(status='accepted')
+        self.assertEqual([item['status'] for item in page['results']], ['accepted'] * 3)
+
+        page, _ = self.inbox(status='accepted,pending')
+        self.assertEqual(len(page['results']), 7)
+
+        self.assertEqual(self.client.get('/api/match-requests/inbox/', {'status': 'lost'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/match-requests/inbox/', {'cursor': 'nope'}).status_code, 400)
+
+        self.client.force_authenticate(self.seeker)
+        self.assertEqual(self.client.get('/api/match-requests/inbox/').status_code, 403)
+
+
+class BulkMatchRequestTest(FindMatchesTestBase):
+    def bulk_create(self, items):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/match-requests/bulk/', {'items': items}, format='json'
+            )
+        return response, len(queries)
+
+    def test_query_count_does_not_depend_on_item_count(self):
+        self.add_services(22)
+        items = [
+            {'provider': service.provider_id, 'service': service.id}
+            for service in Service.objects.order_by('id')
+        ]
+
+        small_response, small_queries = self.bulk_create(items[:2])
+        large_response, large_queries = self.bulk_create(items[2:])
+
+        self.assertEqual(small_response.status_code, 201)
+        self.assertEqual(large_response.status_code, 201)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(MatchRequest.objects.filter(seeker=self.seeker).count(), 22)
+
+    def test_reports_per_item_errors(self):
+        self.add_services(2)
+        first, second = Service.objects.order_by('id')
+
+        response, _ = self.bulk_create([
+            {'provider': first.provider_id, 'service': first.id},
+            {'provider': first.provider_id, 'service': first.id},
+            {'provider': first.provider_id, 'service': second.id},
+            {'provider': self.seeker.id, 'service': second.id},
+            {'provider': 'x'},
+        ])
+
+        self.assertEqual(response.status_code, 207)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['created', 'error', 'error', 'error', 'error'])
+        self.assertEqual(results[0]['match_request']['service'], first.id)
+        self.assertIn('detail', results[1]['errors'])
+        self.assertIn('service', results[2]['errors'])
+        self.assertIn('provider', results[3]['errors'])
+
+
+class ProximityMatchingTest(FindMatchesTestBase):
+    def add_provider_at(self, name, latitude, longitude):
+        provider = User.objects.create(
+            username=name, user_type='provider', latitude=latitude, longitude=longitude
+        )
+        return Service.objects.create(
+            provider=provider,
+            category=self.category,
+            name=name,
+            description='Fixes pipes',
+            price='100.00',
+            availability_type='online'
+        )
+
+    def test_max_distance_filters_and_decays_scores(self):
+        self.seeker.location = ''
+        self.seeker.latitude, self.seeker.longitude = 10.3157, 123.8854
+        self.seeker.save()
+        self.add_provider_at('next-door', 10.3160, 123.8850)
+        self.add_provider_at('across-town', 10.3500, 123.9500)
+        self.add_provider_at('manila', 14.5995, 120.9842)
+
+        response = self.client.post(
+            '/api/match-requests/find_matches/',
+            {'category': 'Plumbing', 'max_distance_km': 20, 'limit': 10},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        scores = {
+            match['service']['name']: match['match_score']
+            for match in response.json()['results']
+        }
+        self.assertEqual(set(scores), {'next-door', 'across-town'})
+        self.assertEqual(scores['next-door'], 74)
+        self.assertLess(scores['across-town'], scores['next-door'])
+
+        provider = User.objects.get(username='across-town')
+        self.assertEqual(
+            scores['across-town'], calculate_match_score(self.seeker, provider, radius_km=20)
+        )
+
+    def test_max_distance_requires_seeker_coordinates(self):
+        response = self.client.post(
+            '/api/match-requests/find_matches/',
+            {'max_distance_km': 5},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class KeywordSearchTest(FindMatchesTestBase):
+    def add_service(self, name, description):
+        provider = User.objects.create(username=name, user_type='provider')
+        return Service.objects.create(
+            provider=provider,
+            category=self.category,
+            name=name,
+            description=description,
+            price='100.00',
+            availability_type='online'
+        )
+
+    def search(self, keyword):
+        response = self.client.post(
+            '/api/match-requests/find_matches/',
+            {'keyword': keyword, 'limit': 10},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_keyword_search_ranks_by_relevance(self):
+        self.add_service('Leak repair', 'Fixing leaking pipes and taps')
+        self.add_service('Bathroom remodel', 'Tiles, showers and the occasional leak')
+        # bm25 needs the term to be rare in the corpus to score above zero
+        for index in range(4):
+            self.add_service(f'Garden care {index}', 'Mowing and hedges')
+
+        results = self.search('leak')
+
+        self.assertEqual(
+            [match['service']['name'] for match in results],
+            ['Leak repair', 'Bathroom remodel']
+        )
+        self.assertGreater(results[0]['match_score'], 50)
+
+    def test_index_follows_updates_and_tolerates_fts_syntax(self):
+        service = self.add_service('Garden care', 'Mowing and hedges')
+        service.description = 'Mowing, hedges and weeding'
+        service.save()
+
+        self.assertEqual(len(self.search('weeding')), 1)
+        self.assertEqual(len(self.search('hedges" NEAR(')), 0)
+        self.assertEqual(len(self.search('"hedges*')), 1)
+        self.assertEqual(self.search('mowing tiles'), [])
+
+
+class ProviderStatsTest(FindMatchesTestBase):
+    def test_stats_follow_requests_and_feed_the_score(self):
+        self.add_services(1)
+        service = Service.objects.get()
+        provider = service.provider
+
+        requests = [
+            MatchRequest.objects.create(
+                seeker=User.objects.create(username=f'seeker-{index}', user_type='seeker'),
+                provider=provider,
+                service=service
+            )
+            for index in range(4)
+        ]
+        for match_request, new_status in zip(requests, ['accepted', 'accepted', 'accepted', 'rejected']):
+            match_request = MatchRequest.objects.get(pk=match_request.pk)
+            match_request.status = new_status
+            match_request.save()
+
+        stats = ProviderStats.objects.get(provider=provider)
+        self.assertEqual(
+            (stats.received_count, stats.accepted_count, stats.rejected_count, stats.response_count),
+            (4, 3, 1, 4)
+        )
+        self.assertEqual(stats.active_service_count, 1)
+
+        matches, _ = self.find_matches()
+        self.assertEqual(matches[0]['match_score'], 57)
+        self.assertEqual(
+            matches[0]['match_score'],
+            calculate_match_score(self.seeker, User.objects.get(pk=provider.pk))
+        )
+
+    def test_rebuild_matches_incremental_counts(self):
+        self.add_services(2)
+        seekers = [User.objects.create(username=f'seeker-{index}', user_type='seeker') for index in range(4)]
+        for service in Service.objects.all():
+            for seeker, statuses in zip(seekers, [[], ['accepted'], ['rejected'], ['accepted', 'completed']]):
+                match_request = MatchRequest.objects.create(seeker=seeker, provider=service.provider, service=service)
+                for new_status in statuses:
+                    match_request = MatchRequest.objects.get(pk=match_request.pk)
+                    match_request.status = new_status
+                    match_request.save()
+        fields = [
+            'provider_id', 'received_count', 'accepted_count', 'rejected_count',
+            'completed_count', 'response_count', 'active_service_count'
+        ]
+        incremental = list(ProviderStats.objects.order_by('pk').values_list(*fields))
+        self.assertEqual(incremental[0][1:], (4, 2, 1, 1, 3, 1))
+
+        ProviderStats.objects.update(received_count=0, accepted_count=0, response_count=0)
+        call_command('rebuild_provider_stats', stdout=StringIO())
+
+        self.assertEqual(incremental, list(ProviderStats.objects.order_by('pk').values_list(*fields)))
+
+
+class BatchScoringTest(FindMatchesTestBase):
+    def test_batch_scores_and_top_k_match_ranked_find_matches(self):
+        self.seeker.latitude, self.seeker.longitude = 10.3157, 123.8854
+        self.seeker.save()
+        self.add_services(6)
+        for index, provider in enumerate(User.objects.filter(user_type='provider')):
+            if index % 3:
+                provider.latitude, provider.longitude = 10.3157 + index * 0.02, 123.8854
+                provider.save()
+        ProviderStats.objects.filter(provider__username='provider-1').update(
+            accepted_count=3, rejected_count=1
+        )
+
+        response = self.client.post(
+            '/api/match-requests/find_matches/',
+            {'category': 'Plumbing', 'limit': 4},
+            format='json'
+        )
+        ranked = [
+            (match['service']['id'], match['match_score'])
+            for match in response.json()['results']
+        ]
+
+        block = CandidateBlock.from_queryset(Service.objects.all())
+        scores = score_block(self.seeker, block)
+        service_ids, top_scores = top_k(block, scores, 4)
+
+        self.assertEqual(list(zip(service_ids.tolist(), top_scores.tolist())), ranked)
+        for service in Service.objects.select_related('provider__stats'):
+            self.assertEqual(
+                scores[block.service_ids.tolist().index(service.pk)],
+                calculate_match_score(self.seeker, service.provider)
+            )
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReplicaRoutingTest(FindMatchesTestBase):
+    def setUp(self):
+        super().setUp()
+        self.add_services(1)
+        self.service = Service.objects.get()
+        self.replica_reads = []
+        # Every replica pick is recorded; 'default' stands in for the replica
+        patcher = mock.patch(
+            'seeker_provider_app.routers.random.choice',
+            side_effect=lambda replicas: self.replica_reads.append(replicas) or replicas[0]
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, method, url, data=None):
+        self.replica_reads.clear()
+        response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 300)
+        return response, len(self.replica_reads)
+
+    def test_reads_use_replicas_until_the_client_writes(self):
+        _, replica_reads = self.request('get', '/api/services/')
+        self.assertGreater(replica_reads, 0)
+
+        # find_matches is a POST that only reads
+        response, replica_reads = self.request(
+            'post', '/api/match-requests/find_matches/', {'category': 'Plumbing'}
+        )
+        self.assertGreater(replica_reads, 0)
+        self.assertNotIn('primary_pin', response.cookies)
+
+        response, replica_reads = self.request('post', '/api/match-requests/', {
+            'provider': self.service.provider_id, 'service': self.service.id
+        })
+        self.assertEqual(replica_reads, 0)
+        self.assertIn('primary_pin', response.cookies)
+
+        # The pin cookie keeps the client's next reads on the primary
+        _, replica_reads = self.request('get', '/api/match-requests/')
+        self.assertEqual(replica_reads, 0)
+
+        self.client.cookies.pop('primary_pin')
+        _, replica_reads = self.request('get', '/api/match-requests/')
+        self.assertGreater(replica_reads, 0)
+
+    def test_bearer_clients_are_pinned_by_user_id(self):
+        pin_cache().clear()
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.seeker)['access']}")
+
+        response, _ = self.request('post', '/api/match-requests/', {
+            'provider': self.service.provider_id, 'service': self.service.id
+        })
+        # Without the cookie the client is still recognized
+        self.client.cookies.pop('primary_pin')
+        _, replica_reads = self.request('get', '/api/match-requests/')
+        self.assertEqual(replica_reads, 0)
+
+        pin_cache().delete(pin_key(self.seeker.pk))
+        _, replica_reads = self.request('get', '/api/match-requests/')
+        self.assertGreater(replica_reads, 0)
+
+    def test_streaming_bodies_are_routed_like_their_request(self):
+        response, _ = self.request('get', '/api/services/?stream=ndjson')
+        self.replica_reads.clear()
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body.splitlines()), 1)
+        self.assertGreater(len(self.replica_reads), 0)
+
+    def test_async_requests_are_routed(self):
+        seen = []
+
+        async def get_response(request):
+            seen.append(_routing.get().pinned)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().post('/'))
+        async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertEqual(seen, [True, False])
+
+    def test_reads_outside_requests_use_the_primary(self):
+        list(Service.objects.all())
+        self.assertEqual(self.replica_reads, [])
+
+
+class MatchRequestTransitionTest(FindMatchesTestBase):
+    def setUp(self):
+        super().setUp()
+        self.add_services(1)
+        service = Service.objects.get()
+        self.provider = service.provider
+        self.match_request = MatchRequest.objects.create(
+            seeker=self.seeker, provider=self.provider, service=service
+        )
+        self.url = f'/api/match-requests/{self.match_request.pk}/'
+
+    def patch(self, new_status):
+        return self.client.patch(self.url, {'status': new_status}, format='json')
+
+    def test_providers_follow_the_state_machine(self):
+        self.assertEqual(self.patch('accepted').status_code, 403)
+
+        self.client.force_authenticate(self.provider)
+        self.assertEqual(self.patch('completed').status_code, 409)
+        self.assertEqual(self.patch('cancelled').status_code, 400)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch('accepted')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'accepted')
+        update = next(query['sql'] for query in queries if query['sql'].startswith('UPDATE "matching_matchrequest"'))
+        self.assertIn('SET "status" = ', update)
+        self.assertNotIn('"seeker_id"', update.split('WHERE')[0])
+
+        response = self.patch('rejected')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'accepted')
+
+        self.assertEqual(self.patch('completed').status_code, 200)
+        stats = ProviderStats.objects.get(provider=self.provider)
+        self.assertEqual(
+            (stats.accepted_count, stats.completed_count, stats.response_count), (1, 1, 1)
+        )
+
+    def test_other_providers_requests_are_not_found(self):
+        self.client.force_authenticate(User.objects.create(username='other', user_type='provider'))
+        self.assertEqual(self.patch('accepted').status_code, 404)
+
+
+class RequestInstrumentationTest(FindMatchesTestBase):
+    def test_responses_carry_server_timing(self):
+        response = self.client.get('/api/match-requests/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries", render;dur=[\d.]+$'
+        )
+
+    def test_metrics_endpoint_exposes_endpoint_histograms(self):
+        self.add_services(2)
+        self.find_matches()
+
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        labels = 'method="POST",endpoint="matchrequest-find-matches"'
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 1', body)
+        self.assertIn(f'http_request_sql_queries_bucket{{{labels},le="+Inf"}} 1', body)
+        self.assertIn(f'http_response_size_bytes_count{{{labels}}} 1', body)
+
+        self.assertEqual(self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token_replaces_the_internal_ips_check(self):
+        self.assertEqual(self.client.get('/metrics/').status_code, 404)
+        self.assertEqual(
+            self.client.get('/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code, 404
+        )
+        response = self.client.get(
+            '/metrics/', REMOTE_ADDR='10.0.0.1', HTTP_AUTHORIZATION='Bearer scrape-secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_streaming_responses_are_recorded_after_their_body(self):
+        self.add_services(3)
+        response = self.client.get('/api/services/?stream=ndjson')
+        labels = ('GET', 'service-list')
+        self.assertNotIn(labels, request_metrics.queries.series)
+
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+        # The validator query, and the service and profile queries of the body
+        bucket_counts, count, total = request_metrics.queries.series[labels]
+        self.assertEqual(count, 1)
+        self.assertGreaterEqual(total, 3)
+
+    def test_async_requests_are_recorded(self):
+        async def get_response(request):
+            await sync_to_async(list)(Service.objects.all())
+            return HttpResponse()
+
+        middleware = RequestMetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = async_to_sync(middleware)(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+        self.assertEqual(request_metrics.queries.series[('GET', 'unmatched')][2], 1)
+
+    def test_find_matches_queries_do_not_grow_with_results(self):
+        for count in (1, 4, 10):
+            self.add_services(count)
+            match_result_cache.clear()
+            self.find_matches()
+
+        self.assertEqual(request_metrics.suspected_n_plus_one(), {})
+        body = self.client.get('/metrics/').content.decode()
+        # The first search also loads the category cache
+        self.assertRegex(
+            body,
+            r'http_request_queries_per_item\{method="POST",endpoint="matchrequest-find-matches"\} -?0'
+        )
+
+    def test_queries_growing_with_results_are_flagged(self):
+        for items in range(1, N_PLUS_ONE_MIN_SAMPLES + 1):
+            self.assertEqual(request_metrics.suspected_n_plus_one(), {})
+            timings = RequestTimings()
+            timings.items, timings.queries = items, items + 2
+            request_metrics.observe('GET', 'n-plus-one', 0.01, timings, 100)
+
+        self.assertEqual(request_metrics.suspected_n_plus_one(), {('GET', 'n-plus-one'): 1.0})
+        self.assertIn(
+            'http_request_n_plus_one_suspected{method="GET",endpoint="n-plus-one"} 1',
+            request_metrics.exposition()
+        )
+
+    def test_requests_without_queries_are_left_out_of_the_growth(self):
+        # A cache hit returning many items next to a search that ran queries
+        for items, queries in ((10, 0), (1, 6)):
+            timings = RequestTimings()
+            timings.items, timings.queries = items, queries
+            request_metrics.observe('POST', 'cached', 0.01, timings, 100)
+
+        self.assertEqual(list(request_metrics.growth[('POST', 'cached')]), [(1, 6)])
+        self.assertEqual(request_metrics.suspected_n_plus_one(), {})
+
+
+class GenerateDatasetTest(TestCase):
+    def test_generates_the_requested_dataset(self):
+        call_command(
+            'generate_dataset', users=40, provider_share=0.25, categories=3, services=60,
+            match_requests=300, status_mix='pending=1,completed=3', locations=5,
+            stdout=StringIO()
+        )
+
+        self.assertEqual(User.objects.filter(user_type='provider').count(), 10)
+        self.assertEqual(User.objects.filter(user_type='seeker').count(), 30)
+        self.assertEqual(ServiceCategory.objects.count(), 3)
+        self.assertEqual(Service.objects.count(), 60)
+        self.assertEqual(
+            set(MatchRequest.objects.values_list('status', flat=True)), {'pending', 'completed'}
+        )
+        self.assertEqual(MatchRequest.objects.count(), 300)
+        for request in MatchRequest.objects.select_related('service'):
+            self.assertEqual(request.provider_id, request.service.provider_id)
+
+        located = User.objects.exclude(latitude=None)
+        self.assertTrue(located.exists())
+        self.assertFalse(located.filter(longitude=None).exists())
+        self.assertEqual(ProviderStats.objects.count(), 10)
+
+        self.assertTrue(self.client.login(username=located.first().username, password='benchmark-password'))
+
+
+class BenchEndpointsTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+
+    def test_benchmark_runs_every_scenario_on_a_tiny_dataset(self):
+        creation = connection.creation
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.object(creation, 'create_test_db', return_value='old') as create, \
+                mock.patch.object(creation, 'destroy_test_db') as destroy:
+            output = os.path.join(directory, 'results.json')
+            call_command(
+                'bench_endpoints', users=20, categories=2, services=10, match_requests=40,
+                requests=3, login_requests=2, output=output, stdout=StringIO()
+            )
+            with open(output) as results_file:
+                scenarios = json.load(results_file)['scenarios']
+
+        create.assert_called_once()
+        destroy.assert_called_once_with('old', verbosity=0)
+        self.assertEqual(set(scenarios), {
+            'login', 'find_matches', 'service_list', 'match_request_create', 'match_request_update'
+        })
+        for name, result in scenarios.items():
+            self.assertEqual(result['failures'], 0, name)
+            self.assertGreater(result['queries_per_request'], 0, name)
+
+    def test_running_out_of_free_pairs_is_an_error(self):
+        creation = connection.creation
+        with mock.patch.object(creation, 'create_test_db', return_value='old'), \
+                mock.patch.object(creation, 'destroy_test_db'), \
+                self.assertRaisesMessage(CommandError, 'Too few seeker/service pairs left'):
+            call_command(
+                'bench_endpoints', users=4, categories=1, services=1, match_requests=4,
+                requests=10, login_requests=1, stdout=StringIO()
+            )
+
+
+class ConcurrentTransitionTest(TransactionTestCase):
+    def test_only_one_concurrent_answer_wins(self):
+        provider = User.objects.create(username='provider', user_type='provider')
+        service = Service.objects.create(
+            provider=provider, category=ServiceCategory.objects.create(name='Plumbing'),
+            name='Leak repair', description='Fix leaks', price='80.00', availability_type='online'
+        )
+        match_request = MatchRequest.objects.create(
+            seeker=User.objects.create(username='seeker', user_type='seeker'),
+            provider=provider, service=service
+        )
+
+        threads = 8
+        barrier = threading.Barrier(threads)
+        outcomes = []
+
+        def answer(new_status):
+            try:
+                barrier.wait()
+                MatchRequestService.transition(provider, match_request.pk, new_status)
+                outcomes.append(new_status)
+            except InvalidTransition:
+                outcomes.append('conflict')
+            finally:
+                connections.close_all()
+
+        workers = [
+            threading.Thread(target=answer, args=('accepted' if index % 2 else 'rejected',))
+            for index in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        winners = [outcome for outcome in outcomes if outcome != 'conflict']
+        self.assertEqual(len(winners), 1)
+        self.assertEqual(outcomes.count('conflict'), threads - 1)
+        self.assertEqual(MatchRequest.objects.get().status, winners[0])
+
+        stats = ProviderStats.objects.get(provider=provider)
+        self.assertEqual(stats.response_count, 1)
+        self.assertEqual(stats.accepted_count + stats.rejected_count, 1)
@@ -1,22 +1,133 @@
 # matching/utils.py
+import math
 
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.db.models.functions import Cast, Floor, Greatest, Least
 
-def calculate_match_score(seeker, service_provider):
+from users.geo import distance_km, distance_km_expression
+
+BASE_SCORE = 50
+LOCATION_MATCH_BONUS = 25
+TEXT_RELEVANCE_BONUS = 25
+REPUTATION_BONUS = 10
+MAX_SCORE = 100
+
+# Distance over which the proximity bonus decays from LOCATION_MATCH_BONUS to
+# zero, unless the seeker asks for a max_distance_km
+PROXIMITY_RADIUS_KM = 25
+
+
+def calculate_match_score(seeker, service_provider, radius_km=PROXIMITY_RADIUS_KM,
+                          text_relevance=0.0):
     """
     Calculate match compatibility score between seeker and provider
 
     :param seeker: User object (seeker)
     :param service_provider: User object (provider)
+    :param radius_km: Distance at which the proximity bonus reaches zero
+    :param text_relevance: Keyword search relevance of the service, in [0, 1)
     :return: Compatibility score (0-100)
     """
-    score = 50  # Base score
+    score = BASE_SCORE  # Base score
+
+    score += calculate_location_bonus(seeker, service_provider, radius_km)
+    score += math.floor(TEXT_RELEVANCE_BONUS * text_relevance)
+
+    # Service history from the precomputed provider stats row
+    score += calculate_reputation_bonus(getattr(service_provider, 'stats', None))
+
+    return min(score, MAX_SCORE)
+
+
+def calculate_location_bonus(seeker, service_provider, radius_km=PROXIMITY_RADIUS_KM):
+    """
+    Location part of the match score: the better of an exact location-name
+    match and a bonus decaying linearly with distance between coordinates
+
+    :return: Bonus points (0 to LOCATION_MATCH_BONUS)
+    """
+    bonus = 0
 
-    # Location proximity (simple example)
     if seeker.location and service_provider.location:
-        # You would replace this with a more sophisticated location matching
         if seeker.location == service_provider.location:
-            score += 25
+            bonus = LOCATION_MATCH_BONUS
+
+    if seeker.has_coordinates and service_provider.has_coordinates:
+        distance = distance_km(
+            seeker.latitude, seeker.longitude,
+            service_provider.latitude, service_provider.longitude
+        )
+        proximity = math.floor(LOCATION_MATCH_BONUS * (1 - distance / radius_km))
+        bonus = max(bonus, proximity, 0)
+
+    return bonus
+
+
+def calculate_reputation_bonus(provider_stats):
+    """
+    Reputation part of the match score, from the provider's acceptance rate
+
+    :param provider_stats: ProviderStats object, or None
+    :return: Bonus points (0 to REPUTATION_BONUS)
+    """
+    if provider_stats is None or provider_stats.acceptance_rate is None:
+        return 0
+    return math.floor(REPUTATION_BONUS * provider_stats.acceptance_rate)
+
+
+def match_score_expression(seeker, radius_km=PROXIMITY_RADIUS_KM, keyword_search=False):
+    """
+    Build the match score as a database expression for a ``Service`` queryset
+
+    Mirrors ``calculate_match_score`` so scores can be annotated, filtered
+    and ordered in SQL instead of being computed per row in Python.
+
+    :param seeker: User object (seeker)
+    :param radius_km: Distance at which the proximity bonus reaches zero
+    :param keyword_search: Whether the queryset carries a ``text_relevance``
+        annotation from ``services.search.search_services``
+    :return: Integer expression to annotate on a Service queryset
+    """
+    bonus = Value(0)
+
+    if seeker.location:
+        bonus = Case(
+            When(provider__location=seeker.location, then=Value(LOCATION_MATCH_BONUS)),
+            default=Value(0),
+        )
+
+    if seeker.has_coordinates:
+        distance = distance_km_expression(seeker.latitude, seeker.longitude, 'provider__')
+        proximity = Case(
+            When(
+                provider__latitude__isnull=False,
+                provider__longitude__isnull=False,
+                then=Greatest(
+                    Floor(Value(float(LOCATION_MATCH_BONUS)) * (Value(1.0) - distance / Value(float(radius_km)))),
+                    Value(0.0)
+                )
+            ),
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        bonus = Greatest(bonus, proximity, output_field=FloatField())
+
+    if keyword_search:
+        bonus = bonus + Floor(Value(float(TEXT_RELEVANCE_BONUS)) * F('text_relevance'))
 
-    # Service history and reviews could be added here in future iterations
+    # One joined ProviderStats row per provider instead of aggregating history
+    accepted = Cast(F('provider__stats__accepted_count'), FloatField())
+    rejected = Cast(F('provider__stats__rejected_count'), FloatField())
+    bonus = bonus + Case(
+        When(
+            provider__stats__accepted_count__gt=0,
+            then=Floor(Value(float(REPUTATION_BONUS)) * accepted / (accepted + rejected))
+        ),
+        default=Value(0.0),
+        output_field=FloatField()
+    )
 
-    return min(score, 100)
+    return Cast(
+        Least(Value(BASE_SCORE) + bonus, Value(MAX_SCORE), output_field=FloatField()),
+        IntegerField()
+    )
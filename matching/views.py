@@ -1,15 +1,18 @@
 # matching/views.py
+from django.db import IntegrityError
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 
 from matching.models import MatchRequest
+from matching.projections import (
+    MATCH_REQUEST_VALUES, project_match_request_rows, project_match_requests
+)
 from matching.serializers import MatchRequestSerializer
-from matching.services import MatchingService
-from matching.utils import calculate_match_score
-
-from services.serializers import ServiceSerializer
+from matching.services import InvalidTransition, MatchingService, MatchRequestService
+from seeker_provider_app.routers import replica_reads
+from seeker_provider_app.streaming import parse_stream_format, streaming_response
 
 
 class MatchRequestViewSet(viewsets.ModelViewSet):
@@ -28,6 +31,40 @@ class MatchRequestViewSet(viewsets.ModelViewSet):
             return MatchRequest.objects.filter(provider=user)
         return MatchRequest.objects.none()
 
+    def list(self, request, *args, **kwargs):
+        """
+        List match requests through the read-only projection
+
+        Pass ``?stream=json`` or ``?stream=ndjson`` to stream the listing instead.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        stream_format = parse_stream_format(request.query_params.get('stream'))
+        if stream_format:
+            return self.stream(queryset, stream_format)
+
+        return Response(project_match_requests(queryset))
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request):
+        """
+        Download the user's match requests as a streamed file (NDJSON unless
+        ``?stream=json``)
+        """
+        stream_format = parse_stream_format(request.query_params.get('stream'), default='ndjson')
+        return self.stream(
+            self.filter_queryset(self.get_queryset()), stream_format, filename='match-requests'
+        )
+
+    @staticmethod
+    def stream(queryset, stream_format, filename=None):
+        return streaming_response(
+            queryset.order_by('id').values(*MATCH_REQUEST_VALUES),
+            project_match_request_rows,
+            stream_format,
+            filename=filename
+        )
+
     def create(self, request):
         """
         Robust match request creation with comprehensive error handling
@@ -64,83 +101,127 @@ class MatchRequestViewSet(viewsets.ModelViewSet):
                 'details': str(unexpected_error)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    @action(detail=False, methods=['POST'])
-    def find_matches(self, request):
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    def bulk_create(self, request):
         """
-        Find potential matches based on seeker preferences
-        """
-        seeker_preferences = request.data
-        matching_services = MatchingService.find_matching_services(seeker_preferences)
+        Create many match requests in one call with per-item results
 
-        matches = []
+        Accepts ``{"items": [{"provider": <id>, "service": <id>}, ...]}``.
+        """
+        items = request.data.get('items') if isinstance(request.data, dict) else None
 
-        for service in matching_services:
-            match_score = calculate_match_score(request.user, service.provider)
-            matches.append({
-                'service': ServiceSerializer(service).data,
-                'match_score': match_score
-            })
+        if not isinstance(items, list) or not items:
+            return Response({
+                'error': 'items must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(matches)
+        if len(items) > MatchRequestService.MAX_BULK_ITEMS:
+            return Response({
+                'error': f'At most {MatchRequestService.MAX_BULK_ITEMS} items per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    def partial_update(self, request, pk=None):
-        """
-        Handle PATCH requests to update match request status
-        """
         try:
-            # Retrieve the match request
-            match_request = self.get_object()
+            results = MatchRequestService.bulk_create(request.user, items)
+        except IntegrityError:
+            # A concurrent request created one of the same pending requests
+            return Response({
+                'error': 'Pending requests were created concurrently, please retry'
+            }, status=status.HTTP_409_CONFLICT)
+
+        created = [result for result in results if result['status'] == 'created']
+        serialized = iter(self.get_serializer(
+            [result.pop('match_request') for result in created], many=True
+        ).data)
+        for result in created:
+            result['match_request'] = next(serialized)
+
+        if len(created) == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+
+        return Response({'results': results}, status=response_status)
+
+    @action(detail=False, methods=['GET'])
+    def inbox(self, request):
+        """
+        Page through the provider's match requests, newest first
 
-            # Validate status is provided in request
-            status_update = request.data.get('status')
+        Filter with ``status`` (comma-separated) and page with ``limit``
+        (1-100, default 20) and the ``next_cursor`` of the previous page.
+        """
+        if request.user.user_type != 'provider':
+            return Response({
+                'error': 'Only providers have an inbox'
+            }, status=status.HTTP_403_FORBIDDEN)
 
-            if not status_update:
-                return Response({
-                    'error': 'Status is required for update'
-                }, status=status.HTTP_400_BAD_REQUEST)
+        statuses = MatchRequestService.parse_statuses(request.query_params.get('status'))
+        return Response(MatchRequestService.inbox(
+            request.user,
+            statuses=statuses,
+            limit=request.query_params.get('limit'),
+            cursor=request.query_params.get('cursor')
+        ))
 
-            # Validate status transition based on user type
-            user = request.user
+    @action(detail=False, methods=['POST'])
+    @replica_reads
+    def find_matches(self, request):
+        """
+        Find potential matches based on seeker preferences
 
-            if user.user_type == 'seeker':
-                # Seekers cannot modify status
-                raise PermissionDenied('Seekers cannot update match request status')
+        Passing ``limit`` and/or ``cursor`` switches to ranked mode: a single
+        score-ordered page plus a ``next_cursor`` for the following page.
+        """
+        return Response(MatchingService.search_matches(request.user, request.data))
 
-            elif user.user_type == 'provider':
-                # Providers can only update status from 'pending'
-                if match_request.status != 'pending':
-                    return Response({
-                        'error': 'Can only update status from pending state'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+    def partial_update(self, request, pk=None):
+        """
+        Handle PATCH requests to update match request status
 
-                # Allowed status transitions for providers
-                allowed_statuses = ['accepted', 'rejected']
+        Providers move their requests through ``MatchRequest.TRANSITIONS``
+        (pending -> accepted/rejected, accepted -> completed); a change that
+        the current status no longer allows, e.g. the loser of two concurrent
+        answers, gets 409 Conflict.
+        """
+        # Validate status is provided in request
+        status_update = request.data.get('status')
 
-                if status_update not in allowed_statuses:
-                    return Response({
-                        'error': f'Invalid status. Allowed: {allowed_statuses}'
-                    }, status=status.HTTP_400_BAD_REQUEST)
+        if not status_update:
+            return Response({
+                'error': 'Status is required for update'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Update the status
-            match_request.status = status_update
-            match_request.save()
+        if request.user.user_type != 'provider':
+            # Seekers cannot modify status
+            return Response({
+                'error': 'Seekers cannot update match request status'
+            }, status=status.HTTP_403_FORBIDDEN)
 
-            # Serialize and return updated match request
-            serializer = self.get_serializer(match_request)
-            return Response(serializer.data)
+        try:
+            match_request = MatchRequestService.transition(request.user, pk, status_update)
 
-        except MatchRequest.DoesNotExist:
+        except (MatchRequest.DoesNotExist, ValueError):
             return Response({
                 'error': 'Match request not found'
             }, status=status.HTTP_404_NOT_FOUND)
 
-        except PermissionDenied as e:
+        except InvalidTransition as e:
             return Response({
-                'error': str(e)
-            }, status=status.HTTP_403_FORBIDDEN)
+                'error': str(e),
+                'status': e.current_status
+            }, status=status.HTTP_409_CONFLICT)
+
+        except ValidationError:
+            raise
 
         except Exception as unexpected_error:
             return Response({
                 'error': 'Unexpected error during match request update',
                 'details': str(unexpected_error)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # Serialize and return updated match request
+        serializer = self.get_serializer(match_request)
+        return Response(serializer.data)
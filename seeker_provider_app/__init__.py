@@ -0,0 +1,7 @@
+from django.db.backends.signals import connection_created
+
+from .sqlite import apply_pragmas
+
+# The project package is not an installed app, so the hook is connected here,
+# which runs whenever the settings module is imported
+connection_created.connect(apply_pragmas, dispatch_uid='seeker_provider_app.sqlite.apply_pragmas')
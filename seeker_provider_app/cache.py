@@ -0,0 +1,126 @@
+# seeker_provider_app/cache.py
+from django.conf import settings
+from django.core.cache import caches
+
+
+class VersionedCache:
+    """
+    Namespaced cache whose entries can all be dropped by bumping a version
+
+    Entries live in the Django cache named by ``settings.LOOKUP_CACHE_ALIAS``,
+    so the backend decides whether they are per-process (LocMemCache) or
+    shared between workers (FileBasedCache, Memcached, ...). The ``a``-prefixed
+    methods go through the backend's async API, for use in async views.
+    """
+
+    def __init__(self, namespace, timeout=None):
+        self.namespace = namespace
+        self.timeout = timeout
+        self.version_key = f'{namespace}:version'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'LOOKUP_CACHE_ALIAS', 'default')]
+
+    def make_key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, 1, timeout=None)
+            version = self.cache.get(self.version_key, 1)
+        return version
+
+    def get(self, key, default=None):
+        return self.cache.get(self.make_key(key), default, version=self.version())
+
+    def set(self, key, value):
+        self.cache.set(self.make_key(key), value, timeout=self.timeout, version=self.version())
+
+    def get_or_set(self, key, default):
+        """
+        Return the cached value for ``key``, computing it with ``default()`` on a miss
+        """
+        version = self.version()
+        value = self.cache.get(self.make_key(key), version=version)
+        if value is None:
+            value = default()
+            self.cache.set(self.make_key(key), value, timeout=self.timeout, version=version)
+        return value
+
+    def get_many(self, keys):
+        """
+        :return: Dict mapping each cached key (as given) to its value
+        """
+        version = self.version()
+        found = self.cache.get_many([self.make_key(key) for key in keys], version=version)
+        return {
+            key: found[self.make_key(key)]
+            for key in keys
+            if self.make_key(key) in found
+        }
+
+    def set_many(self, mapping):
+        self.cache.set_many(
+            {self.make_key(key): value for key, value in mapping.items()},
+            timeout=self.timeout,
+            version=self.version()
+        )
+
+    async def aversion(self):
+        version = await self.cache.aget(self.version_key)
+        if version is None:
+            await self.cache.aadd(self.version_key, 1, timeout=None)
+            version = await self.cache.aget(self.version_key, 1)
+        return version
+
+    async def aget(self, key, default=None):
+        return await self.cache.aget(self.make_key(key), default, version=await self.aversion())
+
+    async def aset(self, key, value):
+        await self.cache.aset(
+            self.make_key(key), value, timeout=self.timeout, version=await self.aversion()
+        )
+
+    async def aget_or_set(self, key, default):
+        """
+        Async variant of ``get_or_set``; ``default`` is a coroutine function
+        """
+        version = await self.aversion()
+        value = await self.cache.aget(self.make_key(key), version=version)
+        if value is None:
+            value = await default()
+            await self.cache.aset(self.make_key(key), value, timeout=self.timeout, version=version)
+        return value
+
+    async def aget_many(self, keys):
+        """
+        :return: Dict mapping each cached key (as given) to its value
+        """
+        version = await self.aversion()
+        found = await self.cache.aget_many([self.make_key(key) for key in keys], version=version)
+        return {
+            key: found[self.make_key(key)]
+            for key in keys
+            if self.make_key(key) in found
+        }
+
+    async def aset_many(self, mapping):
+        await self.cache.aset_many(
+            {self.make_key(key): value for key, value in mapping.items()},
+            timeout=self.timeout,
+            version=await self.aversion()
+        )
+
+    def delete(self, key):
+        self.cache.delete(self.make_key(key), version=self.version())
+
+    def invalidate(self):
+        """
+        Drop every entry in the namespace by moving to a new version
+        """
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.set(self.version_key, 2, timeout=None)
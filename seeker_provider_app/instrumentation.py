@@ -0,0 +1,362 @@
+# seeker_provider_app/instrumentation.py
+"""
+Per-request performance instrumentation
+
+``RequestMetricsMiddleware`` times every request, and a database execute
+wrapper counts the SQL queries it runs and the time spent in them.
+``TimedJSONRenderer`` times the JSON encoding of DRF responses ("render");
+serializers and ``values()`` projections run in the view and count towards
+the wall time only. Each response gets a ``Server-Timing`` header, and
+per-endpoint histograms of wall time, query count, SQL time, render time and
+response size are served in the Prometheus text format by ``metrics_view``
+(``/metrics/``). Streaming responses are recorded once their body has been
+sent, so the queries run while streaming are included.
+
+Endpoints whose query count grows with the number of items they return
+(N+1 queries) are flagged: the slope of queries against result size over
+recent requests that ran queries is exported (requests served from a cache
+run none and say nothing about how queries scale), and a warning is logged
+when it first crosses ``N_PLUS_ONE_SLOPE`` over at least
+``N_PLUS_ONE_MIN_SAMPLES`` requests.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.renderers import JSONRenderer
+
+from .streaming import run_body_in_context
+
+logger = logging.getLogger(__name__)
+
+# Timings of the request being handled; None outside requests
+_timings = ContextVar('request_timings', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Requests per endpoint kept for N+1 detection
+GROWTH_SAMPLES = 200
+# Extra queries per extra returned item above which an endpoint is flagged
+N_PLUS_ONE_SLOPE = 0.5
+# Samples needed before flagging, so cold caches on the first requests don't
+N_PLUS_ONE_MIN_SAMPLES = 10
+
+
+class RequestTimings:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.render_seconds = 0.0
+        # Number of items in the rendered list, when the response is one
+        self.items = None
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request's timings
+    """
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_seconds += time.perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    # Covers connections opened in other threads, e.g. by sync_to_async
+    install_query_recorder(connection)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set, in the Prometheus layout
+    """
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * len(self.buckets), 0, 0.0]
+        bucket_counts = series[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                bucket_counts[index] += 1
+        series[1] += 1
+        series[2] += value
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels, (bucket_counts, count, total) in sorted(self.series.items()):
+            label_text = format_labels(labels)
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total:.6g}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+def format_labels(labels):
+    method, endpoint = labels
+    endpoint = endpoint.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'method="{method}",endpoint="{endpoint}"'
+
+
+def query_growth_slope(samples):
+    """
+    Least-squares slope of query count against result size
+
+    :param samples: Iterable of (items, queries) pairs
+    :return: Extra queries per extra item, or None with fewer than two sizes
+    """
+    samples = list(samples)
+    if len({items for items, _ in samples}) < 2:
+        return None
+
+    mean_items = sum(items for items, _ in samples) / len(samples)
+    mean_queries = sum(queries for _, queries in samples) / len(samples)
+    covariance = sum((items - mean_items) * (queries - mean_queries) for items, queries in samples)
+    variance = sum((items - mean_items) ** 2 for items, _ in samples)
+    return covariance / variance
+
+
+class RequestMetrics:
+    """
+    Process-wide registry of per-endpoint request metrics
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.duration = Histogram(
+            'http_request_duration_seconds', 'Wall time of the request', DURATION_BUCKETS
+        )
+        self.queries = Histogram(
+            'http_request_sql_queries', 'SQL queries run by the request', QUERY_BUCKETS
+        )
+        self.sql_duration = Histogram(
+            'http_request_sql_duration_seconds', 'Time spent in SQL queries', DURATION_BUCKETS
+        )
+        self.render_duration = Histogram(
+            'http_request_render_duration_seconds',
+            'Time spent encoding the response body as JSON', DURATION_BUCKETS
+        )
+        self.response_size = Histogram(
+            'http_response_size_bytes', 'Size of non-streaming response bodies', SIZE_BUCKETS
+        )
+        self.growth = defaultdict(lambda: deque(maxlen=GROWTH_SAMPLES))
+        self.flagged = set()
+
+    def observe(self, method, endpoint, seconds, timings, size):
+        labels = (method, endpoint)
+        with self.lock:
+            self.duration.observe(labels, seconds)
+            self.queries.observe(labels, timings.queries)
+            self.sql_duration.observe(labels, timings.sql_seconds)
+            self.render_duration.observe(labels, timings.render_seconds)
+            if size is not None:
+                self.response_size.observe(labels, size)
+
+            if timings.items is None or not timings.queries:
+                return
+            samples = self.growth[labels]
+            samples.append((timings.items, timings.queries))
+            slope = query_growth_slope(samples)
+            newly_flagged = (
+                slope is not None and slope >= N_PLUS_ONE_SLOPE
+                and len(samples) >= N_PLUS_ONE_MIN_SAMPLES and labels not in self.flagged
+            )
+            if newly_flagged:
+                self.flagged.add(labels)
+
+        if newly_flagged:
+            logger.warning(
+                'Possible N+1 queries in %s %s: %.2f queries per returned item',
+                method, endpoint, slope
+            )
+
+    def suspected_n_plus_one(self):
+        """
+        :return: Dict mapping (method, endpoint) to queries per item, for flagged endpoints
+        """
+        with self.lock:
+            return {
+                labels: query_growth_slope(self.growth[labels]) for labels in self.flagged
+            }
+
+    def exposition(self):
+        with self.lock:
+            lines = []
+            for histogram in (
+                self.duration, self.queries, self.sql_duration,
+                self.render_duration, self.response_size
+            ):
+                lines.extend(histogram.exposition())
+
+            lines.append(
+                '# HELP http_request_queries_per_item Slope of SQL queries against '
+                'returned items over recent requests'
+            )
+            lines.append('# TYPE http_request_queries_per_item gauge')
+            for labels, samples in sorted(self.growth.items()):
+                slope = query_growth_slope(samples)
+                if slope is not None:
+                    lines.append(
+                        f'http_request_queries_per_item{{{format_labels(labels)}}} {slope:.6g}'
+                    )
+
+            lines.append(
+                '# HELP http_request_n_plus_one_suspected Queries grow with the number '
+                'of returned items'
+            )
+            lines.append('# TYPE http_request_n_plus_one_suspected gauge')
+            for labels in sorted(self.flagged):
+                lines.append(f'http_request_n_plus_one_suspected{{{format_labels(labels)}}} 1')
+
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-endpoint timings and add a ``Server-Timing`` header
+
+    Goes first in MIDDLEWARE so the time and queries of the other middleware
+    (sessions, authentication) are included. ``Server-Timing`` of a streaming
+    response only covers the view, as it is sent before the body.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(_on_connection_created, dispatch_uid=__name__)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        for connection in connections.all():
+            install_query_recorder(connection)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        for connection in connections.all():
+            install_query_recorder(connection)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        return self.finish(request, response, timings, started)
+
+    def finish(self, request, response, timings, started):
+        seconds = time.perf_counter() - started
+        response['Server-Timing'] = ', '.join((
+            f'app;dur={seconds * 1000:.1f}',
+            f'db;dur={timings.sql_seconds * 1000:.1f};desc="{timings.queries} queries"',
+            f'render;dur={timings.render_seconds * 1000:.1f}',
+        ))
+
+        match = request.resolver_match
+        endpoint = match.view_name if match is not None else 'unmatched'
+        if not response.streaming:
+            request_metrics.observe(request.method, endpoint, seconds, timings, len(response.content))
+            return response
+
+        def body_sent():
+            request_metrics.observe(
+                request.method, endpoint, time.perf_counter() - started, timings, None
+            )
+
+        run_body_in_context(response, _timings, timings, finished=body_sent)
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer recording its time and the number of items rendered
+
+    Only the encoding of the already serialized data is timed.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = _timings.get()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render_seconds += time.perf_counter() - started
+            if isinstance(data, list):
+                timings.items = len(data)
+            elif isinstance(data, dict) and isinstance(data.get('results'), list):
+                timings.items = len(data['results'])
+
+
+def metrics_view(request):
+    """
+    Serve the request metrics in the Prometheus text format
+
+    With ``settings.METRICS_TOKEN`` set, scrapers must send it as
+    ``Authorization: Bearer <token>``. Otherwise only INTERNAL_IPS are
+    served, which relies on REMOTE_ADDR being the client: behind a reverse
+    proxy it is the proxy's address, so set a token there.
+    """
+    metrics_token = getattr(settings, 'METRICS_TOKEN', None)
+    if metrics_token:
+        keyword, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+        allowed = keyword.lower() == 'bearer' and constant_time_compare(token.strip(), metrics_token)
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+    if not allowed:
+        raise Http404
+    return HttpResponse(
+        request_metrics.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
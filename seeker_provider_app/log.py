@@ -0,0 +1,36 @@
+# seeker_provider_app/log.py
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueuedFileHandler(QueueHandler):
+    """
+    File handler whose writes happen on a background thread
+
+    Records are put on an in-memory queue, so the request that logs never
+    blocks on disk I/O; a ``QueueListener`` thread writes them to the file.
+
+    :param filename: Log file path
+    :param kwargs: Passed on to ``logging.FileHandler``
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = logging.FileHandler(filename, **kwargs)
+        self.listener = QueueListener(self.queue, self.file_handler, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread's handler
+        self.file_handler.setFormatter(fmt)
+
+    def close(self):
+        if self.listener is not None:
+            # Writes out the queued records first
+            self.listener.stop()
+            self.listener = None
+            self.file_handler.close()
+        super().close()
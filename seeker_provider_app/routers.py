@@ -0,0 +1,176 @@
+# seeker_provider_app/routers.py
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+
+from .streaming import run_body_in_context
+
+# Routing state of the request being handled; None outside requests (shell,
+# management commands), where every query goes to the primary
+_routing = ContextVar('replica_routing', default=None)
+
+PIN_COOKIE = 'primary_pin'
+
+
+class RoutingState:
+    def __init__(self, pinned, recently_wrote):
+        # Pinned requests read from the primary
+        self.pinned = pinned
+        self.recently_wrote = recently_wrote
+        self.wrote = False
+
+
+def pin_key(user_id):
+    return f'primary-pin:{user_id}'
+
+
+def pin_cache():
+    return caches[getattr(settings, 'LOOKUP_CACHE_ALIAS', 'default')]
+
+
+def bearer_user_id(request):
+    """
+    :return: Id of the user of the request's bearer token, or None
+    """
+    from users.tokens import InvalidToken, user_from_access_token
+
+    keyword, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if keyword.lower() != 'bearer' or not token:
+        return None
+    try:
+        return user_from_access_token(token.strip()).pk
+    except InvalidToken:
+        return None
+
+
+def replica_reads(view):
+    """
+    Mark a view (or viewset action) whose unsafe-method requests only read,
+    so they can still be served from a replica (e.g. POST find_matches)
+    """
+    view.replica_reads = True
+    return view
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary and reads to a random replica
+
+    Reads stay on the primary outside requests, during requests that write
+    (from their first write on, and for the whole request when the method is
+    unsafe) and, for ``REPLICA_PIN_SECONDS``, for the next requests of a
+    client that just wrote, so users always read their own writes. Clients
+    are recognized by a cookie and, for bearer tokens (which clients often
+    send without cookies), by their user id in the lookup cache.
+    Replicas are the aliases in ``settings.DATABASE_REPLICAS``.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        state = _routing.get()
+        if not replicas or state is None or state.pinned:
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaPinningMiddleware:
+    """
+    Set up per-request routing state for PrimaryReplicaRouter
+
+    Must come before any middleware that queries the database. Streaming
+    bodies are produced with the request's routing state.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        user_id = bearer_user_id(request)
+        recently_wrote = PIN_COOKIE in request.COOKIES or (
+            user_id is not None and pin_cache().get(pin_key(user_id)) is not None
+        )
+        state = RoutingState(recently_wrote or request.method not in SAFE_METHODS, recently_wrote)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if state.wrote and user_id is not None:
+            pin_cache().set(pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        user_id = bearer_user_id(request)
+        recently_wrote = PIN_COOKIE in request.COOKIES or (
+            user_id is not None and await pin_cache().aget(pin_key(user_id)) is not None
+        )
+        state = RoutingState(recently_wrote or request.method not in SAFE_METHODS, recently_wrote)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+
+        if state.wrote and user_id is not None:
+            await pin_cache().aset(pin_key(user_id), 1, timeout=settings.REPLICA_PIN_SECONDS)
+        return self.finish(response, state)
+
+    @staticmethod
+    def finish(response, state):
+        if state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        if response.streaming:
+            run_body_in_context(response, _routing, state)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _routing.get()
+        if state is None or state.wrote or state.recently_wrote:
+            return None
+        if not self.reads_only(request, view_func):
+            return None
+        state.pinned = False
+        return None
+
+    @staticmethod
+    def reads_only(request, view_func):
+        if getattr(view_func, 'replica_reads', False):
+            return True
+
+        # DRF viewsets: look at the action the method is routed to
+        actions = getattr(view_func, 'actions', None) or {}
+        handler = getattr(getattr(view_func, 'cls', None), actions.get(request.method.lower(), ''), None)
+        return getattr(handler, 'replica_reads', False)
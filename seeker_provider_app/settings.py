@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,13 +46,27 @@ INSTALLED_APPS = [
     'users',
     'services',
     'matching',
+    'tasks',
 ]
 
+# Clients allowed to read the request metrics at /metrics/ when no
+# METRICS_TOKEN is set. Matched against REMOTE_ADDR, which behind a reverse
+# proxy is the proxy: set METRICS_TOKEN (sent by scrapers as a bearer token)
+# there instead.
+INTERNAL_IPS = ['127.0.0.1', '::1']
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
 AUTH_USER_MODEL = 'users.User'
+# Session requests load a cached slim user instead of the full row
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
 CORS_ORIGIN_ALLOW_ALL = True
 
 MIDDLEWARE = [
+    # First, so the other middleware's time and queries are included
+    'seeker_provider_app.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before anything that queries, so reads are routed per request
+    'seeker_provider_app.routers.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +78,13 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'seeker_provider_app.urls'
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        # JSONRenderer that reports its time to the request metrics
+        'seeker_provider_app.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
@@ -98,9 +119,90 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than SQLite's shared-cache in-memory database, whose
+        # table locks fail immediately instead of waiting like real ones
+        # (the concurrency tests rely on normal locking)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Read replicas: DATABASE_REPLICAS is a comma-separated list of SQLite files
+# holding copies of the primary (refresh them locally with
+# `python manage.py sync_replicas`). Reads are spread over them while writes,
+# and reads of clients that wrote in the last REPLICA_PIN_SECONDS, go to the
+# primary. Clients are recognized by a cookie or, for bearer tokens, by user
+# id in the 'lookups' cache, which must be shared for the pin to hold when
+# the next request reaches another worker.
+
+DATABASE_REPLICAS = []
+for _index, _path in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(','))):
+    DATABASES[f'replica_{_index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _path.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+DATABASE_ROUTERS = ['seeker_provider_app.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+# Production SQLite profile, enabled with SQLITE_PRODUCTION=1: WAL journaling
+# so readers never block the writer, IMMEDIATE transactions so writers queue
+# on busy_timeout instead of failing to upgrade their lock, and persistent,
+# health-checked connections. PRAGMAS are applied on every new connection by
+# seeker_provider_app.sqlite.apply_pragmas.
+
+SQLITE_PRODUCTION_PROFILE = {
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'transaction_mode': 'IMMEDIATE',
+    },
+    'PRAGMAS': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'busy_timeout': 5000,
+    },
+}
+
+if os.environ.get('SQLITE_PRODUCTION') == '1':
+    for _database in DATABASES.values():
+        _database.update(SQLITE_PRODUCTION_PROFILE)
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# 'lookups' holds the category, provider profile and session principal
+# caches. LocMemCache keeps them per process, so signal-driven invalidation
+# only reaches the worker that saved the change: other workers serve their
+# copy until it expires (60 s for principals, so a deactivated user or a
+# changed password can keep a session alive that long elsewhere). Point it at
+# a shared backend (Memcached, Redis, or FileBasedCache on one host) when
+# changes must apply everywhere immediately.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'lookups': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lookups',
+        'TIMEOUT': 3600,
+    },
+}
+
+LOOKUP_CACHE_ALIAS = 'lookups'
+
+# Per-process LRU cache of find_matches responses (MAX_ENTRIES = 0 disables it).
+# Signals evict entries in the process that saved a change only; other
+# workers keep theirs for up to TTL seconds.
+MATCH_RESULT_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'TTL': 60,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -143,6 +245,15 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Lifetimes (seconds) of the signed tokens from /api/auth/token/
+ACCESS_TOKEN_LIFETIME = 15 * 60
+REFRESH_TOKEN_LIFETIME = 7 * 24 * 60 * 60
+
+# Background tasks (tasks.queue) are stored in the database and run by
+# `manage.py run_tasks`; when eager they run inline as they are enqueued
+TASKS_EAGER = os.environ.get('TASKS_EAGER') == '1'
+TEST_RUNNER = 'seeker_provider_app.test_runner.EagerTasksTestRunner'
+
 CSRF_COOKIE_HTTPONLY = False  # Allow JavaScript to access CSRF cookie
 CSRF_USE_SESSIONS = False
 
@@ -153,15 +264,18 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        # Written from a background thread, so logging never blocks a request
         'file': {
-            'class': 'logging.FileHandler',
+            'class': 'seeker_provider_app.log.QueuedFileHandler',
             'filename': 'authentication.log',
+            'delay': True,
         },
     },
     'loggers': {
+        # Failed and inactive login attempts
         'users.views': {
             'handlers': ['console', 'file'],
-            'level': 'DEBUG',
+            'level': 'WARNING',
             'propagate': True,
         },
     },
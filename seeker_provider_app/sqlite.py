@@ -0,0 +1,18 @@
+# seeker_provider_app/sqlite.py
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    ``connection_created`` hook running the ``PRAGMAS`` of a SQLite database
+
+    PRAGMAs such as ``synchronous`` and ``busy_timeout`` are per connection,
+    so they are applied every time Django opens one. Databases opt in by
+    listing them under ``PRAGMAS`` in their ``DATABASES`` entry.
+    """
+    pragmas = connection.settings_dict.get('PRAGMAS')
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,148 @@
+# seeker_provider_app/streaming.py
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+
+STREAM_CHUNK_SIZE = 2000
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def parse_stream_format(value, default=None):
+    """
+    Validate a requested stream format
+
+    :param value: Raw ``stream`` query parameter (may be None)
+    :param default: Format to use when none is requested
+    :return: 'json', 'ndjson', or ``default``
+    """
+    if value in (None, ''):
+        return default
+    if value not in STREAM_FORMATS:
+        raise serializers.ValidationError({
+            'stream': f'Stream format must be one of {sorted(STREAM_FORMATS)}'
+        })
+    return value
+
+
+def iter_chunks(rows, chunk_size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, chunk_size)):
+        yield chunk
+
+
+def stream_json(rows, project_chunk, stream_format, chunk_size):
+    """
+    Encode rows as a JSON array or NDJSON, one chunk at a time
+
+    :param rows: Iterable of rows, typically ``queryset.values().iterator()``
+    :param project_chunk: Callable turning a list of rows into a list of
+        JSON-serializable dicts
+    :param stream_format: 'json' or 'ndjson'
+    :param chunk_size: Rows per encoded chunk
+    :return: Generator of encoded byte strings
+    """
+    separator = '\n' if stream_format == 'ndjson' else ','
+    first = True
+
+    if stream_format == 'json':
+        # Sent before the query runs, so clients get first bytes immediately
+        yield b'['
+
+    for chunk in iter_chunks(rows, chunk_size):
+        encoded = separator.join(json.dumps(item) for item in project_chunk(chunk))
+        if stream_format == 'ndjson':
+            encoded += '\n'
+        elif not first:
+            encoded = ',' + encoded
+        first = False
+        yield encoded.encode()
+
+    if stream_format == 'json':
+        yield b']'
+
+
+def streaming_response(queryset, project_chunk, stream_format, filename=None, chunk_size=None):
+    """
+    Stream a ``values()`` queryset without loading it into memory
+
+    Rows are fetched with ``QuerySet.iterator(chunk_size=...)`` and each
+    chunk is projected and encoded before the next one is read, so memory
+    stays flat however many rows there are.
+
+    :param queryset: ``values()`` queryset to stream
+    :param project_chunk: Callable turning a list of rows into a list of dicts
+    :param stream_format: 'json' or 'ndjson'
+    :param filename: Optional file name to offer the download as
+    :param chunk_size: Rows per fetch and per encoded chunk
+    :return: StreamingHttpResponse
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    response = StreamingHttpResponse(
+        stream_json(queryset.iterator(chunk_size=chunk_size), project_chunk, stream_format, chunk_size),
+        content_type=STREAM_FORMATS[stream_format]
+    )
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{stream_format}"'
+    return response
+
+
+def run_body_in_context(response, variable, value, finished=None):
+    """
+    Produce a streaming response's body with a context variable set
+
+    Middleware resets its context variables when the view returns, which is
+    before a streaming body runs. The variable is set around each chunk
+    only, so nothing leaks into code running between chunks.
+
+    :param response: StreamingHttpResponse (sync or async body)
+    :param variable: ContextVar to set
+    :param value: Value it holds while a chunk is produced
+    :param finished: Optional callable run once the body is exhausted or closed
+    """
+    if response.is_async:
+        response.streaming_content = _aiter_in_context(
+            response.streaming_content, variable, value, finished
+        )
+    else:
+        response.streaming_content = _iter_in_context(
+            response.streaming_content, variable, value, finished
+        )
+
+
+def _iter_in_context(content, variable, value, finished):
+    content = iter(content)
+    try:
+        while True:
+            token = variable.set(value)
+            try:
+                chunk = next(content, None)
+            finally:
+                variable.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if finished is not None:
+            finished()
+
+
+async def _aiter_in_context(content, variable, value, finished):
+    content = aiter(content)
+    try:
+        while True:
+            token = variable.set(value)
+            try:
+                chunk = await anext(content, None)
+            finally:
+                variable.reset(token)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if finished is not None:
+            finished()
@@ -0,0 +1,20 @@
+# seeker_provider_app/test_runner.py
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class EagerTasksTestRunner(DiscoverRunner):
+    """
+    Run background tasks inline, so tests see their effects without a worker
+
+    Tests of the queue itself turn ``TASKS_EAGER`` off with override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.eager_tasks = override_settings(TASKS_EAGER=True)
+        self.eager_tasks.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.eager_tasks.disable()
+        super().teardown_test_environment(**kwargs)
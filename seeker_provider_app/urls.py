@@ -3,9 +3,11 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from users.views import UserViewSet, CustomLoginView
+from users.views import UserViewSet, CustomLoginView, TokenObtainView, TokenRefreshView
 from services.views import ServiceViewSet, ServiceCategoryViewSet
 from matching.views import MatchRequestViewSet
+from matching import async_views as matching_async_views
+from seeker_provider_app.instrumentation import metrics_view
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet)
@@ -16,6 +18,11 @@ router.register(r'match-requests', MatchRequestViewSet)
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    path('api/async/match-requests/', matching_async_views.match_requests, name='async_match_requests'),
+    path('api/async/match-requests/find_matches/', matching_async_views.find_matches, name='async_find_matches'),
     # path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
     path('api-auth/login/', CustomLoginView.as_view(), name='custom_login'),
+    path('api/auth/token/', TokenObtainView.as_view(), name='token_obtain'),
+    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('metrics/', metrics_view, name='metrics'),
 ]
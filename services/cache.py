@@ -0,0 +1,62 @@
+# services/cache.py
+from asgiref.sync import sync_to_async
+
+from seeker_provider_app.cache import VersionedCache
+
+# Finite TTL: bulk writes bypass the invalidating signal, and with a
+# per-process backend other workers only see a change once it expires
+category_cache = VersionedCache('service-categories', timeout=300)
+
+
+def _load_categories():
+    from services.models import ServiceCategory
+
+    categories = list(ServiceCategory.objects.order_by('id').values('id', 'name'))
+    return {
+        'list': categories,
+        'by_id': {category['id']: category['name'] for category in categories},
+        'by_name': {category['name']: category['id'] for category in categories},
+    }
+
+
+def _categories():
+    return category_cache.get_or_set('all', _load_categories)
+
+
+async def _acategories():
+    return await category_cache.aget_or_set('all', sync_to_async(_load_categories))
+
+
+def get_categories():
+    """
+    :return: List of {'id', 'name'} dicts for every service category
+    """
+    return list(_categories()['list'])
+
+
+def get_category_id(name):
+    """
+    :param name: Category name
+    :return: Category id, or None if no category has that name
+    """
+    return _categories()['by_name'].get(name)
+
+
+async def aget_category_id(name):
+    """
+    Async variant of ``get_category_id``
+    """
+    return (await _acategories())['by_name'].get(name)
+
+
+def category_exists(category_id):
+    """
+    :param category_id: Category id (int or numeric string)
+    :return: True if a category with that id exists
+    """
+    try:
+        category_id = int(category_id)
+    except (TypeError, ValueError):
+        return False
+    return category_id in _categories()['by_id']
+
@@ -0,0 +1,223 @@
+# services/importers.py
+import codecs
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import get_categories
+from .models import Service, ServiceCategory
+from .signals import services_bulk_changed
+
+IMPORT_FIELDS = ('name', 'description', 'price', 'availability_type', 'is_active')
+IMPORT_FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+BOOLEAN_VALUES = {'true': True, '1': True, 'yes': True, 'false': False, '0': False, 'no': False}
+
+
+class ServiceImporter:
+    """
+    Stream-import a provider's services from CSV or JSON Lines
+
+    Rows are parsed one at a time and upserted in batches keyed on the
+    service name: a row whose name matches one of the provider's existing
+    services updates it, any other row creates a new service. Each batch is
+    written with one ``bulk_create`` and one ``bulk_update`` in its own
+    transaction, so memory stays flat however long the file is.
+
+    Rows name their category with ``category_id`` or ``category`` (name).
+    Categories are read once for the whole file and checked against the
+    database again for each batch, so a category deleted during the import
+    fails its rows instead of the batch.
+    """
+
+    BATCH_SIZE = 1000
+    MAX_REPORTED_ERRORS = 1000
+    # Bytes read at a time when checking the encoding
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, provider, batch_size=None):
+        self.provider = provider
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+        categories = get_categories()
+        self.category_ids = {category['id'] for category in categories}
+        self.category_names = {category['name']: category['id'] for category in categories}
+
+    def import_file(self, uploaded_file, file_format):
+        """
+        :param uploaded_file: Binary file object
+        :param file_format: 'csv' or 'jsonl'
+        :return: Summary dict with counts and per-row errors
+        :raises UnicodeDecodeError: The file is not UTF-8; nothing was imported
+        """
+        # Batches commit as they go, so a bad byte found halfway through the
+        # import would leave it half done
+        self.check_encoding(uploaded_file)
+
+        text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+        rows = self.read_csv(text) if file_format == 'csv' else self.read_jsonl(text)
+
+        batch = {}
+        for row_number, row in rows:
+            values = self.clean_row(row_number, row)
+            if values is None:
+                continue
+
+            if values['name'] in batch or len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = {}
+            batch[values['name']] = (row_number, values)
+
+        self.write_batch(batch)
+
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def check_encoding(self, uploaded_file):
+        """
+        Decode the whole file once, chunk by chunk, then rewind it
+
+        :raises UnicodeDecodeError: The file is not UTF-8
+        """
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        for chunk in iter(lambda: uploaded_file.read(self.CHUNK_SIZE), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+        uploaded_file.seek(0)
+
+    def read_csv(self, text):
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row
+
+    def read_jsonl(self, text):
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row
+
+    def clean_row(self, row_number, row):
+        if not isinstance(row, dict):
+            self.add_error(row_number, {'detail': 'Row must be an object'})
+            return None
+
+        values = {}
+        errors = {}
+
+        for field_name in IMPORT_FIELDS:
+            raw = row.get(field_name)
+            if field_name == 'is_active':
+                raw = BOOLEAN_VALUES.get(str(raw).strip().lower(), raw) if raw not in (None, '') else True
+            try:
+                values[field_name] = Service._meta.get_field(field_name).clean(raw, None)
+            except ValidationError as error:
+                errors[field_name] = error.messages
+
+        category_id = self.resolve_category(row)
+        if category_id is None:
+            errors['category'] = ['Unknown or missing category']
+        values['category_id'] = category_id
+
+        if errors:
+            self.add_error(row_number, errors)
+            return None
+
+        return values
+
+    def resolve_category(self, row):
+        category_id = row.get('category_id')
+        if category_id not in (None, ''):
+            # JSON Lines rows may hold lists, objects, booleans or floats
+            if isinstance(category_id, bool) or not isinstance(category_id, (int, str)):
+                return None
+            try:
+                category_id = int(category_id)
+            except ValueError:
+                return None
+            return category_id if category_id in self.category_ids else None
+
+        name = row.get('category')
+        return self.category_names.get(name) if isinstance(name, str) else None
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+    def write_batch(self, batch):
+        """
+        :param batch: Dict mapping service name to (row number, cleaned values)
+        """
+        batch = self.drop_deleted_categories(batch)
+        if not batch:
+            return
+
+        existing = {
+            service.name: service
+            for service in Service.objects.filter(provider=self.provider, name__in=batch.keys())
+        }
+        # Bulk writes skip model signals, so report every affected category
+        category_ids = {service.category_id for service in existing.values()}
+
+        to_create = []
+        to_update = []
+        # bulk_update() does not apply auto_now
+        now = timezone.now()
+        for name, (_, values) in batch.items():
+            category_ids.add(values['category_id'])
+            service = existing.get(name)
+            if service is None:
+                to_create.append(Service(provider=self.provider, **values))
+                continue
+
+            for field_name, value in values.items():
+                setattr(service, field_name, value)
+            service.updated_at = now
+            to_update.append(service)
+
+        with transaction.atomic():
+            Service.objects.bulk_create(to_create)
+            Service.objects.bulk_update(to_update, [*IMPORT_FIELDS, 'category', 'updated_at'])
+
+        services_bulk_changed.send(
+            sender=Service, category_ids=category_ids, provider_ids={self.provider.pk}
+        )
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+    def drop_deleted_categories(self, batch):
+        """
+        Report the rows whose category was deleted since the import started
+
+        :return: The batch without those rows
+        """
+        category_ids = {values['category_id'] for _, values in batch.values()}
+        if not category_ids:
+            return batch
+
+        live = set(ServiceCategory.objects.filter(id__in=category_ids).values_list('id', flat=True))
+        kept = {}
+        for name, (row_number, values) in batch.items():
+            if values['category_id'] in live:
+                kept[name] = (row_number, values)
+            else:
+                self.add_error(row_number, {'category': ['Unknown or missing category']})
+        return kept
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# Full-text index over Service.name/description. On SQLite an external-content
+# FTS5 table is kept in sync by triggers, so bulk writes are covered too; on
+# PostgreSQL a GIN index backs the tsvector expression used by services.search.
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE services_service_fts USING fts5(
+        name, description,
+        content='services_service', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER services_service_fts_insert AFTER INSERT ON services_service BEGIN
+        INSERT INTO services_service_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_service_fts_delete AFTER DELETE ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_service_fts_update AFTER UPDATE OF name, description ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO services_service_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    "INSERT INTO services_service_fts(services_service_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS services_service_fts_update',
+    'DROP TRIGGER IF EXISTS services_service_fts_delete',
+    'DROP TRIGGER IF EXISTS services_service_fts_insert',
+    'DROP TABLE IF EXISTS services_service_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX services_service_search_idx ON services_service
+    USING GIN (to_tsvector('english', name || ' ' || description))
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS services_service_search_idx',
+]
+
+
+def run_statements(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_service_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run_statements({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:13
+
+from django.db import migrations, models
+
+# Adding a NOT NULL column rebuilds services_service on SQLite, which drops
+# the full-text index triggers from 0004; they are reinstalled afterwards (and
+# after the rebuild on the way back). The FTS table itself keeps its rows,
+# since service ids are preserved.
+
+SQLITE_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS services_service_fts_insert',
+    'DROP TRIGGER IF EXISTS services_service_fts_delete',
+    'DROP TRIGGER IF EXISTS services_service_fts_update',
+    """
+    CREATE TRIGGER services_service_fts_insert AFTER INSERT ON services_service BEGIN
+        INSERT INTO services_service_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_service_fts_delete AFTER DELETE ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_service_fts_update AFTER UPDATE OF name, description ON services_service BEGIN
+        INSERT INTO services_service_fts(services_service_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO services_service_fts(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+
+def install_sqlite_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_TRIGGERS:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_service_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install_sqlite_triggers),
+        migrations.AddField(
+            model_name='service',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='servicecategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(install_sqlite_triggers, migrations.RunPython.noop),
+    ]
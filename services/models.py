@@ -6,6 +6,7 @@ from users.models import User
 class ServiceCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -25,6 +26,29 @@ class Service(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     availability_type = models.CharField(max_length=10, choices=AVAILABILITY_CHOICES)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Hot filters of MatchingService.find_matching_services
+            models.Index(
+                fields=['category', 'price'],
+                condition=models.Q(is_active=True),
+                name='service_active_cat_price_idx'
+            ),
+            models.Index(
+                fields=['availability_type', 'price'],
+                condition=models.Q(is_active=True),
+                name='service_active_avail_price_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored category so saves can tell which results it left
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
 
     def __str__(self):
         return self.name
@@ -0,0 +1,91 @@
+# services/projections.py
+"""
+Read-only projection of services to plain dicts
+
+Produces the read representation of ``ServiceSerializer`` from ``values()``
+rows, with providers taken from preloaded profiles
+(``users.cache.get_provider_profiles``), so listing services neither builds
+model instances nor runs serializer fields per item.
+"""
+from rest_framework import serializers
+
+from .models import Service
+
+SERVICE_VALUES = (
+    'id', 'provider_id', 'category_id', 'category__name', 'category__description',
+    'name', 'description', 'price', 'availability_type', 'is_active'
+)
+
+# Built once and reused for every row
+_price_field = Service._meta.get_field('price')
+_price = serializers.DecimalField(
+    max_digits=_price_field.max_digits, decimal_places=_price_field.decimal_places
+)
+
+
+def format_price(value):
+    """
+    :param value: Decimal price
+    :return: Price string as rendered by ``ServiceSerializer``
+    """
+    return _price.to_representation(value)
+
+
+def service_values(queryset, *extra_fields):
+    """
+    :param queryset: Service queryset
+    :param extra_fields: Additional fields or annotations to load
+    :return: ``values()`` queryset of the fields ``project_service`` needs
+    """
+    return queryset.values(*SERVICE_VALUES, *extra_fields)
+
+
+def project_service(row, provider_profiles):
+    """
+    :param row: Row from ``service_values``
+    :param provider_profiles: Dict of provider id to profile
+    :return: Dict shaped like ``ServiceSerializer(service).data``
+    """
+    category = None
+    if row['category_id'] is not None:
+        category = {
+            'id': row['category_id'],
+            'name': row['category__name'],
+            'description': row['category__description'],
+        }
+
+    return {
+        'id': row['id'],
+        'provider': provider_profiles[row['provider_id']],
+        'category': category,
+        'name': row['name'],
+        'description': row['description'],
+        'price': format_price(row['price']),
+        'availability_type': row['availability_type'],
+        'is_active': row['is_active'],
+    }
+
+
+def project_service_rows(rows):
+    """
+    Project rows, loading the provider profiles missing from the profile
+    cache in one query
+
+    :param rows: List of rows from ``service_values``
+    :return: List of service dicts
+    """
+    from users.cache import get_provider_profiles
+
+    profiles = get_provider_profiles(row['provider_id'] for row in rows)
+    return [project_service(row, profiles) for row in rows]
+
+
+def project_services(queryset):
+    """
+    Project a Service queryset in two queries: the services and any
+    provider profiles missing from the profile cache
+
+    :param queryset: Service queryset
+    :return: List of service dicts
+    """
+    return project_service_rows(list(service_values(queryset)))
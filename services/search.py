@@ -0,0 +1,70 @@
+# services/search.py
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize_keywords(keywords):
+    """
+    :param keywords: Free-text query from the seeker
+    :return: Lowercased words of the query, joined by single spaces
+    """
+    return ' '.join(_TOKEN_RE.findall(str(keywords).lower()))
+
+
+def search_services(queryset, keywords):
+    """
+    Restrict a Service queryset to a keyword search and annotate relevance
+
+    Uses the FTS5 index on SQLite and the tsvector GIN index on PostgreSQL
+    (both created by migration 0004); other databases fall back to
+    ``icontains`` with zero relevance. Every word must match.
+
+    :param queryset: Service queryset
+    :param keywords: Free-text query from the seeker
+    :return: Queryset annotated with ``text_relevance`` in [0, 1)
+    """
+    words = normalize_keywords(keywords).split()
+    if not words:
+        return queryset.none()
+
+    table = queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'sqlite':
+        # Quote every word so user input can never be read as FTS5 syntax
+        match = ' '.join(f'"{word}"' for word in words)
+        # bm25() is negative, lower is better; r / (r + 1) maps it onto [0, 1)
+        relevance = RawSQL(
+            f'SELECT -bm25(services_service_fts, 10.0, 1.0) / (1.0 - bm25(services_service_fts, 10.0, 1.0)) '
+            f'FROM services_service_fts '
+            f'WHERE services_service_fts MATCH %s AND services_service_fts.rowid = "{table}"."id"',
+            [match],
+            output_field=FloatField()
+        )
+        matching_ids = RawSQL(
+            'SELECT rowid FROM services_service_fts WHERE services_service_fts MATCH %s',
+            [match]
+        )
+        return queryset.filter(id__in=matching_ids).annotate(text_relevance=relevance)
+
+    if vendor == 'postgresql':
+        # Same expression as the GIN index so the planner can use it
+        document = f"to_tsvector('english', \"{table}\".\"name\" || ' ' || \"{table}\".\"description\")"
+        query = "plainto_tsquery('english', %s)"
+        params = [' '.join(words)]
+        return queryset.alias(
+            text_match=RawSQL(f'{document} @@ {query}', params, output_field=BooleanField())
+        ).filter(text_match=True).annotate(text_relevance=RawSQL(
+            # Normalization flag 32 maps the rank onto [0, 1)
+            f'ts_rank_cd({document}, {query}, 32)', params, output_field=FloatField()
+        ))
+
+    condition = Q()
+    for word in words:
+        condition &= Q(name__icontains=word) | Q(description__icontains=word)
+    return queryset.filter(condition).annotate(text_relevance=Value(0.0, output_field=FloatField()))
@@ -1,7 +1,7 @@
 # services/serializers.py
 from rest_framework import serializers
 from .models import Service, ServiceCategory
-from users.serializers import UserSerializer
+from users.serializers import PublicProfileSerializer
 
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
@@ -19,7 +19,7 @@ class ServiceSerializer(serializers.ModelSerializer):
     )
 
     # Read-only nested serializers for response
-    provider = UserSerializer(read_only=True)
+    provider = PublicProfileSerializer(read_only=True)
     category = ServiceCategorySerializer(read_only=True)
 
     class Meta:
@@ -0,0 +1,20 @@
+# services/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from services.cache import category_cache
+from services.models import ServiceCategory
+
+# Sent after services are written in bulk (which skips model signals), with
+# the ids of every category that gained, lost or changed services and of the
+# providers that own them
+services_bulk_changed = Signal()
+
+
+@receiver([post_save, post_delete], sender=ServiceCategory)
+def invalidate_category_cache(sender, **kwargs):
+    # Now, so the writing transaction sees its change, and again after commit:
+    # a concurrent request may have cached the old categories in between
+    category_cache.invalidate()
+    transaction.on_commit(category_cache.invalidate)
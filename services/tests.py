@@ -1,3 +1,293 @@
+import io
+import json
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from seeker_provider_app.instrumentation import request_metrics
+from services.cache import category_cache, category_exists, get_categories, get_category_id
+from services.importers import ServiceImporter
+from services.models import Service, ServiceCategory
+from services.serializers import ServiceSerializer
+from users.models import User
+
+
+class CategoryCacheTest(TestCase):
+    def test_cache_follows_category_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            plumbing = ServiceCategory.objects.create(name='Plumbing')
+        self.assertEqual(get_categories(), [{'id': plumbing.id, 'name': 'Plumbing'}])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category_id('Plumbing'), plumbing.id)
+            self.assertTrue(category_exists(str(plumbing.id)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            plumbing.name = 'Pipes'
+            plumbing.save()
+            # Cached before the commit, by a request that read the old name
+            category_cache.set('all', {
+                'list': [], 'by_id': {plumbing.id: 'Plumbing'}, 'by_name': {'Plumbing': plumbing.id}
+            })
+        self.assertIsNone(get_category_id('Plumbing'))
+        self.assertEqual(get_category_id('Pipes'), plumbing.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            plumbing.delete()
+        self.assertEqual(get_categories(), [])
+
+
+class ServiceImportTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.provider = User.objects.create(username='provider', user_type='provider')
+        self.category = ServiceCategory.objects.create(name='Plumbing')
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+
+    def upload(self, name, content):
+        return self.client.post(
+            '/api/services/import/',
+            {'file': SimpleUploadedFile(name, content.encode())},
+            format='multipart'
+        )
+
+    def test_files_that_are_not_utf8_import_nothing(self):
+        # The bad byte comes after several batches' worth of decoded text
+        content = b'name,description,price,availability_type,category\n' + b''.join(
+            b'Service %d,Fixes things,80,both,Plumbing\n' % index for index in range(1000)
+        ) + b'Drain cleaning,Unclog drains \xff,50,offline,Plumbing\n'
+        with self.assertRaises(UnicodeDecodeError):
+            ServiceImporter(self.provider, batch_size=10).import_file(io.BytesIO(content), 'csv')
+        self.assertFalse(Service.objects.exists())
+
+        response = self.client.post(
+            '/api/services/import/',
+            {'file': SimpleUploadedFile('services.csv', content)},
+            format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Service.objects.exists())
+
+    def test_csv_import_upserts_by_name_and_reports_bad_rows(self):
+        Service.objects.create(
+            provider=self.provider, category=self.category, name='Leak repair',
+            description='old', price='10.00', availability_type='offline'
+        )
+
+        response = self.upload('services.csv', (
+            'name,description,price,availability_type,category,is_active\n'
+            'Leak repair,Fix leaks,80.00,both,Plumbing,true\n'
+            'Drain cleaning,Unclog drains,50,offline,Plumbing,\n'
+            'Bad row,Nope,abc,teleport,Unknown,\n'
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['failed']), (1, 1, 1))
+        self.assertEqual(body['errors'][0]['row'], 3)
+        self.assertEqual(
+            set(body['errors'][0]['errors']), {'price', 'availability_type', 'category'}
+        )
+
+        leak = Service.objects.get(name='Leak repair')
+        self.assertEqual((leak.description, leak.availability_type), ('Fix leaks', 'both'))
+        self.assertEqual(Service.objects.filter(provider=self.provider).count(), 2)
+
+    def test_jsonl_import_in_small_batches(self):
+        lines = '\n'.join(
+            json.dumps({
+                'name': f'Service {index}', 'description': 'd', 'price': '1.00',
+                'availability_type': 'online', 'category_id': self.category.id
+            })
+            for index in range(25)
+        )
+
+        # Spill the upload to a temporary file, as large uploads are
+        with mock.patch.object(ServiceImporter, 'BATCH_SIZE', 10), \
+                self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0):
+            response = self.upload('services.jsonl', lines + '\nnot json\n')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 25)
+        self.assertEqual(response.json()['failed'], 1)
+
+    def test_categories_of_the_wrong_type_fail_their_rows(self):
+        rows = [
+            {'category': ['Plumbing']}, {'category': {'name': 'Plumbing'}},
+            {'category_id': [self.category.id]}, {'category_id': True}, {'category': 'Plumbing'}
+        ]
+        response = self.upload('services.jsonl', '\n'.join(
+            json.dumps({
+                'name': f'Service {index}', 'description': 'd', 'price': '1.00',
+                'availability_type': 'online', **row
+            })
+            for index, row in enumerate(rows)
+        ))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['created'], body['failed']), (1, 4))
+        self.assertEqual([error['errors'] for error in body['errors']], [
+            {'category': ['Unknown or missing category']}
+        ] * 4)
+
+    def test_categories_deleted_during_the_import_fail_their_rows(self):
+        gardening = ServiceCategory.objects.create(name='Gardening')
+        importer = ServiceImporter(self.provider, batch_size=2)
+        gardening.delete()
+
+        summary = importer.import_file(io.BytesIO(
+            b'name,description,price,availability_type,category\n'
+            b'Leak repair,Fix leaks,80,both,Plumbing\n'
+            b'Mowing,Cut grass,30,offline,Gardening\n'
+            b'Drain cleaning,Unclog drains,50,offline,Plumbing\n'
+        ), 'csv')
+
+        self.assertEqual((summary['created'], summary['failed']), (2, 1))
+        self.assertEqual(summary['errors'][0]['row'], 2)
+        self.assertEqual(
+            set(Service.objects.values_list('name', flat=True)), {'Leak repair', 'Drain cleaning'}
+        )
+
+
+class ServiceListProjectionTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.category = ServiceCategory.objects.create(name='Plumbing', description='Pipes')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='seeker', user_type='seeker'))
+
+    def add_services(self, count):
+        for index in range(count):
+            provider = User.objects.create(
+                username=f'provider-{Service.objects.count()}', user_type='provider',
+                email='p@example.com', location='Cebu', latitude=10.3, longitude=123.9
+            )
+            Service.objects.create(
+                provider=provider, category=self.category if index % 2 else None,
+                name=f'Service {index}', description='Fixes pipes',
+                price='99.5', availability_type='online'
+            )
+
+    def list_services(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/services/')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_listing_matches_the_serializer_in_constant_queries(self):
+        self.add_services(2)
+        small, small_queries = self.list_services()
+
+        self.add_services(10)
+        large, large_queries = self.list_services()
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(
+            large,
+            json.loads(json.dumps(ServiceSerializer(Service.objects.all(), many=True).data))
+        )
+        # Contact details stay private
+        self.assertNotIn('email', large[0]['provider'])
+        self.assertNotIn('phone_number', large[0]['provider'])
+
+    @mock.patch('seeker_provider_app.streaming.STREAM_CHUNK_SIZE', 3)
+    def test_streamed_listing_and_export_match_the_listing(self):
+        self.add_services(7)
+        listing, _ = self.list_services()
+
+        response = self.client.get('/api/services/', {'stream': 'json'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), listing)
+
+        response = self.client.get('/api/services/export/')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="services.ndjson"')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], listing)
+
+        self.assertEqual(self.client.get('/api/services/', {'stream': 'xml'}).status_code, 400)
+
+
+class ConditionalListTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.provider = User.objects.create(username='provider', user_type='provider')
+        self.category = ServiceCategory.objects.create(name='Plumbing')
+        self.service = Service.objects.create(
+            provider=self.provider, category=self.category, name='Leak repair',
+            description='Fix leaks', price='80.00', availability_type='online'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='seeker', user_type='seeker'))
+
+    def assert_not_modified(self, url, response):
+        # Only the validator query: no listing query, no serialization
+        with self.assertNumQueries(1):
+            revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['ETag'], response['ETag'])
+
+        revalidated = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def assert_modified(self, url, response):
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertNotEqual(revalidated['ETag'], response['ETag'])
+        return revalidated
+
+    def test_service_listing_revalidates_until_something_it_shows_changes(self):
+        url = '/api/services/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assert_not_modified(url, response)
+
+        self.service.price = '90.00'
+        self.service.save()
+        response = self.assert_modified(url, response)
+
+        self.provider.location = 'Cebu'
+        self.provider.save()
+        response = self.assert_modified(url, response)
+        self.assertEqual(response.json()[0]['provider']['location'], 'Cebu')
+
+        ServiceImporter(self.provider).import_file(
+            io.BytesIO(b'name,description,price,availability_type,category\n'
+                       b'Drain cleaning,Unclog drains,50,offline,Plumbing\n'),
+            'csv'
+        )
+        self.assert_modified(url, response)
+
+    def test_category_changes_invalidate_both_listings(self):
+        services = self.client.get('/api/services/')
+        categories = self.client.get('/api/service-categories/')
+        self.assert_not_modified('/api/service-categories/', categories)
+
+        self.category.name = 'Pipes'
+        self.category.save()
+
+        self.assert_modified('/api/service-categories/', categories)
+        self.assert_modified('/api/services/', services)
+
+    def test_validators_track_deletions_and_the_representation(self):
+        url = '/api/services/'
+        response = self.client.get(url)
+        self.assertIn('Accept', response['Vary'])
+
+        streamed = self.client.get(url + '?stream=ndjson')
+        self.assertNotEqual(streamed['ETag'], response['ETag'])
+        self.assert_not_modified(url + '?stream=ndjson', streamed)
 
-# Create your tests here.
+        Service.objects.create(
+            provider=self.provider, category=self.category, name='Drain cleaning',
+            description='Unclog drains', price='50.00', availability_type='offline'
+        )
+        response = self.assert_modified(url, response)
+        Service.objects.filter(name='Drain cleaning').delete()
+        self.assert_modified(url, response)
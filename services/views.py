@@ -1,20 +1,127 @@
 # services/views.py
+import hashlib
+import os
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
+from seeker_provider_app.streaming import parse_stream_format, streaming_response
+
+from .cache import category_exists, get_categories
+from .importers import IMPORT_FORMATS, ServiceImporter
 from .models import Service, ServiceCategory
+from .projections import project_service_rows, project_services, service_values
 from .serializers import ServiceSerializer, ServiceCategorySerializer
 
 
+def conditional_on(updated=('updated_at',), counted=('id',)):
+    """
+    Make a list view answer conditional GETs from what it would list
+
+    The ETag and Last-Modified validators come from one aggregate query over
+    the filtered queryset: the latest ``updated`` timestamps and the
+    ``counted`` row counts (so deletions change them too). A matching
+    ``If-None-Match`` (or a current ``If-Modified-Since``) gets 304 Not
+    Modified without running the listing query or the serializer.
+
+    :param updated: Timestamp fields (lookups allowed) of everything the
+        listing shows
+    :param counted: Fields whose non-null count changes when rows leave the
+        listing
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            # Read before the query, so a concurrent change is never hidden
+            # behind an older validator
+            aggregates = self.filter_queryset(self.get_queryset()).aggregate(
+                **{f'updated_{index}': Max(field) for index, field in enumerate(updated)},
+                **{f'count_{index}': Count(field) for index, field in enumerate(counted)},
+            )
+            timestamps = [
+                aggregates[f'updated_{index}'] for index in range(len(updated))
+                if aggregates[f'updated_{index}'] is not None
+            ]
+            # The streamed and buffered bodies differ byte for byte
+            state = [request.query_params.get('stream', '')]
+            state.extend(str(value) for _, value in sorted(aggregates.items()))
+            digest = hashlib.md5(' '.join(state).encode(), usedforsecurity=False)
+            etag = quote_etag(digest.hexdigest())
+            last_modified = int(max(timestamps).timestamp()) if timestamps else None
+
+            response = get_conditional_response(
+                request._request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                patch_cache_control(response, private=True, no_cache=True)
+                # The renderer is negotiated from Accept
+                patch_vary_headers(response, ['Accept'])
+            return response
+        return wrapper
+    return decorator
+
+
 class ServiceCategoryViewSet(viewsets.ModelViewSet):
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_on()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class ServiceViewSet(viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
 
+    # Each service embeds its category and its provider's profile
+    @conditional_on(
+        updated=('updated_at', 'category__updated_at', 'provider__updated_at'),
+        counted=('id', 'category'),
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        List services through the read-only projection
+
+        Two queries however many services there are: the services with their
+        categories, and the provider profiles missing from the cache. Pass
+        ``?stream=json`` or ``?stream=ndjson`` to stream the listing instead.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        stream_format = parse_stream_format(request.query_params.get('stream'))
+        if stream_format:
+            return streaming_response(
+                service_values(queryset.order_by('id')), project_service_rows, stream_format
+            )
+
+        return Response(project_services(queryset))
+
+    @action(detail=False, methods=['GET'])
+    def export(self, request):
+        """
+        Download every service as a streamed file (NDJSON unless ``?stream=json``)
+        """
+        stream_format = parse_stream_format(request.query_params.get('stream'), default='ndjson')
+        return streaming_response(
+            service_values(self.filter_queryset(self.get_queryset()).order_by('id')),
+            project_service_rows,
+            stream_format,
+            filename='services'
+        )
+
     def create(self, request, *args, **kwargs):
         """
         Enhanced service creation with detailed error handling
@@ -25,20 +132,14 @@ class ServiceViewSet(viewsets.ModelViewSet):
             if not category_id:
                 return Response({
                     'error': 'Category ID is required',
-                    'available_categories': list(
-                        ServiceCategory.objects.values('id', 'name')
-                    )
+                    'available_categories': get_categories()
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            try:
-                # Verify category exists
-                ServiceCategory.objects.get(id=category_id)
-            except ServiceCategory.DoesNotExist:
+            # Verify category exists (served from the category cache)
+            if not category_exists(category_id):
                 return Response({
                     'error': f'Category with ID {category_id} does not exist',
-                    'available_categories': list(
-                        ServiceCategory.objects.values('id', 'name')
-                    )
+                    'available_categories': get_categories()
                 }, status=status.HTTP_404_NOT_FOUND)
 
             # Proceed with standard creation
@@ -58,3 +159,34 @@ class ServiceViewSet(viewsets.ModelViewSet):
                 'error': 'Unexpected error during service creation',
                 'details': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['POST'], url_path='import', parser_classes=[MultiPartParser])
+    def import_services(self, request):
+        """
+        Bulk upsert the current provider's services from a CSV or JSON Lines upload
+
+        Send the file as ``file``; the format comes from its extension
+        (.csv, .jsonl, .ndjson) or an explicit ``file_format`` field.
+        """
+        uploaded_file = request.FILES.get('file')
+        if uploaded_file is None:
+            return Response({
+                'error': 'Upload a CSV or JSON Lines file as "file"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        extension = os.path.splitext(uploaded_file.name)[1].lower()
+        file_format = request.data.get('file_format') or IMPORT_FORMATS.get(extension)
+        if file_format not in IMPORT_FORMATS.values():
+            return Response({
+                'error': 'Unsupported file format',
+                'supported_formats': sorted(set(IMPORT_FORMATS.values()))
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            summary = ServiceImporter(request.user).import_file(uploaded_file, file_format)
+        except UnicodeDecodeError:
+            return Response({
+                'error': 'File must be UTF-8 encoded'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(summary, status=status.HTTP_200_OK)
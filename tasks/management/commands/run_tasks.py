@@ -0,0 +1,51 @@
+# tasks/management/commands/run_tasks.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import default_worker_id, run_due_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks until stopped (or until the queue is empty with --once)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no task is due')
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help='Tasks claimed at a time')
+        parser.add_argument('--lease-seconds', type=int, default=60,
+                            help='How long a claimed task is reserved for this worker')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when no task is due')
+        parser.add_argument('--worker-id', default=None,
+                            help='Lease owner name (default: host:pid)')
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or default_worker_id()
+        self.stopping = False
+        # Finish the current batch on SIGTERM/SIGINT instead of dying mid-task
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        self.stdout.write(f'Worker {worker_id} started')
+        total = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            ran, succeeded = run_due_tasks(
+                worker_id, limit=options['batch_size'], lease_seconds=options['lease_seconds']
+            )
+            total += ran
+            failed += ran - succeeded
+            if ran:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+
+        self.stdout.write(f'Worker {worker_id} stopped after {total} tasks ({failed} failed)')
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,199 @@
+# tasks/queue.py
+"""
+Database-backed background task queue
+
+Functions decorated with ``@task`` (in an app's ``tasks`` module) get an
+``enqueue(**payload)`` method that inserts a Task row, in the caller's
+transaction, instead of running them. ``python manage.py run_tasks`` claims
+due tasks under a time-limited lease and runs each in a transaction that
+also deletes its row, so its database work is committed exactly when the
+task is marked done. A failure (or a worker that dies mid-task) leaves the
+row to be retried with exponential backoff: delivery is at least once, and
+handlers must tolerate running again after a partial non-database effect.
+
+With ``settings.TASKS_EAGER`` tasks run inline when enqueued instead (the
+test runner turns it on).
+"""
+import json
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions by name
+TASKS = {}
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+
+
+class LeaseLost(Exception):
+    """
+    The task was claimed by another worker after this worker's lease expired
+    """
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Register a function as a task and give it an ``enqueue`` method
+
+    Payloads are keyword arguments and must be JSON-serializable.
+
+    :param name: Task name (defaults to ``module.function``)
+    :param max_attempts: Runs before the task is marked failed
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        TASKS[task_name] = func
+        func.task_name = task_name
+        func.enqueue = lambda delay=None, **payload: enqueue(
+            task_name, payload, delay=delay, max_attempts=max_attempts
+        )
+        return func
+
+    return register(func) if func is not None else register
+
+
+def enqueue(name, payload, delay=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Queue a task, or run it now in eager mode
+
+    :param name: Registered task name
+    :param payload: Dict of JSON-serializable keyword arguments
+    :param delay: Optional timedelta before the task is due
+    :return: Task object, or None in eager mode
+    """
+    from tasks.models import Task
+
+    if name not in TASKS:
+        raise KeyError(f'Unknown task {name}')
+
+    if getattr(settings, 'TASKS_EAGER', False):
+        # Round-trip the payload so eager mode rejects what the queue would
+        TASKS[name](**json.loads(json.dumps(payload)))
+        return None
+
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """
+    :param attempts: Runs so far
+    :return: Seconds to wait before the next run
+    """
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+def claim(worker_id, limit=10, lease_seconds=60):
+    """
+    Lease up to ``limit`` due tasks to a worker
+
+    Each claim is a conditional update, so concurrent workers never hold the
+    same task; a task whose lease expired (its worker died) is claimable again
+    until its attempts are used up, then it is marked failed.
+
+    :return: List of claimed Task objects, oldest first
+    """
+    from tasks.models import Task
+
+    now = timezone.now()
+    expired = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    Task.objects.filter(
+        expired, status=Task.QUEUED, attempts__gte=F('max_attempts')
+    ).update(
+        status=Task.FAILED,
+        locked_until=None,
+        last_error='Lease expired during the last attempt',
+    )
+
+    claimable = Q(status=Task.QUEUED, run_at__lte=now, attempts__lt=F('max_attempts')) & expired
+    candidate_ids = list(
+        Task.objects.filter(claimable).order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+    )
+
+    claimed = []
+    for task_id in candidate_ids:
+        if Task.objects.filter(claimable, pk=task_id).update(
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+        ):
+            claimed.append(task_id)
+
+    return list(Task.objects.filter(pk__in=claimed).order_by('run_at', 'id'))
+
+
+def run(claimed_task):
+    """
+    Run a claimed task and delete it, or schedule a retry if it fails
+
+    :param claimed_task: Task object returned by ``claim``
+    :return: True if the task ran successfully
+    """
+    from tasks.models import Task
+
+    # The attempt count fences out a worker whose lease was taken over
+    lease = Task.objects.filter(
+        pk=claimed_task.pk, locked_by=claimed_task.locked_by, attempts=claimed_task.attempts
+    )
+
+    func = TASKS.get(claimed_task.name)
+    if func is None:
+        lease.update(status=Task.FAILED, last_error=f'Unknown task {claimed_task.name}')
+        logger.error('Unknown task %s (id %s)', claimed_task.name, claimed_task.pk)
+        return False
+
+    try:
+        with transaction.atomic():
+            func(**claimed_task.payload)
+            if not lease.delete()[0]:
+                raise LeaseLost
+        return True
+    except LeaseLost:
+        logger.warning('Lease of task %s (id %s) was lost; its work was rolled back',
+                       claimed_task.name, claimed_task.pk)
+        return False
+    except Exception:
+        error = traceback.format_exc()
+        if claimed_task.attempts >= claimed_task.max_attempts:
+            lease.update(status=Task.FAILED, locked_until=None, last_error=error)
+            logger.error('Task %s (id %s) failed after %s attempts',
+                         claimed_task.name, claimed_task.pk, claimed_task.attempts)
+        else:
+            lease.update(
+                run_at=timezone.now() + timedelta(seconds=retry_delay(claimed_task.attempts)),
+                locked_by='',
+                locked_until=None,
+                last_error=error,
+            )
+            logger.warning('Task %s (id %s) failed, will retry', claimed_task.name, claimed_task.pk)
+        return False
+
+
+def run_due_tasks(worker_id=None, limit=10, lease_seconds=60):
+    """
+    Claim and run one batch of due tasks
+
+    :return: Tuple of (tasks run, tasks that succeeded)
+    """
+    claimed = claim(worker_id or default_worker_id(), limit=limit, lease_seconds=lease_seconds)
+    succeeded = sum(1 for claimed_task in claimed if run(claimed_task))
+    return len(claimed), succeeded
@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from matching.cache import match_result_cache
+from matching.models import MatchRequest, ProviderStats
+from seeker_provider_app.instrumentation import request_metrics
+from services.models import Service, ServiceCategory
+from tasks.models import Task
+from tasks.queue import claim, run, run_due_tasks, task
+from users.models import User
+
+calls = []
+
+
+@task(name='tasks.tests.create_category', max_attempts=2)
+def create_category(name, fail=False):
+    calls.append(name)
+    ServiceCategory.objects.create(name=name)
+    if fail:
+        raise RuntimeError('Boom')
+
+
+@override_settings(TASKS_EAGER=False)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_tasks_run_in_a_transaction_with_their_deletion(self):
+        create_category.enqueue(name='Queued')
+        self.assertEqual(calls, [])
+
+        (claimed,) = claim('worker-a')
+        self.assertTrue(run(claimed))
+        self.assertTrue(ServiceCategory.objects.filter(name='Queued').exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_failures_roll_back_and_retry_with_backoff_until_failed(self):
+        create_category.enqueue(name='Flaky', fail=True)
+
+        (claimed,) = claim('worker-a')
+        self.assertFalse(run(claimed))
+        self.assertFalse(ServiceCategory.objects.filter(name='Flaky').exists())
+        queued = Task.objects.get()
+        self.assertEqual((queued.status, queued.attempts, queued.locked_by), (Task.QUEUED, 1, ''))
+        self.assertGreater(queued.run_at, timezone.now())
+        self.assertIn('RuntimeError: Boom', queued.last_error)
+        self.assertEqual(claim('worker-a'), [])
+
+        Task.objects.update(run_at=timezone.now())
+        (claimed,) = claim('worker-a')
+        self.assertFalse(run(claimed))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertEqual(claim('worker-a'), [])
+
+    def test_expired_leases_are_reclaimed_and_fence_out_the_old_worker(self):
+        create_category.enqueue(name='Leased')
+
+        (stale,) = claim('worker-a', lease_seconds=60)
+        self.assertEqual(claim('worker-b'), [])
+
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        (claimed,) = claim('worker-b')
+        self.assertEqual(claimed.attempts, 2)
+
+        # worker-a wakes up after losing its lease: its work is rolled back
+        self.assertFalse(run(stale))
+        self.assertFalse(ServiceCategory.objects.filter(name='Leased').exists())
+
+        self.assertTrue(run(claimed))
+        self.assertEqual(ServiceCategory.objects.filter(name='Leased').count(), 1)
+
+    def test_tasks_whose_last_lease_expires_are_failed(self):
+        create_category.enqueue(name='Crashing')
+
+        for _ in range(2):
+            self.assertEqual(len(claim('worker-a')), 1)
+            # The worker dies mid-task
+            Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(claim('worker-b'), [])
+        failed = Task.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Task.FAILED, 2))
+        self.assertIn('Lease expired', failed.last_error)
+
+
+@override_settings(TASKS_EAGER=False)
+class MatchRequestSideEffectTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.seeker = User.objects.create(username='seeker', user_type='seeker')
+        self.provider = User.objects.create(username='provider', user_type='provider')
+        self.service = Service.objects.create(
+            provider=self.provider,
+            category=ServiceCategory.objects.create(name='Plumbing'),
+            name='Pipes',
+            description='Fixes pipes',
+            price='100.00',
+            availability_type='online'
+        )
+
+    def stats(self):
+        return ProviderStats.objects.filter(provider=self.provider).values(
+            'received_count', 'accepted_count', 'response_count'
+        ).first()
+
+    def test_stats_are_updated_by_the_worker(self):
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+        response = client.post(
+            '/api/match-requests/', {'provider': self.provider.id, 'service': self.service.id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertFalse(ProviderStats.objects.filter(received_count__gt=0).exists())
+
+        client.force_authenticate(self.provider)
+        response = client.patch(
+            f"/api/match-requests/{response.json()['id']}/", {'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MatchRequest.objects.get().status, 'accepted')
+        self.assertEqual(Task.objects.count(), 2)
+
+        self.assertEqual(run_due_tasks('worker-a'), (2, 2))
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(
+            self.stats(), {'received_count': 1, 'accepted_count': 1, 'response_count': 1}
+        )
+
+    def test_transitions_evict_cached_results_in_the_request(self):
+        match_request = MatchRequest.objects.create(
+            seeker=self.seeker, provider=self.provider, service=self.service
+        )
+        match_result_cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.seeker)
+        response = client.post(
+            '/api/match-requests/find_matches/', {'category': 'Plumbing'}, format='json'
+        )
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(len(match_result_cache._entries), 1)
+
+        client.force_authenticate(self.provider)
+        response = client.patch(
+            f'/api/match-requests/{match_request.id}/', {'status': 'accepted'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        # Evicted before any worker ran the stats task
+        self.assertTrue(Task.objects.exists())
+        self.assertEqual(len(match_result_cache._entries), 0)
@@ -0,0 +1,34 @@
+# users/authentication.py
+from rest_framework import authentication, exceptions
+
+from .tokens import InvalidToken, user_from_access_token
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    Authenticate ``Authorization: Bearer <access token>`` without a query
+
+    Tokens come from ``/api/auth/token/`` and ``/api/auth/token/refresh/``.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid bearer token header')
+
+        try:
+            user = user_from_access_token(header[1].decode())
+        except (InvalidToken, UnicodeDecodeError) as e:
+            raise exceptions.AuthenticationFailed(str(e))
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted')
+
+        return user, header[1].decode()
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,22 @@
+# users/backends.py
+from django.contrib.auth.backends import ModelBackend
+
+from .cache import aget_principal, get_principal
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose ``get_user`` returns the cached slim principal
+
+    ``AuthenticationMiddleware`` calls ``get_user`` on every session-
+    authenticated request, which otherwise loads the full user row each time.
+    Credential checks (``authenticate``) are unchanged.
+    """
+
+    def get_user(self, user_id):
+        user = get_principal(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await aget_principal(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
@@ -0,0 +1,133 @@
+# users/cache.py
+from django.db import DEFAULT_DB_ALIAS
+
+from seeker_provider_app.cache import VersionedCache
+
+provider_profile_cache = VersionedCache('provider-profiles', timeout=300)
+# Short TTL: bulk updates bypass the invalidating signals, and with a
+# per-process backend other workers only see a change once it expires
+principal_cache = VersionedCache('principals', timeout=60)
+
+# User fields of the request principal, in model field order; nothing else
+# (bio, email, names, dates) is read while handling a request. The password
+# hash stays out of the cache: the session auth hash derived from it is cached
+# alongside instead.
+PRINCIPAL_FIELDS = (
+    'id', 'is_superuser', 'username', 'is_staff', 'is_active',
+    'user_type', 'location', 'latitude', 'longitude'
+)
+
+
+def get_provider_profiles(provider_ids):
+    """
+    Return serialized provider profiles, loading cache misses in one query
+
+    Profiles are the representation of ``PublicProfileSerializer`` so they can
+    stand in for the nested ``provider`` of a serialized service.
+
+    :param provider_ids: Iterable of provider user ids
+    :return: Dict mapping provider id to profile dict
+    """
+    from users.models import User
+    from users.projections import project_profiles
+
+    provider_ids = set(provider_ids)
+    profiles = provider_profile_cache.get_many(provider_ids)
+
+    missing = provider_ids - profiles.keys()
+    if missing:
+        loaded = project_profiles(User.objects.filter(id__in=missing))
+        provider_profile_cache.set_many(loaded)
+        profiles.update(loaded)
+
+    return profiles
+
+
+def invalidate_provider_profile(provider_id):
+    provider_profile_cache.delete(provider_id)
+
+
+async def aget_provider_profiles(provider_ids):
+    """
+    Async variant of ``get_provider_profiles`` using the async ORM and cache APIs
+    """
+    from users.models import User
+    from users.projections import aproject_profiles
+
+    provider_ids = set(provider_ids)
+    profiles = await provider_profile_cache.aget_many(provider_ids)
+
+    missing = provider_ids - profiles.keys()
+    if missing:
+        loaded = await aproject_profiles(User.objects.filter(id__in=missing))
+        await provider_profile_cache.aset_many(loaded)
+        profiles.update(loaded)
+
+    return profiles
+
+
+def get_principal(user_id):
+    """
+    Return the slim user that authenticated requests run as
+
+    The user is a model instance as if loaded with
+    ``.only(*PRINCIPAL_FIELDS)``: any other field is loaded on first access,
+    and saving it only writes the fields that were changed or loaded. Its
+    session auth hash is cached with it, so the password hash is neither
+    cached nor needed to verify the session.
+
+    :param user_id: User id (from the session)
+    :return: User object or None if there is no such user
+    """
+    from users.models import User
+
+    cached = principal_cache.get(user_id)
+    if cached is None:
+        user = User.objects.filter(pk=user_id).only(*PRINCIPAL_FIELDS, 'password').first()
+        if user is None:
+            return None
+        cached = _principal_values(user)
+        principal_cache.set(user_id, cached)
+
+    return _build_principal(cached)
+
+
+async def aget_principal(user_id):
+    """
+    Async variant of ``get_principal`` using the async ORM and cache APIs
+    """
+    from users.models import User
+
+    cached = await principal_cache.aget(user_id)
+    if cached is None:
+        user = await User.objects.filter(pk=user_id).only(*PRINCIPAL_FIELDS, 'password').afirst()
+        if user is None:
+            return None
+        cached = _principal_values(user)
+        await principal_cache.aset(user_id, cached)
+
+    return _build_principal(cached)
+
+
+def _principal_values(user):
+    """
+    :return: Tuple of the PRINCIPAL_FIELDS values and the session auth hash
+    """
+    values = tuple(
+        getattr(user, user._meta.get_field(field_name).attname) for field_name in PRINCIPAL_FIELDS
+    )
+    return values, user.get_session_auth_hash()
+
+
+def _build_principal(cached):
+    from users.models import User
+
+    values, session_auth_hash = cached
+    field_names = [User._meta.get_field(field_name).attname for field_name in PRINCIPAL_FIELDS]
+    user = User.from_db(DEFAULT_DB_ALIAS, field_names, list(values))
+    user.cached_session_auth_hash = session_auth_hash
+    return user
+
+
+def invalidate_principal(user_id):
+    principal_cache.delete(user_id)
@@ -0,0 +1,60 @@
+# users/geo.py
+import math
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def distance_km(latitude, longitude, other_latitude, other_longitude):
+    """
+    Equirectangular distance approximation, accurate to well under 1% at
+    city scale; ``distance_km_expression`` computes the same value in SQL
+
+    :return: Distance in kilometres
+    """
+    x = math.radians(other_longitude - longitude) * math.cos(
+        math.radians((latitude + other_latitude) / 2)
+    )
+    y = math.radians(other_latitude - latitude)
+    return EARTH_RADIUS_KM * math.sqrt(x * x + y * y)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Smallest latitude/longitude box containing the circle of ``radius_km``
+
+    :return: Tuple of (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(abs(latitude) + lat_delta, 89.9)))
+    lon_delta = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+    return (
+        max(latitude - lat_delta, -90.0),
+        min(latitude + lat_delta, 90.0),
+        longitude - lon_delta,
+        longitude + lon_delta,
+    )
+
+
+def distance_km_expression(latitude, longitude, prefix=''):
+    """
+    Build the ``distance_km`` approximation as a database expression
+
+    :param latitude: Origin latitude in degrees
+    :param longitude: Origin longitude in degrees
+    :param prefix: Lookup path to the model holding the coordinates,
+        e.g. ``'provider__'``
+    :return: Float expression
+    """
+    from django.db.models import F, FloatField, Value
+    from django.db.models.functions import Cos, Radians, Sqrt
+
+    other_latitude = F(f'{prefix}latitude')
+    other_longitude = F(f'{prefix}longitude')
+
+    x = Radians(other_longitude - Value(longitude)) * Cos(
+        Radians((other_latitude + Value(latitude)) / Value(2.0))
+    )
+    y = Radians(other_latitude - Value(latitude))
+
+    return Value(EARTH_RADIUS_KM) * Sqrt(x * x + y * y, output_field=FloatField())
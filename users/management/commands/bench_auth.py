@@ -0,0 +1,81 @@
+# users/management/commands/bench_auth.py
+import base64
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+from users.tokens import issue_tokens
+
+TOKEN_URL = '/api/auth/token/'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the per-request cost and query count of session, HTTP Basic '
+        'and signed bearer token authentication on one endpoint'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True,
+                            help='Existing user to authenticate as')
+        parser.add_argument('--password', required=True,
+                            help="The user's password (for Basic and the token endpoint)")
+        parser.add_argument('--url', default='/api/match-requests/',
+                            help='GET endpoint to request')
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']} does not exist")
+        if not user.check_password(options['password']):
+            raise CommandError('Wrong password')
+
+        session_client = Client()
+        session_client.force_login(user)
+        basic = base64.b64encode(f"{options['username']}:{options['password']}".encode()).decode()
+        access = issue_tokens(user)['access']
+
+        schemes = {
+            'session': (session_client, {}),
+            'basic': (Client(), {'HTTP_AUTHORIZATION': f'Basic {basic}'}),
+            'bearer token': (Client(), {'HTTP_AUTHORIZATION': f'Bearer {access}'}),
+        }
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for label, (client, headers) in schemes.items():
+                self.report(label, lambda: client.get(options['url'], **headers), options['requests'])
+
+            credentials = {'username': options['username'], 'password': options['password']}
+            self.report(
+                f'token obtain ({TOKEN_URL})',
+                lambda: Client().post(TOKEN_URL, credentials, content_type='application/json'),
+                # Every request hashes the password, so fewer are enough
+                max(options['requests'] // 10, 1)
+            )
+
+    def report(self, label, send, requests):
+        with CaptureQueriesContext(connection) as queries:
+            response = send()
+        # Read now: later requests reset the connection's query log
+        query_count = len(queries)
+        if response.status_code != 200:
+            raise CommandError(f'{label}: HTTP {response.status_code}')
+
+        latencies = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            send()
+            latencies.append(time.perf_counter() - started)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(
+            f'  {query_count} queries/request, mean {statistics.mean(latencies) * 1000:.2f} ms, '
+            f'median {statistics.median(latencies) * 1000:.2f} ms over {requests} requests'
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_geohash_idx',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='geohash',
+        ),
+    ]
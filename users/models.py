@@ -1,7 +1,11 @@
 # users/models.py
 from django.db import models
+from django.db.models import DEFERRED
 from django.contrib.auth.models import AbstractUser
 
+# Profile fields that decide which searches a provider can appear in
+LOCATION_FIELDS = ('location', 'latitude', 'longitude')
+
 
 class User(AbstractUser):
     USER_TYPES = (
@@ -13,3 +17,43 @@ class User(AbstractUser):
     phone_number = models.CharField(max_length=15, blank=True, null=True)
     location = models.CharField(max_length=255, blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
+
+    # Structured location for proximity matching
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
+    # Validator of listings embedding the profile; logins (which only save
+    # last_login) leave it alone
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Bounding-box prefilter of "near me" searches
+            models.Index(fields=['latitude', 'longitude'], name='user_lat_lon_idx'),
+        ]
+
+    # Set on cached principals (users.cache), which do not load the password
+    cached_session_auth_hash = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored location so saves can tell whether it moved
+        instance._loaded_location = instance.location_state()
+        return instance
+
+    def location_state(self):
+        """
+        :return: Tuple of the loaded LOCATION_FIELDS values (DEFERRED if not loaded)
+        """
+        return tuple(self.__dict__.get(name, DEFERRED) for name in LOCATION_FIELDS)
+
+    @property
+    def has_coordinates(self):
+        return self.latitude is not None and self.longitude is not None
+
+    def get_session_auth_hash(self):
+        # A cached principal carries the hash instead of the password hash;
+        # once the password is loaded (or changed) it is the source of truth
+        if self.cached_session_auth_hash and 'password' in self.get_deferred_fields():
+            return self.cached_session_auth_hash
+        return super().get_session_auth_hash()
@@ -0,0 +1,29 @@
+# users/projections.py
+"""
+Read-only projections of users to plain dicts
+
+The hot read paths embed provider profiles in every serialized service.
+Projecting them straight from ``values()`` skips model instances and the
+serializer while producing the same representation.
+"""
+
+# Representation of PublicProfileSerializer, in the same order; contact
+# details (email, phone number) are not shown to other users
+PUBLIC_PROFILE_FIELDS = (
+    'id', 'username', 'user_type', 'location', 'latitude', 'longitude'
+)
+
+
+def project_profiles(queryset):
+    """
+    :param queryset: User queryset
+    :return: Dict mapping user id to public profile dict
+    """
+    return {row['id']: row for row in queryset.values(*PUBLIC_PROFILE_FIELDS)}
+
+
+async def aproject_profiles(queryset):
+    """
+    Async variant of ``project_profiles`` using the async ORM APIs
+    """
+    return {row['id']: row async for row in queryset.values(*PUBLIC_PROFILE_FIELDS)}
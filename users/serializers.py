@@ -32,11 +32,14 @@ class UserSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'username', 'email', 'password',
             'confirm_password', 'user_type',
-            'location', 'phone_number'
+            'location', 'phone_number',
+            'latitude', 'longitude'
         ]
         extra_kwargs = {
             'email': {'required': True},
-            'user_type': {'required': True}
+            'user_type': {'required': True},
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180}
         }
 
     def validate(self, attrs):
@@ -47,6 +50,10 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {"password": "Password fields didn't match."}
             )
+        if (attrs.get('latitude') is None) != (attrs.get('longitude') is None):
+            raise serializers.ValidationError(
+                {"latitude": "Latitude and longitude must be set together."}
+            )
         return attrs
 
     def create(self, validated_data):
@@ -61,7 +68,9 @@ class UserSerializer(serializers.ModelSerializer):
                 password=validated_data['password'],
                 user_type=validated_data.get('user_type', 'seeker'),
                 location=validated_data.get('location', ''),
-                phone_number=validated_data.get('phone_number', '')
+                phone_number=validated_data.get('phone_number', ''),
+                latitude=validated_data.get('latitude'),
+                longitude=validated_data.get('longitude')
             )
             return user
         except Exception as e:
@@ -69,3 +78,15 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 {"error": f"User creation failed: {str(e)}"}
             )
+
+
+class PublicProfileSerializer(serializers.ModelSerializer):
+    """
+    Profile of a user as shown to other users (e.g. a service's provider),
+    without contact details
+    """
+
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'user_type', 'location', 'latitude', 'longitude']
+        read_only_fields = fields
@@ -0,0 +1,21 @@
+# users/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.cache import invalidate_principal, invalidate_provider_profile
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_caches(sender, instance, **kwargs):
+    user_id = instance.pk
+
+    def invalidate():
+        invalidate_provider_profile(user_id)
+        invalidate_principal(user_id)
+
+    # Now, so the writing transaction sees the change, and again after
+    # commit: a concurrent request may cache the old row in between
+    invalidate()
+    transaction.on_commit(invalidate)
@@ -1,3 +1,206 @@
-from django.test import TestCase
+import logging
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from seeker_provider_app.cache import VersionedCache
+from seeker_provider_app.instrumentation import request_metrics
+from seeker_provider_app.log import QueuedFileHandler
+from services.models import Service, ServiceCategory
+from users.cache import (
+    aget_principal, aget_provider_profiles, get_provider_profiles, principal_cache,
+    provider_profile_cache
+)
+from users.models import User
+
+
+class TokenAuthenticationTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        self.user = User.objects.create_user(
+            username='seeker', password='correct horse battery', user_type='seeker', location='Cebu'
+        )
+        self.client = APIClient()
+
+    def obtain(self, password='correct horse battery'):
+        return self.client.post(
+            '/api/auth/token/', {'username': 'seeker', 'password': password}, format='json'
+        )
+
+    def test_login_paths_fetch_the_user_once(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.obtain().status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.obtain('wrong').status_code, 401)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api-auth/login/', {'username': 'seeker', 'password': 'correct horse battery'},
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        user_selects = [
+            query for query in queries
+            if query['sql'].startswith('SELECT') and 'FROM "users_user"' in query['sql']
+        ]
+        self.assertEqual(len(user_selects), 1)
+
+        response = self.client.post(
+            '/api-auth/login/', {'username': 'nobody', 'password': 'x'}, format='json'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_session_login_records_the_configured_backend(self):
+        self.client.post(
+            '/api-auth/login/', {'username': 'seeker', 'password': 'correct horse battery'},
+            format='json'
+        )
+        self.assertEqual(
+            self.client.session['_auth_user_backend'], settings.AUTHENTICATION_BACKENDS[0]
+        )
+
+    def test_access_token_authenticates_without_user_or_session_queries(self):
+        access = self.obtain().json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/match-requests/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in queries
+            if 'users_user' in query['sql'] or 'django_session' in query['sql']
+        ])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access[:-2]}xx')
+        self.assertEqual(self.client.get('/api/match-requests/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with override_settings(ACCESS_TOKEN_LIFETIME=0):
+            self.assertEqual(self.client.get('/api/match-requests/').status_code, 401)
+
+    def test_refresh_issues_new_tokens_until_the_password_changes(self):
+        refresh = self.obtain().json()['refresh']
+
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+        self.user.set_password('a new long passphrase')
+        self.user.save()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class PrincipalCacheTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        principal_cache.invalidate()
+        self.user = User.objects.create_user(
+            username='provider', password='correct horse battery', user_type='provider',
+            location='Cebu', bio='A long biography' * 100
+        )
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def user_queries(self, path='/api/match-requests/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries if 'FROM "users_user"' in query['sql']]
+
+    def test_session_requests_reuse_the_cached_principal(self):
+        (first,) = self.user_queries()
+        self.assertNotIn('"bio"', first)
+        self.assertEqual(self.user_queries(), [])
+
+        response = self.client.get('/api/match-requests/inbox/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_the_password_hash_is_not_cached(self):
+        self.user_queries()
+        values, session_auth_hash = principal_cache.get(self.user.pk)
+        self.assertNotIn(self.user.password, values)
+        self.assertEqual(session_auth_hash, self.user.get_session_auth_hash())
+
+    def test_user_changes_invalidate_the_principal(self):
+        self.user_queries()
+
+        self.user.user_type = 'seeker'
+        self.user.save()
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.client.get('/api/match-requests/inbox/').status_code, 403)
+
+        # The session's auth hash no longer matches
+        self.user.set_password('a new long passphrase')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/match-requests/').status_code, 401)
+
+    def test_inactive_users_are_not_authenticated(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/match-requests/').status_code, 401)
+
+
+class ProviderProfileCacheTest(TestCase):
+    def setUp(self):
+        request_metrics.reset()
+        provider_profile_cache.invalidate()
+        self.provider = User.objects.create(username='provider', user_type='provider', location='Cebu')
+        Service.objects.create(
+            provider=self.provider, category=ServiceCategory.objects.create(name='Plumbing'),
+            name='Leak repair', description='Fix leaks', price='80.00', availability_type='online'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='seeker', user_type='seeker'))
+
+    def listed_location(self):
+        response = self.client.get('/api/services/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()[0]['provider']['location']
+
+    def test_profile_edits_show_in_the_next_listing(self):
+        self.assertEqual(self.listed_location(), 'Cebu')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.provider.location = 'Davao'
+            self.provider.save()
+            # A concurrent listing, reading before the commit, caches the old profile
+            provider_profile_cache.set(self.provider.pk, {
+                **get_provider_profiles([self.provider.pk])[self.provider.pk], 'location': 'Cebu'
+            })
+        self.assertEqual(self.listed_location(), 'Davao')
+
+    def test_async_lookups_share_the_cache_through_its_async_api(self):
+        profiles = get_provider_profiles([self.provider.pk])
+        async_to_sync(aget_principal)(self.provider.pk)
+
+        with mock.patch.object(VersionedCache, 'get', side_effect=AssertionError), \
+                mock.patch.object(VersionedCache, 'get_many', side_effect=AssertionError), \
+                self.assertNumQueries(0):
+            self.assertEqual(async_to_sync(aget_provider_profiles)([self.provider.pk]), profiles)
+            self.assertEqual(async_to_sync(aget_principal)(self.provider.pk).location, 'Cebu')
+
+class QueuedFileHandlerTest(SimpleTestCase):
+    def test_records_are_written_by_the_listener(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'authentication.log')
+            handler = QueuedFileHandler(path, delay=True)
+            handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+            logger = logging.getLogger('users.tests.queued')
+            logger.addHandler(handler)
+            try:
+                logger.warning('Failed login attempt for username %s', 'seeker')
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+
+            with open(path) as log_file:
+                self.assertEqual(log_file.read(), 'WARNING Failed login attempt for username seeker\n')
@@ -0,0 +1,90 @@
+# users/tokens.py
+"""
+Signed, stateless access and refresh tokens
+
+Tokens are ``django.core.signing`` payloads (HMAC-SHA256 over SECRET_KEY)
+with a timestamp, so they are verified without any storage. The short-lived
+access token carries the claims request handling needs about its user, so
+authenticating with it does not touch the database. The refresh token only
+names the user and a fingerprint of their password hash: refreshing loads
+the user once, and changing the password revokes outstanding refresh tokens.
+"""
+from django.conf import settings
+from django.core import signing
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+ACCESS_SALT = 'users.tokens.access'
+REFRESH_SALT = 'users.tokens.refresh'
+
+# User fields carried by access tokens, in model field order
+ACCESS_CLAIMS = (
+    'id', 'username', 'is_active', 'user_type', 'location', 'latitude', 'longitude'
+)
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def password_fingerprint(user):
+    return salted_hmac(REFRESH_SALT, user.password).hexdigest()[:16]
+
+
+def issue_tokens(user):
+    """
+    :param user: User object
+    :return: Dict with ``access``, ``refresh`` and ``expires_in`` (seconds)
+    """
+    access = signing.dumps([getattr(user, claim) for claim in ACCESS_CLAIMS], salt=ACCESS_SALT)
+    refresh = signing.dumps([user.pk, password_fingerprint(user)], salt=REFRESH_SALT)
+    return {
+        'access': access,
+        'refresh': refresh,
+        'expires_in': settings.ACCESS_TOKEN_LIFETIME,
+    }
+
+
+def user_from_access_token(token):
+    """
+    Build the token's user without querying the database
+
+    The user is a model instance as if loaded with
+    ``.only(*ACCESS_CLAIMS)``: any other field is loaded on first access,
+    and saving it only writes the fields that were changed or loaded.
+
+    :param token: Access token string
+    :return: User object
+    :raises InvalidToken: Bad signature, malformed or expired token
+    """
+    from users.models import User
+
+    try:
+        values = signing.loads(token, salt=ACCESS_SALT, max_age=settings.ACCESS_TOKEN_LIFETIME)
+    except signing.BadSignature:
+        raise InvalidToken('Invalid or expired access token')
+
+    if not isinstance(values, list) or len(values) != len(ACCESS_CLAIMS):
+        raise InvalidToken('Malformed access token')
+
+    field_names = [User._meta.get_field(claim).attname for claim in ACCESS_CLAIMS]
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, values)
+
+
+def user_id_from_refresh_token(token):
+    """
+    :param token: Refresh token string
+    :return: Tuple of (user id, password fingerprint) to check against the user
+    :raises InvalidToken: Bad signature, malformed or expired token
+    """
+    try:
+        user_id, fingerprint = signing.loads(
+            token, salt=REFRESH_SALT, max_age=settings.REFRESH_TOKEN_LIFETIME
+        )
+    except (signing.BadSignature, TypeError, ValueError):
+        raise InvalidToken('Invalid or expired refresh token')
+    return user_id, fingerprint
+
+
+def refresh_matches(user, fingerprint):
+    return constant_time_compare(password_fingerprint(user), fingerprint)
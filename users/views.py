@@ -1,6 +1,7 @@
 # users/views.py
 from rest_framework import viewsets, permissions, status
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login
+from django.contrib.auth.signals import user_login_failed
 from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -9,11 +10,13 @@ from django.middleware.csrf import get_token
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
+from django.conf import settings
 
 import logging
 
 from .models import User
 from .serializers import UserSerializer
+from .tokens import InvalidToken, issue_tokens, refresh_matches, user_id_from_refresh_token
 
 logger = logging.getLogger(__name__)
 
@@ -70,74 +73,104 @@ class CustomLoginView(APIView):
         return Response({'csrf_token': get_token(request)})
 
     def post(self, request):
-        # Enhanced logging and debugging
         username = request.data.get('username')
         password = request.data.get('password')
 
-        # Log incoming request details
-        logger.info(f"Login attempt for username: {username}")
+        user, error = authenticate_once(request, username, password)
+        if error is not None:
+            return error
 
-        # Comprehensive authentication debugging
+        login(request, user)
+        return Response({
+            'detail': 'Successfully logged in',
+            'user_id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'user_type': getattr(user, 'user_type', None)
+        }, status=status.HTTP_200_OK)
+
+
+class TokenObtainView(APIView):
+    """
+    Exchange a username and password for an access and a refresh token
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        user, error = authenticate_once(
+            request, request.data.get('username'), request.data.get('password')
+        )
+        if error is not None:
+            return error
+
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+class TokenRefreshView(APIView):
+    """
+    Exchange a refresh token for a new access and refresh token
+    """
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
         try:
-            # Check if user exists
-            User = get_user_model()
-            try:
-                user_exists = User.objects.filter(username=username).exists()
-                logger.info(f"User exists: {user_exists}")
-            except Exception as e:
-                logger.error(f"Error checking user existence: {e}")
-                return Response({
-                    'detail': 'Database error',
-                    'error': str(e)
-                }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-            # Detailed authentication
-            user = authenticate(username=username, password=password)
-
-            if user is not None:
-                # Check if user is active
-                if user.is_active:
-                    login(request, user)
-                    logger.info(f"Successful login for user: {username}")
-                    return Response({
-                        'detail': 'Successfully logged in',
-                        'user_id': user.id,
-                        'username': user.username,
-                        'email': user.email,
-                        'user_type': getattr(user, 'user_type', None)
-                    }, status=status.HTTP_200_OK)
-                else:
-                    logger.warning(f"Inactive user login attempt: {username}")
-                    return Response({
-                        'detail': 'User account is not active'
-                    }, status=status.HTTP_403_FORBIDDEN)
-            else:
-                # More detailed error logging
-                logger.warning(f"Failed login attempt for username: {username}")
-
-                # Check if username exists to provide more specific feedback
-                try:
-                    user_with_username = User.objects.filter(username=username).first()
-                    if user_with_username:
-                        return Response({
-                            'detail': 'Invalid password',
-                            'error_code': 'INVALID_PASSWORD'
-                        }, status=status.HTTP_401_UNAUTHORIZED)
-                    else:
-                        return Response({
-                            'detail': 'User not found',
-                            'error_code': 'USER_NOT_FOUND'
-                        }, status=status.HTTP_404_NOT_FOUND)
-                except Exception as e:
-                    logger.error(f"Error during login verification: {e}")
-                    return Response({
-                        'detail': 'Authentication system error',
-                        'error': str(e)
-                    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        except Exception as e:
-            logger.error(f"Unexpected error during login: {e}")
+            user_id, fingerprint = user_id_from_refresh_token(request.data.get('refresh') or '')
+        except InvalidToken as e:
+            return Response({'detail': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is None or not refresh_matches(user, fingerprint):
             return Response({
-                'detail': 'Unexpected authentication error',
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+                'detail': 'Invalid or expired refresh token'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+def authenticate_once(request, username, password):
+    """
+    Check credentials with a single user lookup
+
+    Does what ``authenticate()`` does with ModelBackend, but keeps the fetched
+    user so the failure responses need no second lookup.
+
+    :return: Tuple of (user, None) on success or (None, error Response)
+    """
+    if not username or not password:
+        return None, Response({
+            'detail': 'Username and password are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    UserModel = get_user_model()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(username)
+    except UserModel.DoesNotExist:
+        # Hash anyway so response time does not reveal unknown usernames
+        UserModel().set_password(password)
+        user_login_failed.send(sender=__name__, credentials={'username': username}, request=request)
+        logger.warning('Failed login attempt for unknown username %s', username)
+        return None, Response({
+            'detail': 'User not found',
+            'error_code': 'USER_NOT_FOUND'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if not user.check_password(password):
+        user_login_failed.send(sender=__name__, credentials={'username': username}, request=request)
+        logger.warning('Failed login attempt for username %s', username)
+        return None, Response({
+            'detail': 'Invalid password',
+            'error_code': 'INVALID_PASSWORD'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    if not user.is_active:
+        logger.warning('Inactive user login attempt: %s', username)
+        return None, Response({
+            'detail': 'User account is not active'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    # login() records which backend authenticated the user: the checks above
+    # are ModelBackend's, which the first configured backend extends
+    user.backend = settings.AUTHENTICATION_BACKENDS[0]
+    return user, None